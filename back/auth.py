@@ -3,18 +3,24 @@
 # ابزارهای احراز هویت مبتنی بر JWT و وابستگی‌های FastAPI
 # ---------------------------------------------------------------------------
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 import os
+import threading
+import time
+import uuid
 from pathlib import Path
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+import hashing
 import model
-from database import get_db
+from database import AsyncSessionLocal, get_async_db
 
 # ---------- پیکربندی از .env ----------
 from dotenv import load_dotenv
@@ -28,51 +34,304 @@ SECRET_KEY = os.getenv(
 )
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+# هر چند ثانیه ابطال‌های تازهٔ workerهای دیگر از DB خوانده شود (فقط SELECT؛ توکن ادمین همیشه با DB چک می‌شود)
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "10"))
+# همپوشانی پنجرهٔ خواندن دوره‌ای (ثانیه): ردیفی که زمانش پیش از commit محاسبه شده و دیرتر
+# commit شده (worker دیگر) هم دیده شود
+REVOCATION_SYNC_OVERLAP = 60.0
+# کش کاربر احرازشده: مدت اعتبار (ثانیه) و حداکثر تعداد ورودی‌ها
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_MAX = int(os.getenv("PRINCIPAL_CACHE_MAX", "10000"))
 
-# ---------- bcrypt ----------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# ---------- bcrypt (پیکربندی و process pool در hashing.py) ----------
+pwd_context = hashing.pwd_context
 
 # ---------- OAuth2 ----------
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
 # ---------- توابع رمز ----------
+# نسخه‌های sync (برای اسکریپت‌ها)؛ هندلرهای وب از hashing.pool استفاده می‌کنند.
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hashing.hash_password(password)
 
 # ---------- ساخت توکن ----------
+# access token شامل ادعاهای امضاشدهٔ uid/role است تا مجوزدهی بدون کوئری DB انجام شود؛
+# refresh token فقط sub/uid دارد و برای گرفتن access token تازه (با نقش فعلی DB) است.
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # iat با کسر ثانیه (NumericDate اعشاری مجاز است) تا با زمان ابطال در همان ثانیه مقایسه‌پذیر باشد
+    to_encode.update({"exp": expire, "iat": now.timestamp(), "typ": "access"})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_refresh_token(username: str, user_id: int) -> str:
+    now = datetime.now(timezone.utc)
+    to_encode = {
+        "sub": username,
+        "uid": user_id,
+        "typ": "refresh",
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    }
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def create_user_tokens(user) -> dict:
+    """access + refresh برای یک کاربر (UserTable یا Principal)؛ ورودی مستقیم schemas.Token."""
+    access = create_access_token({"sub": user.username, "uid": user.id, "role": user.role or "user"})
+    return {
+        "access_token": access,
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(user.username, user.id),
+    }
+
+def decode_refresh_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        payload = {}
+    if payload.get("typ") != "refresh" or payload.get("uid") is None:
+        raise HTTPException(status_code=401, detail="Refresh token نامعتبر")
+    return payload
+
+# ---------- کش کاربر احرازشده ----------
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    نمای سبک و تغییرناپذیر کاربر احرازشده.
+    فقط ستون‌های لازم برای مجوز/نمایش را دارد و هیچ رابطه‌ای (مثل photos) بارگذاری نمی‌کند؛
+    فیلدها هم‌نام ستون‌های UserTable هستند تا روترها و _user_out بدون تغییر کار کنند.
+    """
+    id: int
+    username: str
+    role: str
+    display_name: str | None = None
+    email: str | None = None
+    avatar_url: str | None = None
+
+
+# username -> (زمان انقضا, Principal) ؛ ترتیب درج برای بیرون‌انداختن قدیمی‌ترین‌ها
+_principal_cache: "OrderedDict[str, tuple[float, Principal]]" = OrderedDict()
+_principal_lock = threading.Lock()
+
+
+async def _load_principal(db: AsyncSession, username: str) -> Principal | None:
+    """یک کوئری ستونی روی UserTable (بدون hydrate شدن ORM)."""
+    U = model.UserTable
+    row = (
+        await db.execute(
+            select(U.id, U.username, U.role, U.display_name, U.email, U.avatar_url)
+            .where(U.username == username)
+        )
+    ).first()
+    if row is None:
+        return None
+    return Principal(
+        id=row.id,
+        username=row.username,
+        role=row.role or "user",
+        display_name=row.display_name,
+        email=row.email,
+        avatar_url=row.avatar_url,
+    )
+
+
+async def get_principal(db: AsyncSession, username: str) -> Principal | None:
+    """Principal از کش (در صورت تازه بودن) یا از DB؛ کاربر ناموجود کش نمی‌شود."""
+    now = time.monotonic()
+    with _principal_lock:
+        hit = _principal_cache.get(username)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+
+    principal = await _load_principal(db, username)
+    if principal is None or PRINCIPAL_CACHE_TTL <= 0:
+        return principal
+
+    with _principal_lock:
+        _principal_cache[username] = (now + PRINCIPAL_CACHE_TTL, principal)
+        _principal_cache.move_to_end(username)
+        while len(_principal_cache) > PRINCIPAL_CACHE_MAX:
+            _principal_cache.popitem(last=False)
+    return principal
+
+
+def invalidate_principal(username: str | None = None) -> None:
+    """حذف یک کاربر از کش (مثلاً پس از تغییر نقش)؛ بدون آرگومان کل کش پاک می‌شود."""
+    with _principal_lock:
+        if username is None:
+            _principal_cache.clear()
+        else:
+            _principal_cache.pop(username, None)
+
+
+# ---------- ابطال توکن‌ها (تغییر نقش) ----------
+# user_id -> زمان ابطال (epoch ثانیه با کسر ثانیه)؛ access tokenهای صادرشده تا آن لحظه
+# (iat <= cutoff) پذیرفته نمی‌شوند.
+_revoked_before: dict[int, float] = {}
+_revocations_seen: datetime | None = None   # بزرگ‌ترین revoked_at خوانده‌شده از DB
+
+
+def _access_ttl_seconds() -> float:
+    return ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int) -> None:
+    """
+    ثبت ابطال در همان تراکنش جاری (commit با فراخواننده) + اعمال فوری در حافظه.
+    پس از تنزل نقش، توکن قبلی دیگر کار نمی‌کند و کلاینت باید refresh کند.
+    """
+    await revoke_tokens_for(db, [user_id])
+
+
+async def revoke_tokens_for(db: AsyncSession, user_ids: list[int]) -> None:
+    """مثل revoke_user_tokens برای چند کاربر با یک DELETE و یک INSERT گروهی (تغییر نقش گروهی)."""
+    if not user_ids:
+        return
+    now = datetime.utcnow()
+    T = model.TokenRevocation
+    await db.execute(delete(T).where(T.user_id.in_(user_ids)))
+    await db.execute(insert(T), [{"user_id": uid, "revoked_at": now} for uid in user_ids])
+    cutoff = now.replace(tzinfo=timezone.utc).timestamp()
+    for uid in user_ids:
+        _revoked_before[uid] = cutoff
+
+
+async def load_revocations(db: AsyncSession) -> int:
+    """
+    بارگذاری کامل جدول ابطال در حافظه؛ فقط هنگام راه‌اندازی. ردیف‌های قدیمی‌تر از عمر access
+    token (بی‌اثر) همین‌جا حذف می‌شوند، نه در حلقهٔ دوره‌ای.
+    """
+    global _revocations_seen
+    T = model.TokenRevocation
+    cutoff = datetime.utcnow() - timedelta(seconds=_access_ttl_seconds())
+    await db.execute(delete(T).where(T.revoked_at < cutoff))
+    await db.commit()
+    rows = (await db.execute(select(T.user_id, T.revoked_at))).all()
+    _revoked_before.clear()
+    _revocations_seen = None
+    _merge_revocations(rows)
+    _advance_seen(rows)
+    return len(rows)
+
+
+async def refresh_revocations(db: AsyncSession) -> int:
+    """
+    خواندن دوره‌ای و فقط‌خواندنی: ردیف‌هایی که از آخرین ردیف دیده‌شده (منهای همپوشانی) تازه‌ترند.
+    ورودی‌های منقضی فقط از حافظه کنار گذاشته می‌شوند؛ چیزی در DB نوشته نمی‌شود.
+    """
+    T = model.TokenRevocation
+    query = select(T.user_id, T.revoked_at)
+    if _revocations_seen is not None:
+        query = query.where(T.revoked_at > _revocations_seen - timedelta(seconds=REVOCATION_SYNC_OVERLAP))
+    rows = (await db.execute(query)).all()
+    _merge_revocations(rows)
+    _advance_seen(rows)
+    expired = time.time() - _access_ttl_seconds()
+    for uid in [u for u, c in _revoked_before.items() if c < expired]:
+        _revoked_before.pop(uid, None)
+    return len(rows)
+
+
+def _merge_revocations(rows) -> None:
+    """(user_id, revoked_at) → _revoked_before؛ فقط ابطال تازه‌تر جایگزین می‌شود."""
+    for uid, revoked_at in rows:
+        cutoff = revoked_at.replace(tzinfo=timezone.utc).timestamp()
+        if cutoff > _revoked_before.get(uid, float("-inf")):
+            _revoked_before[uid] = cutoff
+
+
+def _advance_seen(rows) -> None:
+    global _revocations_seen
+    for _, revoked_at in rows:
+        if _revocations_seen is None or revoked_at > _revocations_seen:
+            _revocations_seen = revoked_at
+
+
+async def sync_revocations(full: bool = False) -> None:
+    """با یک سشن مستقل: full=True بارگذاری کامل + پاک‌سازی (راه‌اندازی)، وگرنه refresh دوره‌ای."""
+    async with AsyncSessionLocal() as db:
+        await (load_revocations(db) if full else refresh_revocations(db))
+
+
+async def _revoked_in_db(user_id: int, issued_at: float) -> bool:
+    """همان _is_revoked با ردیف فعلی DB (ابطالی که worker دیگر همین الان ثبت کرده)."""
+    T = model.TokenRevocation
+    async with AsyncSessionLocal() as db:
+        revoked_at = await db.scalar(select(T.revoked_at).where(T.user_id == user_id))
+    if revoked_at is None:
+        return False
+    _merge_revocations([(user_id, revoked_at)])
+    return _is_revoked(user_id, issued_at)
+
+
+def _is_revoked(user_id: int, issued_at: float) -> bool:
+    """
+    مقایسه با دقت زیرثانیه: توکنی که در همان ثانیهٔ تنزل نقش (ولی پیش از آن) صادر شده هم رد
+    می‌شود. توکن‌های قدیمی با iat صحیح (گرد شده به پایین) در همان ثانیه هم رد می‌شوند.
+    """
+    cutoff = _revoked_before.get(user_id)
+    return cutoff is not None and float(issued_at) <= cutoff
+
+
 # ---------- وابستگی‌ها ----------
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> model.UserTable:
+def _decode_access(token: str) -> dict:
     unauthorized = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Token نامعتبر",
-        # headers={"WWW-Authenticate": "Bearer"},
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str | None = payload.get("sub")
-        if username is None:
-            raise unauthorized
     except JWTError:
         raise unauthorized
+    if payload.get("sub") is None or payload.get("typ", "access") != "access":
+        raise unauthorized
+    return payload
 
-    user = db.query(model.UserTable).filter(model.UserTable.username == username).first()
+
+async def _principal_for_legacy_token(username: str) -> Principal | None:
+    async with AsyncSessionLocal() as db:
+        return await get_principal(db, username)
+
+
+async def get_current_claims(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    کاربر جاری فقط از روی ادعاهای امضاشدهٔ توکن (id/role) — بدون کوئری DB.
+    برای مجوزدهی (بررسی نقش ادمین، مالکیت با id) کافی است؛ فیلدهای نمایشی ندارد.
+    استثنا: توکن با نقش admin با ردیف token_revocation همان کاربر در DB هم چک می‌شود (یک SELECT
+    با کلید اصلی) تا ادمینی که در worker دیگری تنزل نقش گرفته، بدون صبر برای همگام‌سازی رد شود.
+    توکن‌های قدیمی که uid/role ندارند از مسیر get_principal (کش/DB) رد می‌شوند.
+    """
+    payload = _decode_access(token)
+    uid, role = payload.get("uid"), payload.get("role")
+    if uid is None or role is None:
+        user = await _principal_for_legacy_token(payload["sub"])
+        if user is None:
+            raise HTTPException(status_code=401, detail="کاربر پیدا نشد")
+        return user
+    iat = payload.get("iat", 0)
+    if _is_revoked(uid, iat) or (role == "admin" and await _revoked_in_db(uid, iat)):
+        raise HTTPException(status_code=401, detail="توکن باطل شده است؛ دوباره وارد شوید")
+    return Principal(id=uid, username=payload["sub"], role=role)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """کاربر جاری با فیلدهای نمایشی (Principal کش‌شده از DB)."""
+    payload = _decode_access(token)
+    user = await get_principal(db, payload["sub"])
     if user is None:
         raise HTTPException(status_code=401, detail="کاربر پیدا نشد")
     return user
 
-def get_admin_user(current_user: model.UserTable = Depends(get_current_user)) -> model.UserTable:
+def get_admin_user(current_user: Principal = Depends(get_current_claims)) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="دسترسی غیرمجاز")
     return current_user
@@ -0,0 +1,195 @@
+# back/bulkio.py
+# ---------------------------------------------------------------------------
+# خواندن جریانی (streaming) فایل‌های CSV / NDJSON برای ورود گروهی داده
+# - فایل هرگز کامل در حافظه بارگذاری نمی‌شود؛ رکوردها سطر به سطر خوانده و
+#   در دسته‌های batch_size به فراخواننده داده می‌شوند.
+# - هر رکورد با شمارهٔ سطرش برمی‌گردد تا خطاها به سطر دقیق فایل گزارش شوند.
+# - سطر خراب (JSON نامعتبر، شیء نبودن) خطای همان سطر است و بقیهٔ فایل ادامه پیدا می‌کند.
+# - CSV باید سطر عنوان (header) داشته باشد؛ BOM اکسل (utf-8-sig) پشتیبانی می‌شود.
+# - encode_csv / encode_ndjson: برعکس همین؛ ردیف‌ها را تکه‌تکه به bytes تبدیل می‌کنند
+#   (خروجی گرفتن جریانی، بدون ساختن کل فایل در حافظه).
+# - open_format / next_batch / finish: کمک‌های مشترک روترهای ورود گروهی (users_bulk, content_bulk).
+# ---------------------------------------------------------------------------
+
+from dataclasses import dataclass, field
+from typing import IO, Iterator, Optional
+import codecs
+import csv
+import io
+import json
+import time
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+import schemas
+
+FORMATS = ("csv", "ndjson")
+BULK_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class Record:
+    line: int                      # شمارهٔ سطر در فایل (۱-مبنا؛ در CSV سطر عنوان = ۱)
+    data: dict | None = None       # مقادیر رکورد (کلیدها trim شده)
+    error: str | None = None       # اگر سطر قابل خواندن نبود
+
+
+@dataclass
+class BulkReport:
+    """
+    گزارش یک عملیات گروهی: شمارش موفق/ناموفق + خطای هر سطر (حداکثر MAX_REPORTED_ERRORS مورد).
+    rows_per_sec (در finish) برای سنجش توان عملیاتی است.
+    """
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+
+def detect_format(filename: str | None, content_type: str | None, explicit: str | None = None) -> str | None:
+    """format صریح > پسوند فایل > content-type؛ None یعنی ناشناخته."""
+    if explicit:
+        return explicit if explicit in FORMATS else None
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if ctype in ("text/csv", "application/csv"):
+        return "csv"
+    if ctype in ("application/x-ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "ndjson"
+    return None
+
+
+def _text(fileobj: IO[bytes]) -> io.TextIOWrapper:
+    # newline="" برای csv لازم است (فیلدهای چندخطی داخل کوتیشن)
+    return io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="strict", newline="")
+
+
+def _clean(row: dict) -> dict:
+    return {
+        k.strip(): (v.strip() if isinstance(v, str) else v)
+        for k, v in row.items()
+        if isinstance(k, str) and k.strip()
+    }
+
+
+def iter_csv(fileobj: IO[bytes]) -> Iterator[Record]:
+    text = _text(fileobj)
+    try:
+        reader = csv.DictReader(text)
+        for row in reader:
+            line = reader.line_num
+            if None in row:  # ستون‌های اضافه نسبت به header
+                yield Record(line, error="تعداد ستون‌ها بیشتر از سطر عنوان است")
+                continue
+            data = _clean(row)
+            if any(v not in (None, "") for v in data.values()):
+                yield Record(line, data=data)
+    except (csv.Error, UnicodeDecodeError) as e:
+        yield Record(getattr(reader, "line_num", 0) + 1, error=f"فایل CSV خراب است: {e}")
+    finally:
+        text.detach()
+
+
+def iter_ndjson(fileobj: IO[bytes]) -> Iterator[Record]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    for line, raw in enumerate(fileobj, start=1):
+        try:
+            chunk = decoder.decode(raw).strip()
+        except UnicodeDecodeError:
+            yield Record(line, error="کدگذاری سطر UTF-8 نیست")
+            continue
+        if not chunk:
+            continue
+        try:
+            obj = json.loads(chunk)
+        except ValueError:
+            yield Record(line, error="JSON نامعتبر")
+            continue
+        if not isinstance(obj, dict):
+            yield Record(line, error="هر سطر باید یک شیء JSON باشد")
+            continue
+        yield Record(line, data=_clean(obj))
+
+
+def iter_records(fileobj: IO[bytes], fmt: str) -> Iterator[Record]:
+    return iter_csv(fileobj) if fmt == "csv" else iter_ndjson(fileobj)
+
+
+def row_error(e) -> str:
+    """اولین خطای ValidationError پایتانتیک به شکل «فیلد: پیام» برای گزارش سطر."""
+    err = e.errors()[0]
+    loc = ".".join(str(x) for x in err.get("loc", ()))
+    return f"{loc}: {err.get('msg')}" if loc else str(err.get("msg"))
+
+
+def batched(records: Iterator[Record], size: int = BULK_BATCH_SIZE) -> Iterator[list[Record]]:
+    batch: list[Record] = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------- نوشتن جریانی (خروجی گرفتن) ----------
+def _plain(v):
+    return v.isoformat() if hasattr(v, "isoformat") else v
+
+
+def encode_csv(columns: list[str], rows, header: bool = False) -> bytes:
+    """
+    یک تکه از خروجی CSV (برای StreamingResponse / نوشتن در فایل).
+    header=True فقط برای تکهٔ اول: BOM + سطر عنوان (تا اکسل UTF-8 فارسی را درست باز کند).
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        buf.write("\ufeff")
+        writer.writerow(columns)
+    writer.writerows([_plain(v) for v in row] for row in rows)
+    return buf.getvalue().encode("utf-8")
+
+
+def encode_ndjson(columns: list[str], rows) -> bytes:
+    """یک تکه از خروجی NDJSON: هر ردیف یک شیء JSON در یک سطر."""
+    return "".join(
+        json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+# ---------- کمک‌های روترهای ورود گروهی ----------
+def open_format(file: UploadFile, fmt: Optional[str]) -> str:
+    fmt = detect_format(file.filename, file.content_type, fmt)
+    if fmt is None:
+        raise HTTPException(400, detail="قالب فایل باید csv یا ndjson باشد")
+    return fmt
+
+
+async def next_batch(batches):
+    # خواندن فایل آپلودی (SpooledTemporaryFile، ممکن است روی دیسک باشد) بلوکه‌کننده است
+    return await run_in_threadpool(next, batches, None)
+
+
+def finish(report: BulkReport, started: float) -> schemas.BulkReportOut:
+    elapsed = time.perf_counter() - started
+    return schemas.BulkReportOut(
+        processed=report.processed,
+        succeeded=report.succeeded,
+        failed=report.failed,
+        errors=sorted(report.errors, key=lambda e: e["line"]),
+        elapsed_ms=round(elapsed * 1000, 1),
+        rows_per_sec=round(report.succeeded / elapsed, 1) if elapsed > 0 else 0.0,
+    )
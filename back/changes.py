@@ -0,0 +1,107 @@
+# back/changes.py
+# ---------------------------------------------------------------------------
+# ثبت تغییرات محتوای عمومی (news / articles / guide)
+# - mark_changed(db, name): در تراکنش جاری نسخهٔ آن دسته را یکی زیاد می‌کند (جدول
+#   content_version)؛ همهٔ مسیرهای نوشتن ادمین قبل از commit صدا می‌زنند
+#   (mark_changed_sync برای Session همگام، مثلاً اسکریپت ورود گروهی).
+# - version(db, name): نسخه و زمان آخرین تغییر (برای ETag / Last-Modified).
+# - subscribe(fn): fn(names) بعد از commit موفق تراکنشی که چیزی را تغییر داده صدا زده
+#   می‌شود (در همین worker)؛ برای پاک‌کردن کش‌های درون‌پروسه‌ای. rollback = هیچ.
+# ---------------------------------------------------------------------------
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable
+import logging
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import model
+
+NEWS = "news"
+ARTICLES = "articles"
+GUIDE = "guide"
+NAMES = (NEWS, ARTICLES, GUIDE)
+
+logger = logging.getLogger(__name__)
+
+_PENDING = "zebin_changed"
+_subscribers: list[Callable[[frozenset[str]], None]] = []
+
+
+@dataclass(frozen=True)
+class Version:
+    version: int
+    changed_at: datetime | None
+
+
+def ensure_versions(bind) -> None:
+    """ردیف هر دسته را (اگر نیست) بساز تا mark_changed فقط یک UPDATE باشد. idempotent."""
+    V = model.ContentVersion
+    with bind.begin() as conn:
+        existing = set(conn.execute(select(V.name)).scalars())
+        missing = [{"name": n, "version": 0, "changed_at": datetime.utcnow()} for n in NAMES if n not in existing]
+        if missing:
+            conn.execute(insert(V), missing)
+
+
+def mark_changed_sync(session: Session, *names: str) -> None:
+    """همان mark_changed برای Session همگام (اسکریپت‌ها، یا داخل AsyncSession.run_sync)."""
+    V = model.ContentVersion
+    now = datetime.utcnow()
+    for name in names:
+        result = session.execute(
+            update(V).where(V.name == name)
+            .values(version=V.version + 1, changed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:  # ردیف‌ها در ensure_versions ساخته می‌شوند؛ این فقط برای نام تازه است
+            session.execute(insert(V).values(name=name, version=1, changed_at=now))
+    session.info.setdefault(_PENDING, set()).update(names)
+
+
+async def mark_changed(db: AsyncSession, *names: str) -> None:
+    """افزایش نسخه در همان تراکنش نوشتن؛ با commit فراخواننده ماندگار می‌شود."""
+    await db.run_sync(mark_changed_sync, *names)
+
+
+async def version(db: AsyncSession, name: str) -> Version:
+    row = (
+        await db.execute(
+            select(model.ContentVersion.version, model.ContentVersion.changed_at)
+            .where(model.ContentVersion.name == name)
+        )
+    ).first()
+    return Version(row.version, row.changed_at) if row else Version(0, None)
+
+
+def pending(session: Session) -> frozenset[str]:
+    """نام‌هایی که در تراکنش جاری این Session تغییر کرده‌اند (هنوز commit نشده)."""
+    return frozenset(session.info.get(_PENDING, ()))
+
+
+def subscribe(fn: Callable[[frozenset[str]], None]) -> None:
+    _subscribers.append(fn)
+
+
+def _notify(names: Iterable[str]) -> None:
+    names = frozenset(names)
+    for fn in _subscribers:
+        try:
+            fn(names)
+        except Exception:
+            logger.exception("change subscriber failed")
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    names = session.info.pop(_PENDING, None)
+    if names:
+        _notify(names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,125 @@
+# back/contentio.py
+# ---------------------------------------------------------------------------
+# ورود/خروج گروهی خبرها و مقالات (مشترک بین روتر content_bulk و scripts/content_bulk.py)
+# - validate: رکوردهای یک دسته (bulkio.Record) → سطرهای معتبر طبق NewsImportRow/ArticleImportRow
+#   (خطای هر سطر در BulkReport؛ id تکراری در همان فایل هم خطاست).
+# - apply_batch: upsert یک دسته در یک تراکنش روی Session همگام (در روتر با AsyncSession.run_sync):
+#   یک SELECT برای idهای موجود + UPDATE گروهی بر اساس کلید اصلی + INSERT گروهی، همراه با
+#   changes.mark_changed_sync (ETag/کش پاسخ)، جابه‌جایی شمارنده‌های دسته (facets؛ فقط وقتی
+#   تریگر ندارند) و یک commit. اگر دیتابیس دسته را رد کند
+#   (IntegrityError/DataError) دسته سطر به سطر تکرار می‌شود تا فقط سطرهای خراب خطا بگیرند.
+# - export_query / columns: SELECT همهٔ ستون‌ها به ترتیب id برای خروجی جریانی (yield_per).
+# ---------------------------------------------------------------------------
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+import bulkio
+import changes
+import facets
+import model, schemas
+
+EXPORT_CHUNK = 1000  # ردیف در هر تکهٔ خروجی (yield_per)
+
+
+@dataclass(frozen=True)
+class Kind:
+    name: str                  # news | articles (همان نام changes)
+    table: type
+    row: type[BaseModel]
+
+
+KINDS = {
+    changes.NEWS: Kind(changes.NEWS, model.NewsTable, schemas.NewsImportRow),
+    changes.ARTICLES: Kind(changes.ARTICLES, model.ArticleTable, schemas.ArticleImportRow),
+}
+
+
+def validate(kind: Kind, batch: list[bulkio.Record], report: bulkio.BulkReport, seen: set[int]) -> list[tuple[int, dict]]:
+    """سطرهای معتبر یک دسته: [(شمارهٔ سطر, مقادیر)]؛ فقط فیلدهای موجود در سطر (exclude_unset)."""
+    rows = []
+    for rec in batch:
+        report.processed += 1
+        if rec.error:
+            report.fail(rec.line, rec.error)
+            continue
+        data = {k: v for k, v in rec.data.items() if v not in (None, "")}
+        try:
+            row = kind.row.model_validate(data)
+        except ValidationError as e:
+            report.fail(rec.line, bulkio.row_error(e))
+            continue
+        if row.id is not None:
+            if row.id in seen:
+                report.fail(rec.line, "در همین فایل تکراری است")
+                continue
+            seen.add(row.id)
+        rows.append((rec.line, row.model_dump(exclude_unset=True)))
+    return rows
+
+
+def _upsert(session: Session, kind: Kind, rows: list[dict]) -> None:
+    T = kind.table
+    ids = [r["id"] for r in rows if "id" in r]
+    tracked = facets.tracked(T)
+    if not ids:
+        existing = {}
+    elif tracked:  # دستهٔ فعلی هم لازم است (شمارنده‌های facet)
+        existing = dict(session.execute(
+            select(T.id, T.category).where(T.id.in_(ids)).with_for_update()
+        ).all())
+    else:
+        existing = dict.fromkeys(session.scalars(select(T.id).where(T.id.in_(ids))))
+    now = datetime.utcnow()
+    updates = [{**r, "updated_at": now} for r in rows if r.get("id") in existing]
+    inserts = [r for r in rows if r.get("id") not in existing]
+    if tracked:
+        moved = [r for r in updates if "category" in r]
+        facets.apply_sync(session, tracked, facets.shift(
+            [existing[r["id"]] for r in moved],
+            [r["category"] for r in moved] + [r.get("category") for r in inserts],
+        ))
+    if updates:
+        session.execute(update(T), updates)  # UPDATE گروهی بر اساس کلید اصلی
+    if inserts:
+        session.execute(insert(T), inserts)
+
+
+def apply_batch(session: Session, kind: Kind, rows: list[tuple[int, dict]]) -> list[tuple[int, str]]:
+    """upsert یک دسته + commit. خروجی: [(شمارهٔ سطر, خطا)] سطرهایی که دیتابیس رد کرد."""
+    try:
+        _upsert(session, kind, [values for _, values in rows])
+        changes.mark_changed_sync(session, kind.name)
+        session.commit()
+        return []
+    except (IntegrityError, DataError):
+        session.rollback()
+
+    failures = []
+    for line, values in rows:
+        try:
+            _upsert(session, kind, [values])
+            changes.mark_changed_sync(session, kind.name)
+            session.commit()
+        except (IntegrityError, DataError) as e:
+            session.rollback()
+            failures.append((line, f"دیتابیس سطر را نپذیرفت: {e.orig}"))
+    return failures
+
+
+def columns(kind: Kind) -> list[str]:
+    return [c.name for c in kind.table.__table__.columns]
+
+
+def export_query(kind: Kind):
+    T = kind.table
+    return (
+        select(*(getattr(T, c) for c in columns(kind)))
+        .order_by(T.id)
+        .execution_options(yield_per=EXPORT_CHUNK)
+    )
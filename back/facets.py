@@ -0,0 +1,186 @@
+# back/facets.py
+# ---------------------------------------------------------------------------
+# شمارش خبرها/مقالات هر دسته برای چیپ‌های فیلتر (GET /news/facets و /articles/facets)
+# - جدول کوچک category_count (model.CategoryCount): برای هر (منبع، دسته) یک سطر با شمارنده؛
+#   خواندن facetها یک SELECT روی چند ده سطر است، نه GROUP BY روی کل جدول.
+# - روی SQLite تریگرهای AFTER INSERT/DELETE و AFTER UPDATE OF category شمارنده‌ها را در همان
+#   تراکنش نوشتن زیاد/کم می‌کنند؛ پس همهٔ مسیرهای نوشتن (روترهای ادمین، ورود گروهی، اسکریپت‌ها)
+#   بدون کد اضافه پوشش داده می‌شوند (مثل نمایهٔ search.py و sync_log در sync.py).
+#   خبر بدون دسته زیر '' شمرده می‌شود (در total هست، در فهرست دسته‌ها نه).
+# - روی دیتابیس‌های دیگر (پروفایل server) تریگر نصب نمی‌شود و خود مسیر نوشتن شمارنده‌ها را
+#   در همان تراکنش جابه‌جا می‌کند: writes.insert_one/update_one/delete_one و contentio._upsert
+#   برای جدول‌های SOURCES، apply/apply_sync را با تغییر هر دسته صدا می‌زنند (دستهٔ قبلی ردیف‌ها
+#   پیش از UPDATE/DELETE با SELECT ... FOR UPDATE خوانده می‌شود). counts در هر دو حالت فقط
+#   همین جدول را می‌خواند.
+# - rebuild(engine) شمارنده‌ها را از نو می‌سازد (scripts/rebuild_facets.py)؛ مثلاً بعد از
+#   نوشتن مستقیم در دیتابیس با ابزاری که تریگرها/مسیر نوشتن برنامه را دور می‌زند.
+# ---------------------------------------------------------------------------
+
+from collections import Counter
+from dataclasses import dataclass
+import os
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import changes
+import model
+from database import IS_SQLITE
+
+# تریگر فقط روی SQLite؛ FACETS_TRIGGERS=0 روی SQLite هم شمارش را به مسیر نوشتن می‌سپارد
+FACETS_TRIGGERS = IS_SQLITE and os.getenv("FACETS_TRIGGERS", "1") == "1"
+
+# منبع (همان نام changes) → جدول ORM
+SOURCES = {
+    changes.NEWS: model.NewsTable,
+    changes.ARTICLES: model.ArticleTable,
+}
+_KINDS = {table: kind for kind, table in SOURCES.items()}
+
+
+@dataclass
+class Facets:
+    total: int
+    categories: list[tuple[str, int]]   # (دسته، تعداد) — پرتعدادترین اول
+
+
+def ensure_facets(bind) -> None:
+    """ساخت تریگرها (SQLite) و پر کردن اولیهٔ category_count (فقط بار اول). idempotent."""
+    if not FACETS_TRIGGERS:
+        _ensure_counted(bind)
+        return
+    with bind.begin() as conn:
+        existing = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'").scalars())
+        for kind, table in SOURCES.items():
+            name = table.__tablename__
+            inc = (
+                f"INSERT INTO category_count(kind, category, count) VALUES ('{kind}', coalesce(new.category, ''), 1) "
+                "ON CONFLICT(kind, category) DO UPDATE SET count = count + 1"
+            )
+            dec = (
+                f"UPDATE category_count SET count = count - 1 "
+                f"WHERE kind = '{kind}' AND category = coalesce(old.category, ''); "
+                f"DELETE FROM category_count WHERE kind = '{kind}' AND category = coalesce(old.category, '') AND count <= 0"
+            )
+            conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS facet_{name}_ai AFTER INSERT ON {name} BEGIN {inc}; END")
+            conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS facet_{name}_ad AFTER DELETE ON {name} BEGIN {dec}; END")
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS facet_{name}_au AFTER UPDATE OF category ON {name} "
+                f"WHEN coalesce(old.category, '') IS NOT coalesce(new.category, '') BEGIN {dec}; {inc}; END"
+            )
+            if f"facet_{name}_ai" not in existing:
+                _fill(conn, kind, table)
+
+
+def _ensure_counted(bind) -> None:
+    """
+    حالت بدون تریگر: تریگرهای قبلی (اگر SQLite با FACETS_TRIGGERS=0 بالا آمده) حذف می‌شوند تا
+    دوبار شمرده نشود، و شمارنده‌های منبعی که هنوز هیچ سطری ندارد یک‌بار از GROUP BY پر می‌شوند.
+    """
+    C = model.CategoryCount
+    if IS_SQLITE:
+        with bind.begin() as conn:
+            for table in SOURCES.values():
+                for op in ("ai", "ad", "au"):
+                    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS facet_{table.__tablename__}_{op}")
+    for kind, table in SOURCES.items():
+        try:
+            with bind.begin() as conn:
+                if conn.scalar(select(C.count).where(C.kind == kind).limit(1)) is None:
+                    _fill(conn, kind, table)
+        except IntegrityError:
+            pass  # worker دیگری همزمان همین را پر کرد
+
+
+def rebuild(bind) -> dict[str, int]:
+    """شمارنده‌ها را از روی جدول‌های اصلی از نو می‌سازد؛ خروجی: منبع → تعداد کل."""
+    totals = {}
+    with bind.begin() as conn:
+        for kind, table in SOURCES.items():
+            totals[kind] = _fill(conn, kind, table)
+    return totals
+
+
+def _fill(conn, kind: str, table) -> int:
+    C = model.CategoryCount
+    conn.execute(delete(C).where(C.kind == kind))
+    rows = conn.execute(_group_by(table)).all()
+    if rows:
+        conn.execute(C.__table__.insert(), [{"kind": kind, "category": c, "count": n} for c, n in rows])
+    return sum(n for _, n in rows)
+
+
+def _group_by(table):
+    category = func.coalesce(table.category, "")
+    return select(category, func.count()).group_by(category)
+
+
+# ---------------- مسیر نوشتن (بدون تریگر) ----------------
+def tracked(table) -> str | None:
+    """منبع facet جدول اگر شمارنده‌هایش باید در مسیر نوشتن جابه‌جا شود؛ وگرنه None."""
+    return None if FACETS_TRIGGERS else _KINDS.get(table)
+
+
+def old_categories(table, where):
+    """SELECT دستهٔ فعلی ردیف‌ها پیش از UPDATE/DELETE؛ FOR UPDATE تا نوشتن همزمان دسته را عوض نکند."""
+    return select(table.category).where(where).with_for_update()
+
+
+def shift(old, new) -> Counter:
+    """تغییر شمارنده‌ها: هر دستهٔ old یکی کم، هر دستهٔ new یکی زیاد (None = بدون دسته)."""
+    deltas = Counter()
+    for c in old:
+        deltas[c or ""] -= 1
+    for c in new:
+        deltas[c or ""] += 1
+    return Counter({c: n for c, n in deltas.items() if n})
+
+
+def apply_sync(session: Session, kind: str, deltas: Counter) -> None:
+    """اعمال تغییرات شمارنده در همان تراکنش؛ سطرهایی که به صفر برسند حذف می‌شوند."""
+    if not deltas:
+        return
+    C = model.CategoryCount
+    # ترتیب ثابت دسته‌ها: دو تراکنش همزمان سطرها را به یک ترتیب قفل می‌کنند (بدون deadlock)
+    rows = [{"kind": kind, "category": c, "count": n} for c, n in sorted(deltas.items())]
+    session.execute(_upsert(session.get_bind().dialect.name, rows))
+    session.execute(
+        delete(C).where(C.kind == kind, C.category.in_(list(deltas)), C.count <= 0)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def apply(db: AsyncSession, kind: str, deltas: Counter) -> None:
+    """همان apply_sync برای AsyncSession."""
+    if deltas:
+        await db.run_sync(apply_sync, kind, deltas)
+
+
+def _upsert(dialect: str, rows: list[dict]):
+    """INSERT ... count یا «count = count + n» روی سطر موجود، در یک دستور."""
+    C = model.CategoryCount
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(C).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[C.kind, C.category], set_={"count": C.count + stmt.excluded["count"]}
+        )
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(C).values(rows)
+        return stmt.on_duplicate_key_update(count=C.count + stmt.inserted["count"])
+    raise NotImplementedError(f"facets: upsert for dialect {dialect!r}")
+
+
+async def counts(db: AsyncSession, kind: str) -> Facets:
+    C = model.CategoryCount
+    rows = (await db.execute(select(C.category, C.count).where(C.kind == kind))).all()
+    return Facets(
+        total=sum(n for _, n in rows),
+        categories=sorted(((c, n) for c, n in rows if c), key=lambda r: (-r[1], r[0])),
+    )
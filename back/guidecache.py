@@ -0,0 +1,224 @@
+# back/guidecache.py
+# ---------------------------------------------------------------------------
+# snapshot درون‌حافظه‌ای راهنمای تفکیک (GET /guide/ و GET /guide/{slug} بدون هیچ کوئری)
+# - build(session): همهٔ دسته‌ها + آیتم‌ها یک بار خوانده، گروه‌بندی (to_out) و به JSON
+#   کدگذاری می‌شوند: فهرست کامل و هر slug جدا به‌صورت bytes آماده + ETag هر کدام.
+# - current(): snapshot فعلی (شیء تغییرناپذیر؛ جایگزینی = یک انتساب، پس خواننده‌ها هرگز نیمه‌کاره
+#   نمی‌بینند).
+# - load(engine) در main.py هنگام راه‌اندازی. بعد از commit هر نوشتن راهنما در همین worker
+#   (changes.subscribe) فقط snapshot «کثیف» علامت می‌خورد و حلقهٔ پس‌زمینهٔ main.py بیدار می‌شود؛
+#   hook بعد از commit روی event loop اجرا می‌شود، پس هیچ کوئری یا بازسازی آن‌جا انجام نمی‌شود.
+#   بازسازی همیشه در thread است (asyncio.to_thread): حلقهٔ پس‌زمینه، یا fresh() برای خواننده‌ای
+#   که snapshot را کثیف ببیند (همین worker نوشتهٔ خودش را فوراً می‌بیند).
+#   workerهای دیگر با refresh_if_stale (همان حلقه هر GUIDE_SNAPSHOT_CHECK_SECONDS؛ یک کوئری
+#   نسخه) به‌روز می‌شوند.
+# - نسخه همان نسخهٔ تغییر guide در content_version است (هدر X-Guide-Version).
+# - advice: خلاصهٔ هر دسته (schemas.GuideAdvice) برای پاسخ /predict با advice=true؛ همراه
+#   snapshot ساخته می‌شود، پس با هر ویرایش راهنما خودکار به‌روز است.
+# - هر reload نمایهٔ جستجوی تقریبی آیتم‌ها (guidelookup.py) را هم به‌صورت تدریجی به‌روز می‌کند.
+# ---------------------------------------------------------------------------
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+import os
+import threading
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+import changes
+import guidelookup
+import httpcache
+import model, schemas
+
+GUIDE_SNAPSHOT_CHECK_SECONDS = float(os.getenv("GUIDE_SNAPSHOT_CHECK_SECONDS", "5"))
+GUIDE_ADVICE_MAX_ITEMS = int(os.getenv("GUIDE_ADVICE_MAX_ITEMS", "5"))  # نمونه در هر گروه خلاصه
+
+logger = logging.getLogger(__name__)
+
+# سریال‌ساز فهرست دسته‌ها
+CATEGORIES = TypeAdapter(List[schemas.GuideCategoryOut])
+
+
+def to_out(cat: model.GuideCategoryTable) -> schemas.GuideCategoryOut:
+    """
+    تبدیل شیٔ ORM دسته‌بندی به خروجی Pydantic گروه‌بندی‌شده:
+    - آیتم‌ها بر اساس kind به 4 گروه yes/no/prep/note تقسیم می‌شوند.
+    - notes اگر خالی باشد، به‌صورت None بازگردانده می‌شود تا در JSON حذف شود.
+    """
+    groups = {"yes": [], "no": [], "prep": [], "note": []}
+    for it in cat.items:
+        groups[it.kind.value].append(it.text)
+
+    return schemas.GuideCategoryOut(
+        slug=cat.slug,
+        name=cat.name,
+        description=cat.description,
+        color=cat.color,
+        examplesYes=groups["yes"],
+        examplesNo=groups["no"],
+        prep=groups["prep"],
+        notes=groups["note"] or None,  # خالی = None
+    )
+
+
+def to_advice(c: schemas.GuideCategoryOut) -> schemas.GuideAdvice:
+    n = GUIDE_ADVICE_MAX_ITEMS
+    return schemas.GuideAdvice(
+        slug=c.slug, name=c.name, examplesYes=c.examplesYes[:n], examplesNo=c.examplesNo[:n], prep=c.prep[:n]
+    )
+
+
+@dataclass(frozen=True)
+class Entry:
+    category: schemas.GuideCategoryOut
+    body: bytes          # JSON آمادهٔ GET /guide/{slug}
+    etag: str
+
+
+@dataclass(frozen=True)
+class GuideSnapshot:
+    version: int
+    changed_at: datetime | None
+    categories: tuple[schemas.GuideCategoryOut, ...]
+    list_body: bytes                                   # JSON آمادهٔ GET /guide/
+    list_etag: str
+    by_slug: dict[str, Entry] = field(default_factory=dict)
+    advice: dict[str, schemas.GuideAdvice] = field(default_factory=dict)   # slug → خلاصه
+
+
+def _version(session: Session) -> tuple[int, datetime | None]:
+    V = model.ContentVersion
+    row = session.execute(select(V.version, V.changed_at).where(V.name == changes.GUIDE)).first()
+    return (row.version, row.changed_at) if row else (0, None)
+
+
+def build(session: Session) -> GuideSnapshot:
+    """
+    snapshot تازه از DB. نسخه قبل و بعد از خواندن دسته‌ها خوانده می‌شود؛ اگر در این فاصله
+    نوشتنی commit شده باشد دوباره خوانده می‌شود تا داده و نسخه با هم بخوانند.
+    """
+    while True:
+        version, changed_at = _version(session)
+        cats = session.scalars(
+            select(model.GuideCategoryTable)
+            .options(selectinload(model.GuideCategoryTable.items))
+            .execution_options(populate_existing=True)
+        ).all()
+        if _version(session)[0] == version:
+            break
+    out = tuple(to_out(c) for c in cats)
+    return GuideSnapshot(
+        version=version,
+        changed_at=changed_at,
+        categories=out,
+        list_body=CATEGORIES.dump_json(list(out)),
+        list_etag=httpcache.make_etag(changes.GUIDE, version, "list"),
+        by_slug={
+            c.slug: Entry(c, c.model_dump_json().encode(), httpcache.make_etag(changes.GUIDE, version, "one", c.slug))
+            for c in out
+        },
+        advice={c.slug: to_advice(c) for c in out},
+    )
+
+
+_current: GuideSnapshot | None = None
+_engine = None
+_lock = threading.Lock()
+# snapshot کثیف = _requested > _built: هر commit راهنما _requested را زیاد می‌کند؛ هر بازسازی مقداری
+# را که پیش از خواندن DB دیده، بعد از جایگزینی در _built می‌گذارد (بازسازیِ نیمه‌کاره حساب نمی‌شود)
+_requested = 0
+_built = 0
+_gen_lock = threading.Lock()
+_wakeup: Callable[[], None] | None = None       # بیدار کردن حلقهٔ پس‌زمینه (main.py)
+
+
+def current() -> GuideSnapshot:
+    if _current is None:
+        raise RuntimeError("guide snapshot not loaded (guidecache.load)")
+    return _current
+
+
+def _swap(snap: GuideSnapshot) -> None:
+    global _current
+    # دو بازسازی هم‌زمان (بعد از commit و حلقهٔ پس‌زمینه): نسخهٔ قدیمی‌تر جایگزین تازه‌تر نشود
+    if _current is None or snap.version >= _current.version:
+        _current = snap
+
+
+def dirty() -> bool:
+    return _built < _requested
+
+
+def _reload_locked(bind=None) -> None:
+    global _built
+    target = _requested   # قبل از خواندن: نوشتنی که وسط بازسازی commit شود کثیف باقی می‌ماند
+    with Session(bind or _engine) as session:
+        _swap(build(session))
+        guidelookup.update(session)
+    _built = max(_built, target)
+
+
+def reload(bind=None) -> GuideSnapshot:
+    """بازسازی کامل (بلاک‌کننده؛ روی event loop فقط از طریق asyncio.to_thread)."""
+    with _lock:
+        _reload_locked(bind)
+    return _current
+
+
+def reload_if_dirty() -> bool:
+    """فقط اگر بعد از آخرین بازسازی نوشتنی در همین worker commit شده باشد (بلاک‌کننده)."""
+    with _lock:   # اگر بازسازی دیگری در جریان است، منتظر تمام شدنش می‌ماند
+        if not dirty():
+            return False
+        _reload_locked()
+    return True
+
+
+def refresh_if_stale() -> bool:
+    """اگر snapshot کثیف است یا نسخهٔ guide در DB با آن فرق دارد (نوشتن در worker دیگر) دوباره بساز."""
+    if not dirty():
+        with Session(_engine) as session:
+            version, _ = _version(session)
+        if _current is not None and version == _current.version:
+            return False
+    reload()
+    return True
+
+
+async def fresh() -> GuideSnapshot:
+    """
+    snapshot برای خواننده‌های async: اگر کثیف است اول در thread بازسازی می‌شود (event loop بلاک
+    نمی‌شود)؛ در حالت عادی فقط مقایسهٔ دو عدد است، بدون کوئری.
+    """
+    if dirty():
+        await asyncio.to_thread(reload_if_dirty)
+    return current()
+
+
+def set_wakeup(fn: Callable[[], None] | None) -> None:
+    global _wakeup
+    _wakeup = fn
+
+
+def _on_change(names: frozenset[str]) -> None:
+    # داخل after_commit (روی event loop برای AsyncSession): فقط علامت و بیدارباش، بدون I/O
+    global _requested
+    if changes.GUIDE in names:
+        with _gen_lock:
+            _requested += 1
+        if _wakeup is not None:
+            _wakeup()
+
+
+def load(bind) -> GuideSnapshot:
+    """ساخت snapshot اولیه و اتصال به changes (main.py)."""
+    global _engine
+    if _engine is None:
+        changes.subscribe(_on_change)
+    _engine = bind
+    return reload(bind)
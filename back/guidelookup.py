@@ -0,0 +1,267 @@
+# back/guidelookup.py
+# ---------------------------------------------------------------------------
+# جستجوی تقریبی «این را کجا بیندازم؟» روی آیتم‌های راهنما (GET /guide/lookup?q=)
+# - همهٔ متن‌ها (آیتم‌ها + نام و slug دسته‌ها) با textnorm.normalize یکسان و به واژه شکسته می‌شوند.
+# - نمایهٔ سه‌حرفی (trigram) روی «واژگان» ساخته می‌شود، نه روی تک‌تک آیتم‌ها: trigram → واژه‌ها
+#   و واژه → دسته → idآیتم‌ها. واژه‌های یکتا خیلی کمتر از آیتم‌ها هستند، پس هر جستجو فقط چند صد
+#   واژه را امتیاز می‌دهد (زیر یک میلی‌ثانیه حتی با ده‌ها هزار آیتم؛ scripts/bench_guide_lookup.py).
+# - واژهٔ جستجو فقط از ابتدا پد می‌شود ("  w")، پس پیشوند هم کامل می‌خورد («بطر» → «بطری»)
+#   و غلط تایپی کوچک در واژه‌های بلندتر هم با امتیاز کمتر پیدا می‌شود.
+# - به‌روزرسانی تدریجی: guidecache.reload (بعد از هر نوشتن راهنما و در حلقهٔ پس‌زمینهٔ workerهای
+#   دیگر) update را صدا می‌زند؛ فقط آیتم‌هایی که در sync_log بعد از آخرین seq دیده‌شده تغییر
+#   کرده‌اند دوباره نمایه می‌شوند. بدون sync_log (دیتابیس غیر SQLite) نمایه از نو ساخته می‌شود.
+# - متن آیتم‌ها فارسی است؛ عبارت انگلیسی فقط با slug دسته‌ها (plastic, paper, ...) و آیتم‌های
+#   انگلیسی (مثلاً «PET») جور می‌شود — ترجمه انجام نمی‌شود.
+# ---------------------------------------------------------------------------
+
+from collections import Counter
+from dataclasses import dataclass
+import os
+import re
+import threading
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import changes
+import model
+import sync
+from textnorm import normalize
+
+LOOKUP_MIN_SCORE = float(os.getenv("GUIDE_LOOKUP_MIN_SCORE", "0.5"))   # حداقل شباهت یک واژه
+LOOKUP_WORDS_PER_TOKEN = 20        # بهترین واژه‌های هر واژهٔ جستجو
+LOOKUP_MATCHES_PER_CATEGORY = 3    # آیتم‌های نمونه در هر دستهٔ نتیجه
+
+_WORD = re.compile(r"\w+")
+_NAME = 0                          # id شبه‌آیتم «نام/slug دسته» (idهای واقعی از 1 شروع می‌شوند)
+
+
+def words(text: str | None) -> list[str]:
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(word: str, prefix: bool = False) -> set[str]:
+    """سه‌حرفی‌های واژه با پد ابتدای واژه؛ prefix=True یعنی انتهای واژه باز است (واژهٔ جستجو)."""
+    s = f"  {word}" if prefix else f"  {word} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+@dataclass(frozen=True)
+class Item:
+    category_id: int
+    kind: str
+    text: str
+    words: frozenset[str]
+
+
+@dataclass
+class Hit:
+    slug: str
+    name: str
+    color: str
+    score: float
+    matches: list[tuple[str, str]]      # (متن، kind) بهترین آیتم‌ها
+
+
+class Index:
+    """نمایهٔ درون‌حافظه؛ همهٔ خواندن/نوشتن‌ها زیر یک قفل (نوشتن‌های تدریجی کوتاه‌اند)."""
+
+    def __init__(self):
+        self.items: dict[int, Item] = {}
+        self.categories: dict[int, tuple[str, str, str]] = {}          # id → (slug, name, color)
+        self.postings: dict[str, dict[int, set[int]]] = {}             # واژه → دسته → idآیتم‌ها
+        self.grams: dict[str, set[str]] = {}                           # trigram → واژه‌ها
+        self.word_grams: dict[str, int] = {}                           # واژه → تعداد trigram
+        self.version = 0
+        self.seq = 0
+        self.built = False
+        self.lock = threading.Lock()
+
+    # ---------------- نوشتن ----------------
+    def _link(self, word: str, category_id: int, item_id: int) -> None:
+        cats = self.postings.get(word)
+        if cats is None:
+            cats = self.postings[word] = {}
+            grams = trigrams(word)
+            self.word_grams[word] = len(grams)
+            for g in grams:
+                self.grams.setdefault(g, set()).add(word)
+        cats.setdefault(category_id, set()).add(item_id)
+
+    def _unlink(self, word: str, category_id: int, item_id: int) -> None:
+        cats = self.postings.get(word)
+        ids = cats.get(category_id) if cats else None
+        if ids is None:
+            return
+        ids.discard(item_id)
+        if not ids:
+            del cats[category_id]
+        if not cats:
+            del self.postings[word], self.word_grams[word]
+            for g in trigrams(word):
+                bucket = self.grams.get(g)
+                if bucket is not None:
+                    bucket.discard(word)
+                    if not bucket:
+                        del self.grams[g]
+
+    def put(self, item_id: int, category_id: int, kind: str, text: str) -> None:
+        self.remove(item_id)
+        item = Item(category_id, kind, text, frozenset(words(text)))
+        self.items[item_id] = item
+        for w in item.words:
+            self._link(w, category_id, item_id)
+
+    def remove(self, item_id: int) -> None:
+        item = self.items.pop(item_id, None)
+        if item is not None:
+            for w in item.words:
+                self._unlink(w, item.category_id, item_id)
+
+    def set_categories(self, rows) -> None:
+        """نام/slug دسته‌ها هم به‌صورت شبه‌آیتم _NAME نمایه می‌شوند (جستجوی «پلاستیک» یا «plastic»)."""
+        for cid, (slug, name, _) in self.categories.items():
+            for w in set(words(name)) | set(words(slug.replace("-", " "))):
+                self._unlink(w, cid, _NAME)
+        self.categories = {r.id: (r.slug, r.name, r.color) for r in rows}
+        for cid, (slug, name, _) in self.categories.items():
+            for w in set(words(name)) | set(words(slug.replace("-", " "))):
+                self._link(w, cid, _NAME)
+
+    # ---------------- خواندن ----------------
+    def _similar(self, token: str) -> list[tuple[str, float]]:
+        """واژه‌های نمایه شبیه token با امتیاز (پوشش trigramهای token، با جریمهٔ کم برای واژهٔ بلندتر)."""
+        q = trigrams(token, prefix=True)
+        shared = Counter()
+        for g in q:
+            bucket = self.grams.get(g)
+            if bucket:
+                shared.update(bucket)
+        n = len(q)
+        scored = []
+        for w, k in shared.items():
+            score = 1.0 if w == token else k / (n + 0.1 * (self.word_grams[w] - k))
+            if score >= LOOKUP_MIN_SCORE:
+                scored.append((w, score))
+        scored.sort(key=lambda r: -r[1])
+        return scored[:LOOKUP_WORDS_PER_TOKEN]
+
+    def lookup(self, query: str, limit: int) -> list[Hit]:
+        tokens = list(dict.fromkeys(words(query)))
+        if not tokens:
+            return []
+        similar = {t: self._similar(t) for t in tokens}
+
+        # امتیاز دسته = میانگین (روی واژه‌های جستجو) بهترین شباهت واژه‌ای که در آن دسته هست
+        cat_scores: dict[int, dict[str, float]] = {}
+        for t, found in similar.items():
+            for w, score in found:
+                for cid in self.postings[w]:
+                    best = cat_scores.setdefault(cid, {})
+                    if score > best.get(t, 0.0):
+                        best[t] = score
+        ranked = sorted(
+            ((sum(s.values()) / len(tokens), cid) for cid, s in cat_scores.items() if cid in self.categories),
+            key=lambda r: (-r[0], self.categories[r[1]][0]),
+        )[:limit]
+
+        # آیتم‌های نمونه فقط برای دسته‌های برگزیده
+        hits = []
+        for score, cid in ranked:
+            per_item: dict[int, dict[str, float]] = {}
+            for t, found in similar.items():
+                for w, s in found:
+                    for iid in self.postings[w].get(cid, ()):
+                        if iid != _NAME and s > per_item.setdefault(iid, {}).get(t, 0.0):
+                            per_item[iid][t] = s
+            best = sorted(per_item.items(), key=lambda r: (-sum(r[1].values()), r[0]))[:LOOKUP_MATCHES_PER_CATEGORY]
+            slug, name, color = self.categories[cid]
+            hits.append(Hit(
+                slug=slug, name=name, color=color, score=round(score, 3),
+                matches=[(self.items[iid].text, self.items[iid].kind) for iid, _ in best],
+            ))
+        return hits
+
+
+_index = Index()
+_write_lock = threading.Lock()   # update و rebuild پشت هم: دلتا هرگز روی نمایه‌ای که کنار گذاشته شده نمی‌نشیند
+
+
+def current() -> Index:
+    return _index
+
+
+def lookup(query: str, limit: int = 5) -> tuple[int, list[Hit]]:
+    """(نسخهٔ راهنمای نمایه‌شده، دسته‌های رتبه‌بندی‌شده)."""
+    idx = _index   # یک بار: rebuild هم‌زمان ممکن است شیء تازه‌ای جایگزین کند
+    with idx.lock:
+        return idx.version, idx.lookup(query, limit)
+
+
+def _guide_version(session: Session) -> int:
+    V = model.ContentVersion
+    return session.scalar(select(V.version).where(V.name == changes.GUIDE)) or 0
+
+
+def _categories(session: Session):
+    C = model.GuideCategoryTable
+    return session.execute(select(C.id, C.slug, C.name, C.color)).all()
+
+
+def rebuild(session: Session) -> Index:
+    """نمایهٔ کامل از DB (راه‌اندازی، یا وقتی sync_log نیست)؛ جایگزینی با یک انتساب."""
+    with _write_lock:
+        return _rebuild(session)
+
+
+def _rebuild(session: Session) -> Index:
+    global _index
+    I = model.GuideItemTable
+    fresh = Index()
+    # seq و نسخه قبل از خواندن آیتم‌ها: تغییری که در این فاصله commit شود دوباره اعمال می‌شود
+    fresh.seq = _max_seq(session)
+    fresh.version = _guide_version(session)
+    fresh.set_categories(_categories(session))
+    for r in session.execute(select(I.id, I.category_id, I.kind, I.text)):
+        fresh.put(r.id, r.category_id, r.kind.value, r.text)
+    fresh.built = True
+    _index = fresh
+    return fresh
+
+
+def _max_seq(session: Session) -> int:
+    if not sync.SYNC_ENABLED:
+        return 0
+    return session.scalar(select(func.max(model.SyncLog.seq))) or 0
+
+
+def update(session: Session) -> int:
+    """
+    اعمال تغییرات آیتم‌ها از آخرین seq (sync_log) روی نمایهٔ فعلی؛ خروجی: تعداد آیتم بازنمایه‌شده.
+    idempotent: آیتمی که دو بار دیده شود فقط دوباره با وضعیت فعلی‌اش نوشته می‌شود.
+    """
+    with _write_lock:
+        idx = _index
+        if not sync.SYNC_ENABLED or not idx.built:
+            return len(_rebuild(session).items)
+        L, I = model.SyncLog, model.GuideItemTable
+        top = _max_seq(session)
+        version = _guide_version(session)
+        changed = session.execute(
+            select(L.row_id).where(L.kind == "guide_items", L.seq > idx.seq, L.seq <= top)
+        ).scalars().all()
+        rows = (
+            {r.id: r for r in session.execute(select(I.id, I.category_id, I.kind, I.text).where(I.id.in_(changed)))}
+            if changed else {}
+        )
+        cats = _categories(session)
+        with idx.lock:
+            for iid in changed:
+                r = rows.get(iid)
+                if r is None:
+                    idx.remove(iid)
+                else:
+                    idx.put(iid, r.category_id, r.kind.value, r.text)
+            idx.set_categories(cats)
+            idx.seq, idx.version = top, max(version, idx.version)
+        return len(changed)
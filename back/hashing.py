@@ -0,0 +1,116 @@
+# back/hashing.py
+# ---------------------------------------------------------------------------
+# هش و بررسی رمز عبور (bcrypt) در یک process pool اختصاصی و محدود
+# - bcrypt عمداً کند است؛ اجرای آن داخل هندلرهای sync، threadpool مشترک Starlette را
+#   پر می‌کند و بقیهٔ اندپوینت‌ها را هم کند می‌کند. این‌جا کار هش در پروسه‌های جدا
+#   (HASH_WORKERS) انجام می‌شود.
+# - تعداد کارهای در جریان (در حال اجرا + در صف) حداکثر HASH_QUEUE_MAX است؛ بیش از آن
+#   فوراً HashPoolSaturated برمی‌گردد تا روتر 503 بدهد (به‌جای صف شدن بی‌انتها).
+# - BCRYPT_ROUNDS ضریب هزینه را تعیین می‌کند؛ هش‌هایی که با ضریب دیگری ساخته شده‌اند
+#   هنگام ورود موفق با verify_and_update دوباره هش می‌شوند.
+# - ورود گروهی کاربران (POST /users/bulk) استخر جدای bulk_pool را دارد تا هش هزاران رمز
+#   صف ورود/ثبت‌نام عادی را پر نکند؛ هر کار آن یک تکه از رمزها را یک‌جا هش می‌کند.
+# - این ماژول عمداً سبک است (فقط passlib)، چون در پروسه‌های کارگر هم import می‌شود.
+# ---------------------------------------------------------------------------
+
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import os
+import threading
+
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_MAX = int(os.getenv("HASH_QUEUE_MAX", str(HASH_WORKERS * 8)))
+BULK_HASH_WORKERS = int(os.getenv("BULK_HASH_WORKERS", str(HASH_WORKERS)))
+
+# min/max برابر default: هر هشی با ضریب متفاوت (بالاتر یا پایین‌تر) needs_update می‌شود
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+# ---------- توابع هش (داخل پروسهٔ کارگر هم اجرا می‌شوند) ----------
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """(درست بودن رمز، هش جدید اگر ضریب/الگوریتم عوض شده باشد وگرنه None)"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """هش یک تکه از رمزها در یک رفت‌وبرگشت به پروسهٔ کارگر (برای ورود گروهی)."""
+    return [pwd_context.hash(p) for p in passwords]
+
+
+# ---------- استخر پروسه ----------
+class HashPoolSaturated(Exception):
+    """صف هش پر است؛ درخواست باید با 503 رد شود."""
+
+
+class HashPool:
+    """
+    ProcessPoolExecutor با سقف کارهای در جریان.
+    executor به‌صورت تنبل ساخته می‌شود تا import این ماژول (مثلاً در اسکریپت‌ها) پروسه نسازد.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_QUEUE_MAX):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.pending = 0
+        self.rejected = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, fn, *args):
+        """اجرای fn(*args) در پروسهٔ کارگر؛ اگر صف پر باشد HashPoolSaturated."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashPoolSaturated()
+            self.pending += 1
+            executor = self._get_executor()
+        try:
+            return await asyncio.wrap_future(executor.submit(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def map_chunks(self, fn, items: list) -> list:
+        """
+        تقسیم items به یک تکه برای هر کارگر، اجرای موازی fn(تکه) و الحاق نتایج به همان ترتیب.
+        fn باید یک list بگیرد و list هم‌اندازه برگرداند (مثل hash_passwords).
+        """
+        if not items:
+            return []
+        size = -(-len(items) // self.workers)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        results = await asyncio.gather(*(self.run(fn, chunk) for chunk in chunks))
+        return [x for part in results for x in part]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pool = HashPool()
+# استخر جدا برای ورود گروهی؛ هر درخواست bulk حداکثر BULK_HASH_WORKERS کار هم‌زمان دارد
+bulk_pool = HashPool(workers=BULK_HASH_WORKERS, max_pending=BULK_HASH_WORKERS * 2)
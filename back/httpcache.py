@@ -0,0 +1,70 @@
+# back/httpcache.py
+# ---------------------------------------------------------------------------
+# درخواست‌های شرطی HTTP برای محتوای عمومی (ETag / Last-Modified / 304)
+# - ETag قوی از «نسخهٔ تغییر» (changes.version) یا updated_at ردیف + پارامترهای درخواست ساخته
+#   می‌شود؛ پس بدون خواندن/سریال‌سازی داده‌ها قابل محاسبه است.
+# - not_modified(...) اگر If-None-Match (یا در نبودش If-Modified-Since) با نسخهٔ فعلی بخواند،
+#   پاسخ 304 آماده برمی‌گرداند؛ هندلر همان را برمی‌گرداند و کوئری اصلی اجرا نمی‌شود.
+# - Cache-Control: public, max-age=HTTP_CACHE_MAX_AGE (پیش‌فرض 0), must-revalidate
+#   → مرورگر هر بار اعتبارسنجی می‌کند ولی در صورت عدم تغییر فقط 304 بدون بدنه می‌گیرد.
+# ---------------------------------------------------------------------------
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+import os
+
+from fastapi import Request, Response
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))  # ثانیه
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def validators(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified), usegmt=True)
+    return headers
+
+
+def _utc(dt: datetime) -> datetime:
+    # زمان‌های DB بدون tz و UTC هستند؛ دقت Last-Modified یک ثانیه است
+    return dt.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # مقایسهٔ ضعیف طبق RFC 9110 برای If-None-Match (پیشوند W/ نادیده گرفته می‌شود)
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag in tags
+
+
+def not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> Response | None:
+    """پاسخ 304 اگر نسخهٔ کلاینت به‌روز است؛ وگرنه None."""
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        fresh = _etag_matches(inm, etag)
+    else:
+        ims = request.headers.get("if-modified-since")
+        fresh = False
+        if ims and last_modified is not None:
+            try:
+                fresh = _utc(last_modified) <= parsedate_to_datetime(ims)
+            except (TypeError, ValueError):
+                fresh = False
+    if not fresh:
+        return None
+    return Response(status_code=304, headers=validators(etag, last_modified))
+
+
+def apply(response: Response, etag: str, last_modified: datetime | None = None) -> None:
+    """هدرهای اعتبارسنجی روی پاسخ 200."""
+    response.headers.update(validators(etag, last_modified))
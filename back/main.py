@@ -15,17 +15,31 @@
   برای migration استفاده کنید تا تغییرات اسکیمای دیتابیس نسخه‌بندی شود.
 """
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
+import auth
+import changes
+import facets
+import guidecache
+import hashing
 import model
-from database import engine
+import respcache
+import search
+import snapshots
+import sqlstats
+import sync
+from database import async_engine, engine
 # هر روتر مسئول یک «دامنه» از API است. مسیرهای آن‌ها داخل ماژول‌های routers تعریف شده.
 from routers import (
     articles,        # /articles, /articles/{id}  — CRUD مقالات علمی
     users,           # /users/*                   — ثبت‌نام/ورود/اطلاعات کاربر
+    users_bulk,      # /users/bulk/*              — ورود گروهی کاربران و تغییر نقش گروهی (ادمین)
+    content_bulk,    # /content/bulk/{kind}       — ورود/خروج گروهی خبرها و مقالات (ادمین)
     dashboard,       # /dashboard                 — شمارنده‌ها، خلاصه وضعیت کاربر
     predict,         # /predict/                  — آپلود تصویر و پیش‌بینی کلاس زباله
     news,            # /news, /news/{id}         — CRUD خبرها
@@ -33,18 +47,82 @@ from routers import (
     notification,    # /notifs/*                  — اعلان‌ها (list/create/read-all/...)
     bookmarks,       # /bookmarks/*               — نشانک‌ها (add/remove/check/list)
     me_router,       # /me/*                      — منابع «مختص کاربر جاری» (مثل photos)
+    search as search_router,  # /search                — جستجوی متن کامل (خبر/مقاله/راهنما)
+    sync as sync_router,      # /sync                  — فید تغییرات برای اپ آفلاین
 )
 
 # ---------------------------------------------------------------------
 # ساخت جداول (فقط برای توسعه). در تولید، Alembic توصیه می‌شود.
+# ensure_columns / ensure_indexes ستون‌ها و ایندکس‌های تازه‌تعریف‌شده را روی
+# دیتابیس‌های موجود هم می‌سازند.
 # ---------------------------------------------------------------------
 model.Base.metadata.create_all(bind=engine)
+model.ensure_columns(engine)
+model.ensure_indexes(engine)
+changes.ensure_versions(engine)  # ردیف نسخهٔ تغییر news/articles/guide (ETag)
+facets.ensure_facets(engine)     # شمارندهٔ دسته‌ها + تریگرها برای /news/facets و /articles/facets
+sync.ensure_sync(engine)         # sync_log + تریگرهای change_seq/tombstone برای GET /sync (sync.py)
+search.ensure_search(engine)     # نمایهٔ FTS5؛ تغییرات را از sync_log می‌گیرد، پس بعد از ensure_sync (search.py)
+guidecache.load(engine)          # snapshot حافظهٔ راهنما برای GET /guide/ و /guide/{slug} (guidecache.py)
+snapshot_publisher = snapshots.setup(engine)  # فایل‌های JSON ایستای /snapshots بعد از هر نوشتن ادمین
+
+# شمارش کوئری/زمان DB هر درخواست + هشدار N+1 و لاگ کوئری کند (sqlstats.py)
+sqlstats.instrument(engine, async_engine.sync_engine)
+
+# ---------------------------------------------------------------------
+# چرخهٔ عمر برنامه (startup/shutdown)
+# - در شروع: بارگذاری جدول ابطال توکن‌ها در حافظه (و حذف ردیف‌های منقضی) + خواندن دوره‌ای و
+#   فقط‌خواندنی ردیف‌های تازه (تا تنزل نقشی که در worker دیگری ثبت شده این‌جا هم اعمال شود)
+#   و بررسی دوره‌ای نسخهٔ راهنما (ویرایش در worker دیگر → snapshot تازه)
+#   و شروع thread انتشار snapshotها (بار اول همهٔ دسته‌ها؛ snapshots.py)
+# - در خاموشی: بستن process poolهای هش bcrypt (hashing.py) و thread انتشار
+# ---------------------------------------------------------------------
+async def _revocation_sync_loop():
+    while True:
+        await asyncio.sleep(auth.REVOCATION_SYNC_SECONDS)
+        with suppress(Exception):
+            await auth.sync_revocations()
+
+async def _guide_snapshot_loop():
+    # بعد از هر نوشتن راهنما در همین worker بیدار می‌شود (guidecache._on_change)، وگرنه هر
+    # GUIDE_SNAPSHOT_CHECK_SECONDS؛ بازسازی در thread تا event loop بلاک نشود
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    guidecache.set_wakeup(lambda: loop.call_soon_threadsafe(wake.set))
+    try:
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(wake.wait(), guidecache.GUIDE_SNAPSHOT_CHECK_SECONDS)
+            wake.clear()
+            with suppress(Exception):
+                await asyncio.to_thread(guidecache.refresh_if_stale)
+    finally:
+        guidecache.set_wakeup(None)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await auth.sync_revocations(full=True)   # تنها جایی که ردیف‌های منقضی ابطال حذف می‌شوند
+    sync_task = asyncio.create_task(_revocation_sync_loop())
+    guide_task = asyncio.create_task(_guide_snapshot_loop())
+    if snapshot_publisher is not None:
+        snapshot_publisher.start()
+        snapshot_publisher.notify(snapshots.NAMES)
+    yield
+    sync_task.cancel()
+    guide_task.cancel()
+    if snapshot_publisher is not None:
+        snapshot_publisher.stop()
+    hashing.pool.shutdown()
+    hashing.bulk_pool.shutdown()
 
 # ---------------------------------------------------------------------
 # ایجاد نمونه برنامه FastAPI
 # می‌توانید title/version/docs_url را در صورت نیاز تنظیم کنید.
 # ---------------------------------------------------------------------
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# آمار SQL هر درخواست؛ با SQL_DEBUG=1 هدرهای X-DB-Queries و X-DB-Time-ms برمی‌گردند
+app.add_middleware(sqlstats.SQLStatsMiddleware)
 
 # ---------------------------------------------------------------------
 # CORS: اجازه‌ی دسترسی فرانت (Vite dev server) به API
@@ -58,6 +136,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],         # اجازه همه‌ی متدها (GET/POST/PUT/DELETE/...)
     allow_headers=["*"],         # اجازه همه‌ی هدرها (مثلاً Authorization)
+    expose_headers=["X-Next-Cursor", "X-Guide-Version"],  # cursor صفحهٔ بعد در فهرست‌ها + نسخهٔ راهنما
 )
 
 # ---------------------------------------------------------------------
@@ -73,12 +152,19 @@ UPLOADS_DIR.mkdir(parents=True, exist_ok=True)  # ایجاد امن پوشه (id
 # سرو کردن پوشه uploads در آدرس /uploads
 app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
 
+# snapshotهای ایستای /guide/، /news/ و /articles/ (نسخهٔ .br/.gz طبق Accept-Encoding)
+# مثلاً /snapshots/news.json ، /snapshots/guide/plastic.json ، /snapshots/manifest.json
+if snapshot_publisher is not None:
+    app.mount("/snapshots", snapshots.PrecompressedStaticFiles(directory=snapshots.SNAPSHOT_DIR), name="snapshots")
+
 # ---------------------------------------------------------------------
 # ثبت روترها (namespace های API)
 # هر روتر مسیرهای مربوط به دامنهٔ خودش را include می‌کند.
 # اگر prefix یا tags نیاز دارید، داخل خود روتر تنظیم شده باشد.
 # ---------------------------------------------------------------------
 app.include_router(users.router)
+app.include_router(users_bulk.router)
+app.include_router(content_bulk.router)
 app.include_router(dashboard.router)
 app.include_router(articles.router)
 app.include_router(predict.router)
@@ -87,6 +173,8 @@ app.include_router(guide.router)
 app.include_router(notification.router)
 app.include_router(bookmarks.router)
 app.include_router(me_router.router)
+app.include_router(search_router.router)
+app.include_router(sync_router.router)
 
 # ---------------------------------------------------------------------
 # اندپوینت ریشه — برای Health Check ساده یا معرفی سرویس
@@ -95,6 +183,16 @@ app.include_router(me_router.router)
 def root():
     return {"message": "API is running"}
 
+# ---------------------------------------------------------------------
+# آمار کش پاسخ‌های عمومی (respcache.py) — فقط ادمین
+# hit_ratio، حجم مصرفی (bytes) و شمار evict/invalidate همین worker
+# ---------------------------------------------------------------------
+@app.get("/cache/stats")
+def cache_stats(current_user: auth.Principal = Depends(auth.get_current_claims)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="فقط ادمین به آمار کش دسترسی دارد")
+    return respcache.stats()
+
 # ---------------------------------------------------------------------
 # نکات اجرایی:
 # - اجرا در توسعه:
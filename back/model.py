@@ -9,16 +9,23 @@
 #   - Notifications: اعلان‌ها (عمومی یا مخصوص کاربر)
 #   - Bookmarks: نشانک‌های کاربر برای محتواهای مختلف
 #   - UserPhoto: کتابخانه‌ی تصاویر پیش‌بینی‌شده‌ی کاربر
+#   - TokenRevocation: ابطال توکن‌های دسترسی قدیمی یک کاربر (مثلاً پس از تغییر نقش)
+#   - ContentVersion: نسخهٔ تغییر هر دستهٔ محتوا (news/articles/guide) برای ETag (changes.py)
+#   - CategoryCount: شمار خبرها/مقالات هر دسته برای چیپ‌های فیلتر (facets.py)
+#   - SyncLog: شمارهٔ تغییر (change_seq) هر ردیف محتوا + tombstone حذف‌ها برای GET /sync (sync.py)
 #
 # نکات:
 # - در محیط توسعه می‌توانید با Base.metadata.create_all جداول را بسازید؛
 #   در محیط واقعی از Alembic برای مهاجرت استفاده کنید.
 # - زمان‌ها به‌صورت UTC ذخیره می‌شوند (datetime.utcnow).
+# - روترها با AsyncSession کار می‌کنند؛ همهٔ رابطه‌ها lazy="raise" هستند تا بارگذاری ضمنی
+#   (که در async خطای MissingGreenlet می‌دهد) فوراً و صریح خطا بدهد. از selectinload استفاده کنید.
 # - در صورت نیاز طول فیلدها/ایندکس‌ها را با توجه به پایگاه‌داده‌ی هدف تنظیم کنید.
 # =============================================================================
 
-from sqlalchemy import Column, Integer, Float, String, DateTime, Text, Boolean, ForeignKey, Enum, Index, JSON
+from sqlalchemy import Column, Integer, Float, String, DateTime, Text, Boolean, ForeignKey, Enum, Index, JSON, bindparam, func, inspect, text
 from sqlalchemy.orm import relationship
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.sql import expression  # برای server_default و مقادیر بولی/زمانی
 import enum
 from database import Base                # Declarative Base پروژه
@@ -52,9 +59,16 @@ class UserTable(Base):
         "UserPhotoTable",
         back_populates="user",
         cascade="all, delete-orphan",  # حذف کاربر -> حذف همه‌ی عکس‌ها
-        lazy="selectin",               # بارگذاری کارآمد مجموعه‌ها
+        lazy="raise",                  # هرگز ضمنی بارگذاری نشود؛ در صورت نیاز selectinload صریح
     )
 
+# ایندکس‌های عبارتی روی مقدار نرمال‌شده (lower) برای جستجوی ایمیل در ورود/بررسی و
+# جستجوی پیشوندی فهرست کاربران ادمین؛ کوئری‌ها باید دقیقاً func.lower(ستون) را مقایسه کنند.
+Index("ix_user_email_lower", func.lower(UserTable.email))
+Index("ix_user_display_name_lower", func.lower(UserTable.display_name))
+# فیلتر نقش + صفحه‌بندی keyset روی id
+Index("ix_user_role_id", UserTable.role, UserTable.id)
+
 # ============================== Articles =====================================
 class ArticleTable(Base):
     """
@@ -64,6 +78,7 @@ class ArticleTable(Base):
     - summary (اختیاری)
     - content (متن کامل، ضروری)
     - category / source / image (اختیاری)
+    - created_at / updated_at: زمان ایجاد/آخرین ویرایش (UTC)؛ ترتیب فهرست و cursor صفحه‌بندی
     """
     __tablename__ = "articles"
 
@@ -74,6 +89,12 @@ class ArticleTable(Base):
     category = Column(String(100))
     source = Column(String(300))
     image = Column(String(500))
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# فهرست «جدیدترین اول» با صفحه‌بندی keyset روی (created_at, id)، با/بدون فیلتر دسته
+Index("ix_articles_created_id", ArticleTable.created_at, ArticleTable.id)
+Index("ix_articles_category_created_id", ArticleTable.category, ArticleTable.created_at, ArticleTable.id)
 
 # ================================ News =======================================
 class NewsTable(Base):
@@ -82,6 +103,7 @@ class NewsTable(Base):
     ----------
     - title, summary, content: فیلدهای اصلی خبر
     - category / image / source: فیلدهای اختیاری
+    - created_at / updated_at: زمان ایجاد/آخرین ویرایش (UTC)؛ ترتیب فهرست و cursor صفحه‌بندی
     """
     __tablename__ = "news"
 
@@ -92,6 +114,12 @@ class NewsTable(Base):
     category = Column(String(50), nullable=True)
     image = Column(String(255), nullable=True)
     source = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# فهرست «جدیدترین اول» با صفحه‌بندی keyset روی (created_at, id)، با/بدون فیلتر دسته
+Index("ix_news_created_id", NewsTable.created_at, NewsTable.id)
+Index("ix_news_category_created_id", NewsTable.category, NewsTable.created_at, NewsTable.id)
 
 # ================================= Guide =====================================
 class GuideItemKind(str, enum.Enum):
@@ -109,6 +137,7 @@ class GuideCategoryTable(Base):
     - name: نام دسته
     - description: توضیح کوتاه
     - color: کلاس ظاهر (Tailwind) برای کارت‌ها در فرانت (اختیاری)
+    - updated_at: زمان آخرین ویرایش (UTC)
 
     روابط:
     - items: آیتم‌های زیرمجموعه‌ی این دسته
@@ -120,12 +149,13 @@ class GuideCategoryTable(Base):
     name = Column(String(120), nullable=False)
     description = Column(String(500), nullable=False)
     color = Column(String(64), nullable=False, default="border-blue-300 bg-blue-50")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     items = relationship(
         "GuideItemTable",
         back_populates="category",
         cascade="all, delete-orphan",  # حذف دسته -> حذف آیتم‌ها
-        lazy="selectin",
+        lazy="raise",                  # روترها آیتم‌ها را با selectinload صریح می‌خوانند
     )
 
 class GuideItemTable(Base):
@@ -135,6 +165,7 @@ class GuideItemTable(Base):
     - category_id: ارجاع به دسته (Cascade on delete)
     - kind: نوع آیتم (Enum)
     - text: متن آیتم
+    - updated_at: زمان ایجاد/آخرین ویرایش (UTC)
     """
     __tablename__ = "guide_item"
 
@@ -146,8 +177,9 @@ class GuideItemTable(Base):
     )
     kind = Column(Enum(GuideItemKind), nullable=False)
     text = Column(Text, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    category = relationship("GuideCategoryTable", back_populates="items")
+    category = relationship("GuideCategoryTable", back_populates="items", lazy="raise")
 
 # ایندکس مرکب برای کوئری‌های پرتکرار: «آیتم‌های دسته X با نوع Y»
 Index("ix_guide_items_cat_kind", GuideItemTable.category_id, GuideItemTable.kind)
@@ -242,7 +274,136 @@ class UserPhotoTable(Base):
     )
 
     # رابطه معکوس با کاربر
-    user = relationship("UserTable", back_populates="photos")
+    user = relationship("UserTable", back_populates="photos", lazy="raise")
 
 # ایندکس برای کوئری «عکس‌های کاربر، مرتب‌سازی بر اساس جدیدترین آپلود»
 Index("ix_user_photo_user_uploaded", UserPhotoTable.user_id, UserPhotoTable.uploaded_at.desc())
+
+# ========================== Token Revocation =================================
+class TokenRevocation(Base):
+    """
+    ابطال توکن‌های دسترسی یک کاربر
+    -------------------------------
+    - user_id: کاربری که نقشش تغییر کرده (یک ردیف برای هر کاربر)
+    - revoked_at: هر access token این کاربر که iat آن تا این لحظه باشد رد می‌شود (دقت زیرثانیه).
+
+    نکته: این جدول هنگام راه‌اندازی در حافظه بارگذاری می‌شود (auth.load_revocations) و ردیف‌های
+    قدیمی‌تر از عمر access token (بی‌اثر) همان‌جا حذف می‌شوند؛ بعد از آن هر worker فقط ردیف‌های
+    تازه را دوره‌ای می‌خواند (auth.refresh_revocations) و توکن ادمین را مستقیم با DB چک می‌کند.
+    """
+    __tablename__ = "token_revocation"
+
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+# =========================== Content Version =================================
+class ContentVersion(Base):
+    """
+    نسخهٔ تغییر هر دستهٔ محتوای عمومی
+    --------------------------------
+    - name: نام دسته ('news' | 'articles' | 'guide')
+    - version: با هر نوشتن ادمین در همان تراکنش یکی زیاد می‌شود (changes.mark_changed)
+    - changed_at: زمان آخرین تغییر (UTC) — برای Last-Modified
+
+    ETagهای فهرست‌ها از این نسخه ساخته می‌شوند؛ چون در DB است بین workerها مشترک است.
+    """
+    __tablename__ = "content_version"
+
+    name = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+# ============================ Category Count =================================
+class CategoryCount(Base):
+    """
+    شمار ردیف‌های هر دسته (facetهای فهرست خبرها/مقالات؛ facets.py)
+    ---------------------------------------------------------------
+    - kind: 'news' | 'articles'
+    - category: مقدار ستون category ('' = بدون دسته)
+    - count: تعداد ردیف‌ها؛ با تریگرهای درج/حذف/تغییر دسته (SQLite) یا مسیر نوشتن برنامه
+      (writes/contentio روی دیتابیس‌های دیگر) در همان تراکنش به‌روز می‌شود و سطرهای صفر حذف می‌شوند. از نو ساختن: scripts/rebuild_facets.py
+    """
+    __tablename__ = "category_count"
+
+    kind = Column(String(32), primary_key=True)
+    category = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# ============================== Sync Log =====================================
+class SyncLog(Base):
+    """
+    شمارهٔ تغییر ردیف‌های محتوای عمومی (فید همگام‌سازی آفلاین؛ sync.py)
+    -------------------------------------------------------------------
+    - seq: شمارهٔ یکنواخت (AUTOINCREMENT؛ هرگز تکرار نمی‌شود) — توکن کلاینت «تا این seq را دارم»
+    - kind / row_id: منبع ('news' | 'articles' | 'guide_categories' | 'guide_items') و id ردیف
+    - deleted: True = ردیف حذف شده (tombstone)
+    - changed_at: زمان تغییر (UTC) — برای پاک‌کردن tombstoneهای قدیمی
+
+    برای هر ردیف فقط یک سطر نگه داشته می‌شود: هر درج/ویرایش/حذف سطر قبلی را با seq تازه
+    جایگزین می‌کند (تریگرهای sync.ensure_sync)؛ پس اندازهٔ جدول ≈ تعداد ردیف‌ها + tombstoneها.
+    """
+    __tablename__ = "sync_log"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False, server_default=expression.false())
+    changed_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=expression.text("CURRENT_TIMESTAMP")
+    )
+
+# یکتا: INSERT OR REPLACE در تریگرها سطر قبلی همان ردیف را جایگزین می‌کند
+Index("ux_sync_log_kind_row", SyncLog.kind, SyncLog.row_id, unique=True)
+
+
+# ============================ Schema helpers =================================
+def ensure_columns(bind) -> None:
+    """
+    افزودن ستون‌هایی که در مدل هستند ولی در جدول‌های قدیمی نیستند (ALTER TABLE ... ADD COLUMN).
+    ستون بدون NOT NULL اضافه می‌شود (SQLite ستون NOT NULL بدون پیش‌فرض ثابت را نمی‌پذیرد) و
+    ردیف‌های موجود با پیش‌فرض مدل پر می‌شوند (زمان‌ها: اکنون). idempotent است؛ قبل از ensure_indexes.
+    """
+    insp = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                ddl = col.type.compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {ddl}')
+                if col.default is None:
+                    continue
+                if isinstance(col.type, DateTime):
+                    value = datetime.utcnow()
+                elif col.default.is_scalar:
+                    value = col.default.arg
+                else:
+                    continue
+                # متن خام تا onupdate ستون‌های دیگر (که شاید هنوز اضافه نشده‌اند) وارد نشود
+                conn.execute(
+                    text(f'UPDATE "{table.name}" SET "{col.name}" = :v WHERE "{col.name}" IS NULL')
+                    .bindparams(bindparam("v", value, type_=col.type))
+                )
+
+
+def ensure_indexes(bind) -> None:
+    """
+    ساخت ایندکس‌هایی که در مدل تعریف شده‌اند ولی در دیتابیس موجود نیستند.
+    create_all فقط جدول‌های جدید را می‌سازد و به ایندکس‌های جدیدِ جدول‌های قدیمی دست نمی‌زند؛
+    این تابع (idempotent) بعد از create_all صدا زده می‌شود تا دیتابیس‌های قبلی هم ایندکس بگیرند
+    (از CREATE INDEX IF NOT EXISTS استفاده می‌شود، چون بازرسی SQLite ایندکس‌های عبارتی را نمی‌بیند.)
+    """
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
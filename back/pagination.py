@@ -0,0 +1,90 @@
+# back/pagination.py
+# ---------------------------------------------------------------------------
+# صفحه‌بندی keyset (cursor-based)
+# - به‌جای OFFSET (که با بزرگ شدن جدول کندتر می‌شود) مقدار کلید مرتب‌سازی آخرین
+#   ردیف صفحه در یک cursor مات (base64 از JSON) به کلاینت داده می‌شود و صفحهٔ بعد
+#   با شرط «بعد از این کلید» خوانده می‌شود؛ همیشه از ایندکس استفاده می‌کند.
+# - کلاینت نباید محتوای cursor را تفسیر کند؛ فقط همان را در درخواست بعدی بفرستد.
+# ---------------------------------------------------------------------------
+
+import base64
+import binascii
+from datetime import datetime
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# فیلدهای پیش‌فرض فهرست‌ها (خبر/مقاله): بدون content
+LIST_FIELDS = ("id", "title", "summary", "category", "image", "created_at")
+
+
+def encode_cursor(key: dict) -> str:
+    """کلید آخرین ردیف → رشتهٔ مات و URL-safe"""
+    raw = json.dumps(key, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str | None, *fields: str) -> dict | None:
+    """
+    رشتهٔ cursor → dict کلید؛ None اگر cursor داده نشده باشد.
+    اگر خراب باشد یا فیلدهای لازم (fields) را نداشته باشد → 400.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        key = None
+    if not isinstance(key, dict) or any(f not in key for f in fields):
+        raise HTTPException(status_code=400, detail="cursor نامعتبر است")
+    return key
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """
+    کوچک‌ترین رشته‌ای که از همهٔ رشته‌های با این پیشوند بزرگ‌تر است:
+    col >= prefix AND col < prefix_upper_bound(prefix)  ←  «col با prefix شروع می‌شود»
+    (بر خلاف LIKE 'x%' همیشه روی ایندکس B-tree به بازه تبدیل می‌شود).
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# ---------- «جدیدترین اول» روی (created_at, id) ----------
+def newest_first(query, created_col, id_col, cursor: str | None):
+    """
+    ترتیب created_at DESC, id DESC (id ترتیب ردیف‌های هم‌زمان را پایدار می‌کند) و در صورت
+    وجود cursor فقط ردیف‌های بعد از آن: (created_at, id) < (t, id) — روی ایندکس (created_at, id).
+    """
+    after = decode_cursor(cursor, "t", "id")
+    if after is not None:
+        try:
+            t = datetime.fromisoformat(after["t"])
+            key_id = int(after["id"])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="cursor نامعتبر است")
+        query = query.where(tuple_(created_col, id_col) < tuple_(t, key_id))
+    return query.order_by(created_col.desc(), id_col.desc())
+
+
+def newest_first_cursor(created_at: datetime, id_: int) -> str:
+    return encode_cursor({"t": created_at.isoformat(), "id": id_})
+
+
+# ---------- انتخاب ستون‌ها (?fields=) ----------
+def parse_fields(fields: str | None, cls, default=LIST_FIELDS) -> list[str]:
+    """
+    '?fields=title,content' → ['id', 'title', 'content'] (id همیشه هست)؛ بدون fields → default.
+    فقط ستون‌های جدول مجازند؛ نام ناشناخته → 400.
+    """
+    if not fields:
+        return list(default)
+    names = ["id"] + [f.strip() for f in fields.split(",") if f.strip()]
+    bad = [n for n in names if n not in cls.__table__.columns]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"فیلد نامعتبر: {', '.join(bad)}")
+    return list(dict.fromkeys(names))
@@ -0,0 +1,136 @@
+# back/preprocess.py
+# ---------------------------------------------------------------------------
+# موتور پیش‌پردازش تصویر برای Predict با بافرهای از پیش ساخته‌شده
+# - برای هر درخواست آرایهٔ float32 تازه ساخته نمی‌شود؛ بافرها از یک استخر
+#   thread-safe با اندازهٔ ثابت (برابر همزمانی مجاز PREDICT_CONCURRENCY) برداشته
+#   و به‌محض ساخته شدن بدنهٔ درخواست مدل (پیش از فراخوانی مدل) برگردانده می‌شوند.
+# - اگر بافری آزاد نباشد درخواست در صف می‌ماند (تا BUFFER_ACQUIRE_TIMEOUT ثانیه)؛ چون فقط
+#   decode پشت استخر است، همزمانی عادی فقط کمی صبر می‌کند و PoolExhausted (در روتر 503)
+#   فقط وقتی است که صف واقعاً گیر کرده باشد.
+# - تصویر مثل قبل کامل decode و بعد resize می‌شود؛ draft (کوچک‌سازی DCT در دیکودر JPEG)
+#   پیکسل‌های ورودی مدل را عوض می‌کند، پس فقط با PREDICT_JPEG_DRAFT=1 و فقط برای فریم‌های
+#   خیلی بزرگ‌تر از اندازهٔ مدل فعال است.
+# - preprocess_input مدل VGG16 (حالت caffe: RGB→BGR و کم کردن میانگین ImageNet)
+#   درجا روی همان بافر انجام می‌شود؛ دیگر نیازی به import کردن TensorFlow در
+#   پروسهٔ وب نیست.
+# - اگر orjson نصب باشد، بدنهٔ JSON درخواست مدل مستقیم از روی بافر ساخته می‌شود
+#   (بدون tolist و ساختن صدها هزار شیء float پایتونی).
+# ---------------------------------------------------------------------------
+
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Iterator, Tuple
+import json
+import os
+import queue
+
+import numpy as np
+from PIL import Image
+
+try:  # وابستگی اختیاری
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# میانگین کانال‌های ImageNet به ترتیب BGR (همان مقادیر keras.applications.vgg16)
+VGG16_MEAN_BGR = np.array([103.939, 116.779, 123.68], dtype=np.float32)
+
+# تعداد پیش‌پردازش همزمان (decode + ساخت بدنهٔ مدل)؛ اندازهٔ استخر بافر هم همین است
+PREDICT_CONCURRENCY = int(os.getenv("PREDICT_CONCURRENCY", "4"))
+# حداکثر انتظار در صف برای آزاد شدن یک بافر (ثانیه)؛ ده‌ها برابر زمان decode یک عکس بزرگ موبایل
+BUFFER_ACQUIRE_TIMEOUT = float(os.getenv("BUFFER_ACQUIRE_TIMEOUT", "30"))
+# draft برای JPEG (پیش‌فرض خاموش: خروجی با decode کامل + resize که مدل با آن آموزش دیده یکی نیست)
+PREDICT_JPEG_DRAFT = os.getenv("PREDICT_JPEG_DRAFT", "0") == "1"
+# draft فقط وقتی فریم دست‌کم این چند برابر اندازهٔ مدل است؛ خروجی draft هم دست‌کم همین‌قدر بزرگ می‌ماند
+JPEG_DRAFT_MIN_FACTOR = 4
+
+
+class PoolExhausted(Exception):
+    """همهٔ بافرها در حال استفاده‌اند و در زمان مقرر آزاد نشدند."""
+
+
+class BufferPool:
+    """
+    استخر ثابت از آرایه‌های NumPy هم‌شکل.
+    - همهٔ بافرها یک‌بار در ابتدا ساخته می‌شوند؛ acquire/release فقط جابه‌جایی در صف است.
+    - queue.LifoQueue هم thread-safe است و هم بافری را که تازه آزاد شده (و احتمالاً
+      هنوز در cache پردازنده است) زودتر برمی‌گرداند.
+    """
+
+    def __init__(self, size: int, shape: Tuple[int, ...], dtype=np.float32):
+        self.size = max(1, int(size))
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._free: "queue.LifoQueue[np.ndarray]" = queue.LifoQueue(maxsize=self.size)
+        for _ in range(self.size):
+            self._free.put_nowait(np.empty(self.shape, dtype=self.dtype))
+
+    @property
+    def available(self) -> int:
+        return self._free.qsize()
+
+    def acquire(self, timeout: float | None = None) -> np.ndarray:
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolExhausted(f"no free buffer after {timeout}s") from None
+
+    def release(self, buf: np.ndarray) -> None:
+        self._free.put_nowait(buf)
+
+    @contextmanager
+    def buffer(self, timeout: float | None = None) -> Iterator[np.ndarray]:
+        buf = self.acquire(timeout)
+        try:
+            yield buf
+        finally:
+            self.release(buf)
+
+
+class PreprocessEngine:
+    """
+    decode → resize → BGR/mean-subtract درجا داخل یک بافر float32 از استخر.
+
+    استفاده:
+        with engine.preprocess(raw_bytes) as tensor:   # (H, W, 3) float32
+            body = engine.encode_instances(tensor)
+            ...                                        # بعد از این بلوک بافر به استخر برمی‌گردد
+    """
+
+    def __init__(self, size: Tuple[int, int], pool_size: int = PREDICT_CONCURRENCY):
+        self.size = size  # (W, H) مثل PIL
+        self.pool = BufferPool(pool_size, (size[1], size[0], 3), np.float32)
+
+    def decode_into(self, data: bytes, out: np.ndarray) -> np.ndarray:
+        """
+        تصویر را باز و به اندازهٔ مدل تبدیل می‌کند و نتیجهٔ پیش‌پردازش‌شده را در out می‌نویسد.
+        با PREDICT_JPEG_DRAFT، فریم JPEG خیلی بزرگ (≥ JPEG_DRAFT_MIN_FACTOR برابر اندازهٔ مدل)
+        با مقیاس کوچک‌تر دیکود می‌شود، ولی خروجی draft هنوز همان‌قدر بزرگ‌تر از هدف است و
+        کوچک‌سازی نهایی با همان resize همیشگی انجام می‌شود.
+        خطای تصویر نامعتبر به همان شکل (ValueError/OSError از PIL) بالا می‌رود.
+        """
+        image = Image.open(BytesIO(data))
+        if PREDICT_JPEG_DRAFT and image.format == "JPEG":
+            w, h = self.size
+            f = JPEG_DRAFT_MIN_FACTOR
+            if image.width >= f * w and image.height >= f * h:
+                image.draft("RGB", (f * w, f * h))
+        image = image.convert("RGB")
+        if image.size != self.size:
+            image = image.resize(self.size)
+        # RGB → BGR با view معکوس (بدون کپی) و تبدیل مستقیم به float32 داخل out
+        np.copyto(out, np.asarray(image)[..., ::-1], casting="unsafe")
+        out -= VGG16_MEAN_BGR
+        return out
+
+    @contextmanager
+    def preprocess(self, data: bytes, timeout: float | None = BUFFER_ACQUIRE_TIMEOUT) -> Iterator[np.ndarray]:
+        with self.pool.buffer(timeout) as buf:
+            yield self.decode_into(data, buf)
+
+    @staticmethod
+    def encode_instances(tensor: np.ndarray) -> bytes:
+        """بدنهٔ {"instances": [tensor]} برای REST API سرویس TF-Serving."""
+        if orjson is not None:
+            return orjson.dumps({"instances": tensor[np.newaxis]}, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps({"instances": [tensor.tolist()]}).encode()
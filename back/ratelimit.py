@@ -0,0 +1,248 @@
+# back/ratelimit.py
+# ---------------------------------------------------------------------------
+# محدودسازی نرخ (token bucket) برای اندپوینت‌های حساس به CPU مثل ورود/ثبت‌نام
+# - هر درخواست باید از سطل «IP» و (در صورت وجود) سطل «نام کاربری نرمال‌شده» یک توکن بردارد.
+# - سقف‌ها برای هر مسیر جدا و از ENV قابل تغییرند؛ قالب «ظرفیت/ثانیه»:
+#       RATE_LIMIT_LOGIN_IP=20/60      (۲۰ درخواست در هر ۶۰ ثانیه برای هر IP)
+#       RATE_LIMIT_LOGIN_USER=10/60
+#       RATE_LIMIT_SIGNUP_IP=5/60
+#       RATE_LIMIT_CHECK_IP=30/60
+#   مقدار 0 یا خالی یعنی بدون محدودیت. مقدار نامعتبر هنگام import خطا می‌دهد (نه در اولین درخواست).
+# - پشتهٔ پیش‌فرض درون‌پروسه‌ای است (برای هر worker جدا). با RATE_LIMIT_BACKEND=sqlite
+#   سطل‌ها در یک فایل SQLite مشترک (RATE_LIMIT_SQLITE_PATH؛ مسیر نسبی کنار پوشهٔ back) نگه داشته می‌شوند تا
+#   چند worker uvicorn سقف یکسانی را رعایت کنند.
+# - در صورت عبور از سقف: 429 با هدر Retry-After.
+# ---------------------------------------------------------------------------
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import math
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")   # memory | sqlite
+BASE_DIR = Path(__file__).resolve().parent
+# مثل بقیهٔ فایل‌های داده مستقل از cwd؛ مسیر مطلق در ENV همان‌طور استفاده می‌شود
+RATE_LIMIT_SQLITE_PATH = str(BASE_DIR / os.getenv("RATE_LIMIT_SQLITE_PATH", "ratelimit.db"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# اگر پشت reverse proxy هستید، IP واقعی از X-Forwarded-For خوانده شود
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
+# سقف‌های پیش‌فرض هر مسیر (قابل بازنویسی با ENV)
+DEFAULT_LIMITS = {
+    "login": {"ip": "20/60", "user": "10/60"},
+    "signup": {"ip": "5/60"},
+    "check": {"ip": "30/60"},
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    capacity: float   # حداکثر توکن (اندازهٔ انفجار مجاز)
+    period: float     # زمان پر شدن کامل سطل (ثانیه)
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, spec: str | None) -> "Rule | None":
+        """'10/60' → Rule(10, 60)؛ '0' یا خالی → None (بدون محدودیت)؛ قالب نامعتبر → ValueError"""
+        if not spec or spec.strip() in ("0", "off"):
+            return None
+        capacity, _, period = spec.partition("/")
+        rule = cls(float(capacity), float(period or 1))
+        if not (0 < rule.capacity < math.inf and 0 < rule.period < math.inf):
+            raise ValueError(f"ظرفیت و ثانیه باید مثبت باشند: {spec!r}")
+        return rule
+
+
+def _rules_for(route: str) -> dict[str, Rule]:
+    out = {}
+    for kind in ("ip", "user"):
+        name = f"RATE_LIMIT_{route.upper()}_{kind.upper()}"
+        spec = os.getenv(name, DEFAULT_LIMITS.get(route, {}).get(kind))
+        try:
+            rule = Rule.parse(spec)
+        except ValueError as e:
+            raise ValueError(f"{name}={spec!r} نامعتبر است؛ قالب «ظرفیت/ثانیه» مثل 10/60 ({e})") from None
+        if rule is not None:
+            out[kind] = rule
+    return out
+
+
+def _take(tokens: float, ts: float, now: float, rule: Rule) -> tuple[float, float]:
+    """
+    یک قدم token bucket. خروجی: (توکن‌های باقی‌مانده, زمان انتظار)
+    زمان انتظار صفر یعنی درخواست مجاز است و یک توکن برداشته شده.
+    """
+    tokens = min(rule.capacity, tokens + (now - ts) * rule.rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rule.rate
+
+
+# ---------- پشتهٔ درون‌پروسه‌ای ----------
+class MemoryBuckets:
+    """
+    key → (tokens, last_ts) در یک OrderedDict به ترتیب آخرین استفاده.
+    سطلی که به اندازهٔ طولانی‌ترین period دست نخورده، دوباره پر شده و معادل «نبودن» است؛
+    پس از سر صف (قدیمی‌ترین‌ها) حذف می‌شود. سقف RATE_LIMIT_MAX_KEYS هم رعایت می‌شود.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._idle = 0.0
+
+    def hit(self, key: str, rule: Rule) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.pop(key, (rule.capacity, now))
+            tokens, wait = _take(tokens, ts, now, rule)
+            self._buckets[key] = (tokens, now)
+            self._idle = max(self._idle, rule.period)
+            self._evict(now)
+        return wait
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            key, (_, ts) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - ts < self._idle:
+                break
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# ---------- پشتهٔ SQLite مشترک بین workerها ----------
+class SQLiteBuckets:
+    """
+    سطل‌ها در یک جدول WITHOUT ROWID؛ هر hit در یک تراکنش BEGIN IMMEDIATE انجام
+    می‌شود تا خواندن/نوشتن بین پروسه‌ها اتمیک باشد. زمان از ساعت دیواری است
+    چون بین پروسه‌ها مشترک است.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        self._idle = 0.0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_bucket ("
+                " key TEXT PRIMARY KEY, tokens REAL NOT NULL, ts REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_bucket_ts ON rate_bucket (ts)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, rule: Rule) -> float:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, ts FROM rate_bucket WHERE key = ?", (key,)).fetchone()
+            tokens, ts = row if row else (rule.capacity, now)
+            tokens, wait = _take(tokens, ts, now, rule)
+            conn.execute(
+                "INSERT INTO rate_bucket (key, tokens, ts) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, ts = excluded.ts",
+                (key, tokens, now),
+            )
+            self._hits += 1
+            self._idle = max(self._idle, rule.period)
+            if self._hits % 1000 == 0:
+                # پاک‌سازی دوره‌ای سطل‌های بیکار (پر شده)
+                conn.execute("DELETE FROM rate_bucket WHERE ts < ?", (now - self._idle,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class RateLimiter:
+    def __init__(self, backend=None):
+        self.backend = backend or (SQLiteBuckets() if RATE_LIMIT_BACKEND == "sqlite" else MemoryBuckets())
+        # همهٔ سقف‌ها همین‌جا (هنگام import) خوانده و اعتبارسنجی می‌شوند
+        self._rules: dict[str, dict[str, Rule]] = {route: _rules_for(route) for route in DEFAULT_LIMITS}
+
+    def rules(self, route: str) -> dict[str, Rule]:
+        if route not in self._rules:
+            self._rules[route] = _rules_for(route)
+        return self._rules[route]
+
+    def check(self, route: str, ip: str | None, username: str | None = None) -> float:
+        """همهٔ سطل‌های مرتبط را می‌زند؛ بیشترین زمان انتظار را برمی‌گرداند (0 = مجاز)."""
+        wait = 0.0
+        rules = self.rules(route)
+        if "ip" in rules and ip:
+            wait = max(wait, self.backend.hit(f"{route}:ip:{ip}", rules["ip"]))
+        name = (username or "").strip().lower()
+        if "user" in rules and name:
+            wait = max(wait, self.backend.hit(f"{route}:user:{name}", rules["user"]))
+        return wait
+
+
+limiter = RateLimiter()
+
+
+def client_ip(request: Request) -> str | None:
+    if RATE_LIMIT_TRUST_PROXY:
+        fwd = request.headers.get("x-forwarded-for")
+        if fwd:
+            return fwd.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+def limit(route: str, username_field: str | None = None):
+    """
+    وابستگی FastAPI برای یک مسیر:
+        @router.post("/login", dependencies=[Depends(ratelimit.limit("login", "username"))])
+    username_field از query string یا بدنهٔ JSON خوانده می‌شود (بدنه را Starlette کش می‌کند).
+    سقف‌های route همین‌جا (هنگام ثبت مسیر) خوانده می‌شوند تا ENV نامعتبر سرور را بالا نیاورد.
+    """
+    limiter.rules(route)
+
+    async def dependency(request: Request):
+        username = None
+        if username_field:
+            username = request.query_params.get(username_field)
+            if username is None and request.headers.get("content-type", "").startswith("application/json"):
+                try:
+                    body = await request.json()
+                except ValueError:
+                    body = None
+                if isinstance(body, dict) and isinstance(body.get(username_field), str):
+                    username = body[username_field]
+
+        ip = client_ip(request)
+        if isinstance(limiter.backend, MemoryBuckets):
+            wait = limiter.check(route, ip, username)
+        else:
+            wait = await run_in_threadpool(limiter.check, route, ip, username)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="تعداد درخواست‌ها بیش از حد مجاز است؛ کمی بعد دوباره تلاش کنید",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    return dependency
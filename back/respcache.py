@@ -0,0 +1,141 @@
+# back/respcache.py
+# ---------------------------------------------------------------------------
+# کش درون‌پروسه‌ای پاسخ‌های عمومی (read-through)
+# - بدنهٔ JSON از پیش سریال‌شده (bytes) + هدرها ذخیره می‌شود؛ برخورد (hit) یعنی نه کوئری
+#   فهرست، نه ساخت مدل Pydantic و نه سریال‌سازی — فقط فرستادن همان bytes.
+# - کلید همان ETag مسیر است (httpcache.make_etag از نام دسته + نسخهٔ تغییر + query string)؛
+#   پس تغییری که worker دیگری commit کرده هم کلید تازه می‌سازد و پاسخ کهنه برنمی‌گردد.
+# - حذف دقیق: با changes.subscribe، commit هر نوشتن ادمین همهٔ ورودی‌های برچسب همان دسته
+#   (news / articles / guide) را فوراً دور می‌ریزد تا حافظه آزاد شود.
+# - TTL (RESPONSE_CACHE_TTL ثانیه) + LRU با سقف حجمی (RESPONSE_CACHE_MAX_BYTES)؛
+#   RESPONSE_CACHE_MAX_BYTES=0 کش را خاموش می‌کند.
+# - stats(): تعداد ورودی‌ها، حجم، hit/miss/hit_ratio و شمار evict/invalidate
+#   (GET /cache/stats برای ادمین). پاسخ‌ها هدر X-Cache: HIT|MISS دارند.
+#
+#   if (hit := respcache.get(etag)) is not None:
+#       return hit
+#   ...
+#   return respcache.put(etag, changes.NEWS, body, headers)
+# ---------------------------------------------------------------------------
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import os
+import threading
+import time
+from typing import Iterable
+
+from fastapi import Response
+
+import changes
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))  # ثانیه
+
+# سربار تقریبی هر ورودی (کلید، dict هدرها، شیء Entry) در حساب حجم
+_ENTRY_OVERHEAD = 256
+
+
+@dataclass
+class _Entry:
+    tag: str
+    body: bytes
+    headers: dict[str, str]
+    expires: float
+    size: int
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()  # after_commit ممکن است از thread دیگری صدا زده شود
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.expired = self.invalidated = 0
+
+    def get(self, key: str) -> _Entry | None:
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None and e.expires <= time.monotonic():
+                self._drop(key)
+                self.expired += 1
+                e = None
+            if e is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return e
+
+    def put(self, key: str, tag: str, body: bytes, headers: dict[str, str]) -> None:
+        size = len(body) + sum(len(k) + len(v) for k, v in headers.items()) + len(key) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return  # بزرگ‌تر از کل کش؛ ذخیره نمی‌شود
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(tag, body, headers, time.monotonic() + self.ttl, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        tags = set(tags)
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e.tag in tags]
+            for k in stale:
+                self._drop(k)
+            self.invalidated += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key: str) -> None:
+        self.bytes -= self._entries.pop(key).size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "invalidated": self.invalidated,
+            }
+
+
+cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL)
+changes.subscribe(cache.invalidate)
+
+
+def _response(body: bytes, headers: dict[str, str], state: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={**headers, "X-Cache": state})
+
+
+def get(key: str) -> Response | None:
+    """پاسخ آماده از کش (X-Cache: HIT) یا None."""
+    if RESPONSE_CACHE_MAX_BYTES <= 0:
+        return None
+    e = cache.get(key)
+    return None if e is None else _response(e.body, e.headers, "HIT")
+
+
+def put(key: str, tag: str, body: bytes, headers: dict[str, str]) -> Response:
+    """ذخیرهٔ بدنهٔ سریال‌شده زیر برچسب tag و برگرداندن همان پاسخ (X-Cache: MISS)."""
+    if RESPONSE_CACHE_MAX_BYTES > 0:
+        cache.put(key, tag, body, headers)
+    return _response(body, headers, "MISS")
+
+
+def stats() -> dict:
+    return cache.stats()
@@ -7,32 +7,99 @@
 # - مدل‌ها: schemas.Article, ArticleCreate, ArticleUpdate
 # -----------------------------------------------------------------------------
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 import model, schemas
-from database import get_db
-from sqlalchemy import or_                      # (فعلاً استفاده نشده؛ برای جستجو/فیلتر آینده)
-from typing import List, Optional               # (Optional فعلاً استفاده نشده)
-from auth import get_current_user               # وابستگی احراز هویت (Bearer JWT)
+from database import get_async_db
+from sqlalchemy import select
+from typing import List, Optional
+from auth import Principal, get_current_claims   # وابستگی احراز هویت (Bearer JWT)
+import writes                                    # نوشتن با RETURNING (بدون refresh)
+import changes, httpcache, respcache             # نسخهٔ تغییر + ETag/304 + کش پاسخ
+import facets                                    # شمار هر دسته (چیپ‌های فیلتر)
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, newest_first, newest_first_cursor, parse_fields
 
 # ساخت روتر با پیشوند و تگ مشخص (برای سواگر/داکس)
 router = APIRouter(prefix="/articles", tags=["Articles"])
 
+# سریال‌ساز فهرست (بدنهٔ bytes برای respcache)
+_LIST = TypeAdapter(List[schemas.ArticleListItem])
 
-@router.get("/", response_model=List[schemas.Article])
-def get_articles(db: Session = Depends(get_db)):
+
+@router.get("/", response_model=List[schemas.ArticleListItem], response_model_exclude_unset=True)
+async def get_articles(
+    request: Request,
+    category: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="ستون‌های خروجی با کاما، مثلاً title,content (id همیشه)"),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    دریافت فهرست همهٔ مقالات.
+    دریافت فهرست مقالات، جدیدترین اول.
 
     - بدون نیاز به احراز هویت (عمومی).
-    - خروجی با Pydantic: List[schemas.Article]  (ORM → JSON)
-    - نکته: برای پروژه‌های بزرگ بهتر است صفحه‌بندی (limit/offset) اضافه شود.
+    - خروجی خلاصه است (schemas.ArticleListItem) و content خوانده نمی‌شود؛
+      ?fields=title,content ستون‌های دلخواه را برمی‌گرداند. متن کامل: GET /articles/{id}
+    - صفحه‌بندی keyset روی (created_at, id): cursor صفحهٔ بعد در هدر X-Next-Cursor؛
+      بدون پارامتر فقط صفحهٔ اول (DEFAULT_PAGE_SIZE) برمی‌گردد.
+    - category: فیلتر دسته (ایندکس ix_articles_category_created_id)
+    - ETag از نسخهٔ تغییر مقالات + query string؛ If-None-Match منطبق → 304 بدون کوئری فهرست
+    - بدنهٔ JSON هر (نسخه، query) در respcache می‌ماند؛ برخورد بعدی بدون کوئری فهرست و سریال‌سازی
+    """
+    ver = await changes.version(db, changes.ARTICLES)
+    etag = httpcache.make_etag(changes.ARTICLES, ver.version, request.url.query)
+    if (cached := httpcache.not_modified(request, etag, ver.changed_at)) is not None:
+        return cached
+    if (hit := respcache.get(etag)) is not None:
+        return hit
+    headers = httpcache.validators(etag, ver.changed_at)
+
+    A = model.ArticleTable
+    names = parse_fields(fields, A)
+    # فقط ستون‌های لازم (created_at برای cursor)؛ content بدون درخواست صریح خوانده نمی‌شود
+    query = select(*(getattr(A, n) for n in dict.fromkeys([*names, "created_at"])))
+    if category:
+        query = query.where(A.category == category)
+    query = newest_first(query, A.created_at, A.id, cursor)
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = newest_first_cursor(rows[-1].created_at, rows[-1].id)
+    items = _LIST.validate_python([{n: getattr(r, n) for n in names} for r in rows])
+    return respcache.put(etag, changes.ARTICLES, _LIST.dump_json(items, exclude_unset=True), headers)
+
+
+@router.get("/facets", response_model=schemas.FacetsOut)
+async def get_articles_facets(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    تعداد مقالات هر دسته برای چیپ‌های فیلتر (?category= همین فهرست).
+    - از شمارنده‌های category_count (facets.py) خوانده می‌شود، نه GROUP BY روی کل جدول.
+    - ETag از نسخهٔ تغییر مقالات (مثل فهرست)؛ پاسخ در respcache
     """
-    return db.query(model.ArticleTable).all()
+    ver = await changes.version(db, changes.ARTICLES)
+    etag = httpcache.make_etag(changes.ARTICLES, "facets", ver.version)
+    if (cached := httpcache.not_modified(request, etag, ver.changed_at)) is not None:
+        return cached
+    if (hit := respcache.get(etag)) is not None:
+        return hit
+    f = await facets.counts(db, changes.ARTICLES)
+    body = schemas.FacetsOut(
+        total=f.total,
+        categories=[schemas.CategoryFacet(category=c, count=n) for c, n in f.categories],
+    )
+    return respcache.put(etag, changes.ARTICLES, body.model_dump_json().encode(), httpcache.validators(etag, ver.changed_at))
 
 
 @router.get("/{article_id}", response_model=schemas.Article)
-def get_article(article_id: int, db: Session = Depends(get_db)):
+async def get_article(
+    article_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     دریافت جزئیات یک مقاله با شناسهٔ عددی.
 
@@ -42,18 +109,23 @@ def get_article(article_id: int, db: Session = Depends(get_db)):
     رفتار:
     - اگر یافت نشود: 404
     - در غیر این صورت: شیء مقاله (Article) را برمی‌گرداند.
+    - ETag/Last-Modified از updated_at مقاله؛ If-None-Match منطبق → 304 بدون سریال‌سازی
     """
-    a = db.query(model.ArticleTable).filter(model.ArticleTable.id == article_id).first()
+    a = await db.get(model.ArticleTable, article_id)
     if not a:
         raise HTTPException(404, detail="مقاله پیدا نشد")
+    etag = httpcache.make_etag(changes.ARTICLES, a.id, a.updated_at)
+    if (cached := httpcache.not_modified(request, etag, a.updated_at)) is not None:
+        return cached
+    httpcache.apply(response, etag, a.updated_at)
     return a
 
 
 @router.post("/", response_model=schemas.Article, status_code=status.HTTP_201_CREATED)
-def create_article(
+async def create_article(
     article: schemas.ArticleCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     ایجاد مقالهٔ جدید — فقط برای ادمین.
@@ -74,30 +146,19 @@ def create_article(
             detail="فقط ادمین میتواند مقاله ایجاد کند",
         )
 
-    # ساخت نمونهٔ ORM از داده‌های ورودی
-    db_article = model.ArticleTable(
-        title=article.title,
-        summary=article.summary,
-        content=article.content,
-        category=article.category,
-        image=article.image,
-        source=article.source,
-    )
-
-    # افزودن به سشن و ذخیره در دیتابیس
-    db.add(db_article)
-    db.commit()
-    db.refresh(db_article)  # تازه‌سازی تا فیلدهای تولیدشده (id و ...) را داشته باشیم
-
+    # INSERT ... RETURNING: فیلدهای تولیدشده (id و ...) همراه خود دستور برمی‌گردند
+    db_article = await writes.insert_one(db, model.ArticleTable, **article.model_dump())
+    await changes.mark_changed(db, changes.ARTICLES)
+    await db.commit()
     return db_article
 
 
 @router.put("/{article_id}", response_model=schemas.Article)
-def update_article(
+async def update_article(
     article_id: int,
     payload: schemas.ArticleUpdate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     ویرایش مقاله — فقط برای ادمین.
@@ -114,25 +175,21 @@ def update_article(
     if current_user.role != "admin":
         raise HTTPException(403, detail="فقط ادمین می‌تواند ویرایش کند")
 
-    a = db.query(model.ArticleTable).filter(model.ArticleTable.id == article_id).first()
+    # فقط فیلدهای ارسال‌شده را اعمال کن (PATCH-مانند)؛ UPDATE ... RETURNING در یک دستور
+    data = payload.model_dump(exclude_unset=True)
+    a = await writes.update_one(db, model.ArticleTable, article_id, **data)
     if not a:
         raise HTTPException(404, detail="مقاله پیدا نشد")
-
-    # فقط فیلدهای ارسال‌شده را اعمال کن (PATCH-مانند)
-    data = payload.model_dump(exclude_unset=True)
-    for k, v in data.items():
-        setattr(a, k, v)
-
-    db.commit()
-    db.refresh(a)
+    await changes.mark_changed(db, changes.ARTICLES)
+    await db.commit()
     return a
 
 
 @router.delete("/{article_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_article(
+async def delete_article(
     article_id: int,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     حذف مقاله — فقط برای ادمین.
@@ -145,10 +202,8 @@ def delete_article(
     if current_user.role != "admin":
         raise HTTPException(403, detail="فقط ادمین می‌تواند حذف کند")
 
-    a = db.query(model.ArticleTable).filter(model.ArticleTable.id == article_id).first()
-    if not a:
+    if await writes.delete_one(db, model.ArticleTable, article_id) is None:
         raise HTTPException(404, detail="مقاله پیدا نشد")
-
-    db.delete(a)
-    db.commit()
+    await changes.mark_changed(db, changes.ARTICLES)
+    await db.commit()
     return  # 204 No Content
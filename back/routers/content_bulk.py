@@ -0,0 +1,101 @@
+# routers/content_bulk.py
+# -----------------------------------------------
+# ورود/خروج گروهی خبرها و مقالات (ادمین فقط) — برای مهاجرت از CMS قبلی:
+#  - POST /content/bulk/{kind}  : ورود از فایل CSV یا NDJSON (kind = news | articles)
+#  - GET  /content/bulk/{kind}  : خروجی کامل به‌صورت NDJSON (پیش‌فرض) یا CSV
+#
+# نکات:
+#  * فایل ورودی جریانی خوانده می‌شود (bulkio.py) و هر دسته (batch_size سطر) یک تراکنش است
+#    (contentio.apply_batch)؛ به‌جای یک commit برای هر خبر با POST /news/.
+#  * هر سطر با NewsImportRow / ArticleImportRow اعتبارسنجی می‌شود؛ سطر دارای id موجود
+#    به‌روزرسانی و بقیه درج می‌شوند (upsert). خطای هر سطر با شمارهٔ سطر گزارش می‌شود.
+#  * خروجی با yield_per از cursor دیتابیس تکه‌تکه خوانده و فرستاده می‌شود؛ کل جدول در حافظه
+#    نمی‌آید. قالب خروجی همان قالب ورودی است (ورود دوبارهٔ فایل خروجی = به‌روزرسانی بر اساس id).
+#  * همان کار از خط فرمان: python scripts/content_bulk.py --help
+# -----------------------------------------------
+
+import time
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import bulkio
+import contentio
+import schemas
+from auth import Principal, get_admin_user
+from database import AsyncSessionLocal, get_async_db
+
+router = APIRouter(prefix="/content/bulk", tags=["Content"])
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _kind(kind: str) -> contentio.Kind:
+    if kind not in contentio.KINDS:
+        raise HTTPException(404, detail="نوع محتوا باید news یا articles باشد")
+    return contentio.KINDS[kind]
+
+
+@router.post("/{kind}", response_model=schemas.BulkReportOut)
+async def import_content(
+    kind: str,
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="اگر نباشد از پسوند/نوع فایل تشخیص داده می‌شود"),
+    batch_size: int = Query(bulkio.BULK_BATCH_SIZE, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    _admin: Principal = Depends(get_admin_user),
+):
+    """
+    ورود گروهی خبر/مقاله از فایل CSV/NDJSON.
+    - ستون‌ها: همان فیلدهای ساخت خبر/مقاله + id و created_at اختیاری
+    - هر دسته: اعتبارسنجی → یک SELECT برای idهای موجود → UPDATE/INSERT گروهی → یک commit
+    - خروجی: گزارش موفق/ناموفق با خطای هر سطر و rows_per_sec
+    """
+    k = _kind(kind)
+    fmt = bulkio.open_format(file, format)
+    report = bulkio.BulkReport()
+    started = time.perf_counter()
+    seen: set[int] = set()
+    batches = bulkio.batched(bulkio.iter_records(file.file, fmt), batch_size)
+
+    while (batch := await bulkio.next_batch(batches)) is not None:
+        rows = contentio.validate(k, batch, report, seen)
+        if not rows:
+            continue
+        failures = await db.run_sync(contentio.apply_batch, k, rows)
+        for line, error in failures:
+            report.fail(line, error)
+        report.succeeded += len(rows) - len(failures)
+
+    return bulkio.finish(report, started)
+
+
+async def _stream(k: contentio.Kind, fmt: str):
+    # Session خود پاسخ جریانی (Session وابستگی قبل از فرستادن بدنه بسته می‌شود)
+    cols = contentio.columns(k)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(contentio.export_query(k))
+        if fmt == "csv":
+            yield bulkio.encode_csv(cols, [], header=True)
+        async for part in result.partitions():
+            yield bulkio.encode_csv(cols, part) if fmt == "csv" else bulkio.encode_ndjson(cols, part)
+
+
+@router.get("/{kind}")
+async def export_content(
+    kind: str,
+    format: Literal["csv", "ndjson"] = Query("ndjson"),
+    _admin: Principal = Depends(get_admin_user),
+):
+    """
+    خروجی کامل خبرها/مقالات (به ترتیب id) به‌صورت فایل قابل دانلود.
+    - جریانی: هر تکه contentio.EXPORT_CHUNK ردیف؛ حافظه مستقل از اندازهٔ جدول.
+    """
+    k = _kind(kind)
+    return StreamingResponse(
+        _stream(k, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{k.name}.{format}"'},
+    )
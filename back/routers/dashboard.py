@@ -9,11 +9,11 @@
 
 from datetime import datetime
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import model, schemas
-from database import get_db
+from database import get_async_db
 from auth import get_current_user
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
@@ -46,7 +46,7 @@ def _profile_completion(u: model.UserTable) -> int:
     # تضمین محدوده‌ی 0..100
     return max(0, min(score, 100))
 
-def _build_dashboard(db: Session, u: model.UserTable) -> schemas.DashboardOut:
+async def _build_dashboard(db: AsyncSession, u: model.UserTable) -> schemas.DashboardOut:
     """
     داده‌های داشبورد را از روی دیتابیس می‌سازد.
     - شمارش اعلان‌های نخوانده (unread_cnt)
@@ -59,23 +59,25 @@ def _build_dashboard(db: Session, u: model.UserTable) -> schemas.DashboardOut:
     # - شامل اعلان‌های «شخصی» (user_id == u.id) و «عمومی» (user_id IS NULL)
     # - is_read ممکن است در رکوردهای قدیمی NULL باشد؛ بنابراین False یا NULL هر دو «نخوانده» فرض می‌شوند.
     unread_cnt = (
-        db.query(func.count(N.id))
-        .filter(
-            or_(N.user_id == u.id, N.user_id.is_(None)),
-            or_(N.is_read.is_(False), N.is_read.is_(None)),
+        await db.scalar(
+            select(func.count(N.id))
+            .where(
+                or_(N.user_id == u.id, N.user_id.is_(None)),
+                or_(N.is_read.is_(False), N.is_read.is_(None)),
+            )
         )
-        .scalar()
         or 0  # اگر None شد، 0 برگردان
     )
 
     # ۵ اعلان آخر برای نمایش در داشبورد
     recent_notifs = (
-        db.query(N)
-        .filter(or_(N.user_id == u.id, N.user_id.is_(None)))
-        .order_by(N.created_at.desc())
-        .limit(5)
-        .all()
-    )
+        await db.scalars(
+            select(N)
+            .where(or_(N.user_id == u.id, N.user_id.is_(None)))
+            .order_by(N.created_at.desc())
+            .limit(5)
+        )
+    ).all()
 
     # نگاشت اعلان‌ها به آیتم‌های قابل‌نمایش در داشبورد
     # - title: عنوان اعلان (fallback: «اعلان جدید»)
@@ -106,21 +108,21 @@ def _build_dashboard(db: Session, u: model.UserTable) -> schemas.DashboardOut:
 # -----------------------------------------------------------------------------
 @router.get("", response_model=schemas.DashboardOut)
 @router.get("/", response_model=schemas.DashboardOut)
-def get_dashboard_root(
-    db: Session = Depends(get_db),
+async def get_dashboard_root(
+    db: AsyncSession = Depends(get_async_db),
     current_user: model.UserTable = Depends(get_current_user),
 ):
     """داشبورد کاربر احرازشده (مسیر ریشه‌ی داشبورد)."""
-    return _build_dashboard(db, current_user)
+    return await _build_dashboard(db, current_user)
 
 # -----------------------------------------------------------------------------
 # GET /dashboard/me
 # مسیر معادل (درصورت تمایل به جداسازی معنایی)
 # -----------------------------------------------------------------------------
 @router.get("/me", response_model=schemas.DashboardOut)
-def get_dashboard_me(
-    db: Session = Depends(get_db),
+async def get_dashboard_me(
+    db: AsyncSession = Depends(get_async_db),
     current_user: model.UserTable = Depends(get_current_user),
 ):
     """داشبورد کاربر احرازشده (مسیر /me)."""
-    return _build_dashboard(db, current_user)
+    return await _build_dashboard(db, current_user)
@@ -3,20 +3,32 @@
 # روتر مربوط به «راهنمای تفکیک»:
 # - مدیریت دسته‌بندی‌ها (GuideCategoryTable) و آیتم‌های هر دسته (GuideItemTable)
 # - اندپوینت‌های عمومی برای خواندن کل راهنما / یک دسته / آیتم‌های یک دسته
+#   (فهرست و یک دسته از snapshot حافظهٔ guidecache.py؛ بدون کوئری)
+# - GET /guide/lookup?q=: «کجا بیندازم؟» با نمایهٔ trigram حافظه (guidelookup.py)
 # - اندپوینت‌های ادمین برای ایجاد/ویرایش/حذف دسته و آیتم
 # - تمام پاسخ‌های عمومی به مدل‌های Pydantic در schemas مپ می‌شوند
 # -----------------------------------------------------------------------------
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List
 import model, schemas
-from database import get_db
-from auth import get_current_user
+import writes
+import changes, guidecache, guidelookup, httpcache, respcache
+from guidecache import to_out  # ORM دسته → GuideCategoryOut (گروه‌بندی آیتم‌ها)
+from database import get_async_db
+from auth import Principal, get_current_claims
+import json
 import re
 
 router = APIRouter(prefix="/guide", tags=["Guide"])
 
+# مسیرهای ثابت هم‌سطح /guide/{slug}؛ دسته‌ای با این slug پشت آن مسیر پنهان می‌ماند
+RESERVED_SLUGS = {"lookup"}
+
 # -----------------------------------------------------------------------------
 # ابزارک‌ها
 # -----------------------------------------------------------------------------
@@ -36,86 +48,109 @@ def slugify(s: str) -> str:
     # ادغام چند - متوالی و حذف - ابتدا/انتها
     return re.sub(r"-+", "-", s).strip("-")
 
-def to_out(cat: model.GuideCategoryTable) -> schemas.GuideCategoryOut:
-    """
-    تبدیل شیٔ ORM دسته‌بندی به خروجی Pydantic گروه‌بندی‌شده:
-    - آیتم‌ها بر اساس kind به 4 گروه yes/no/prep/note تقسیم می‌شوند.
-    - notes اگر خالی باشد، به‌صورت None بازگردانده می‌شود تا در JSON حذف شود.
-    """
-    groups = {"yes": [], "no": [], "prep": [], "note": []}
-    for it in cat.items:
-        groups[it.kind.value].append(it.text)
-
-    return schemas.GuideCategoryOut(
-        slug=cat.slug,
-        name=cat.name,
-        description=cat.description,
-        color=cat.color,
-        examplesYes=groups["yes"],
-        examplesNo=groups["no"],
-        prep=groups["prep"],
-        notes=groups["note"] or None,  # خالی = None
-    )
-
 # -----------------------------------------------------------------------------
 # READ (عمومی)
 # -----------------------------------------------------------------------------
+async def _guide_validators(request: Request, db: AsyncSession, *key) -> tuple[str, dict[str, str], Response | None]:
+    """
+    ETag مسیرهای خواندنی راهنما که از snapshot حافظه سرو نمی‌شوند (آیتم‌های خام) از نسخهٔ تغییر guide.
+    خروجی: (etag، هدرهای اعتبارسنجی، پاسخ زودهنگام) — پاسخ زودهنگام 304 یا برخورد respcache است.
+    """
+    ver = await changes.version(db, changes.GUIDE)
+    etag = httpcache.make_etag(changes.GUIDE, ver.version, *key)
+    early = httpcache.not_modified(request, etag, ver.changed_at) or respcache.get(etag)
+    return etag, httpcache.validators(etag, ver.changed_at), early
+
+def _from_snapshot(request: Request, snap: guidecache.GuideSnapshot, body: bytes, etag: str) -> Response:
+    """پاسخ از snapshot حافظه: 304 اگر If-None-Match بخواند، وگرنه bytes آماده + X-Guide-Version."""
+    headers = {**httpcache.validators(etag, snap.changed_at), "X-Guide-Version": str(snap.version)}
+    cached = httpcache.not_modified(request, etag, snap.changed_at)
+    if cached is not None:
+        cached.headers["X-Guide-Version"] = str(snap.version)
+        return cached
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.get("/", response_model=List[schemas.GuideCategoryOut])
-def get_categories(db: Session = Depends(get_db)):
+async def get_categories(request: Request):
     """
     همهٔ دسته‌بندی‌های راهنما + آیتم‌هایشان (گروه‌بندی‌شده در خروجی).
-    - از selectinload برای جلوگیری از N+1 query استفاده شده است.
+    - از snapshot حافظه (guidecache.py) سرو می‌شود: بدون کوئری DB و بدون سریال‌سازی.
+    - هدر X-Guide-Version: نسخهٔ فعلی راهنما (بعد از هر ویرایش ادمین بزرگ‌تر می‌شود)
+    - ETag از همان نسخه؛ If-None-Match منطبق → 304
     """
-    cats = (
-        db.query(model.GuideCategoryTable)
-        .options(selectinload(model.GuideCategoryTable.items))
-        .all()
+    snap = await guidecache.fresh()
+    return _from_snapshot(request, snap, snap.list_body, snap.list_etag)
+
+@router.get("/lookup", response_model=schemas.GuideLookupOut)
+async def lookup_item(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100, description="نام پسماند، مثلاً «پاکت شیر»"),
+    limit: int = Query(5, ge=1, le=20),
+):
+    """
+    «این را کجا بیندازم؟»: دسته‌هایی که آیتم‌هایشان به عبارت q شبیه‌اند، به ترتیب امتیاز.
+    - جستجوی تقریبی (trigram) و پیشوندی روی متن یکسان‌شدهٔ آیتم‌ها و نام دسته‌ها (guidelookup.py)
+    - از نمایهٔ حافظه؛ بدون کوئری DB. هر دسته چند آیتم جورشده (با kind) را هم برمی‌گرداند.
+    - هدر X-Guide-Version: نسخهٔ راهنمایی که نمایه از آن ساخته شده
+    """
+    await guidecache.fresh()   # نمایه همراه snapshot به‌روز می‌شود (نوشتهٔ همین worker دیده شود)
+    version, hits = guidelookup.lookup(q, limit)
+    response.headers["X-Guide-Version"] = str(version)
+    return schemas.GuideLookupOut(
+        query=q,
+        results=[
+            schemas.GuideLookupHit(
+                slug=h.slug, name=h.name, color=h.color, score=h.score,
+                matches=[schemas.GuideLookupMatch(text=t, kind=k) for t, k in h.matches],
+            )
+            for h in hits
+        ],
     )
-    return [to_out(c) for c in cats]
 
 @router.get("/{slug}", response_model=schemas.GuideCategoryOut)
-def get_one_category(slug: str, db: Session = Depends(get_db)):
+async def get_one_category(slug: str, request: Request):
     """
     یک دسته‌بندی با اسلاگ + آیتم‌هایش (به‌صورت گروه‌بندی‌شده در خروجی).
     - 404 اگر دسته موجود نباشد.
+    - از snapshot حافظه مثل فهرست (بدون کوئری)؛ X-Guide-Version و ETag از نسخهٔ راهنما
     """
-    c = (
-        db.query(model.GuideCategoryTable)
-        .options(selectinload(model.GuideCategoryTable.items))
-        .filter(model.GuideCategoryTable.slug == slug)
-        .first()
-    )
-    if not c:
+    snap = await guidecache.fresh()
+    entry = snap.by_slug.get(slug)
+    if entry is None:
         raise HTTPException(status_code=404, detail="دسته‌بندی پیدا نشد")
-    return to_out(c)
+    return _from_snapshot(request, snap, entry.body, entry.etag)
 
 @router.get("/{slug}/items")
-def get_items_of_category(slug: str, db: Session = Depends(get_db)):
+async def get_items_of_category(slug: str, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     آیتم‌های خامِ یک دسته (برای پنل ادمین):
     - بر خلاف دو اندپوینت بالا، این یکی response_model مشخصی ندارد و
       id هر آیتم را هم برمی‌گرداند تا عملیات ویرایش/حذف سمت ادمین آسان شود.
     """
-    c = db.query(model.GuideCategoryTable).filter_by(slug=slug).first()
+    etag, headers, early = await _guide_validators(request, db, "items", slug)
+    if early is not None:
+        return early
+    c = (await db.scalars(select(model.GuideCategoryTable).filter_by(slug=slug))).first()
     if not c:
         raise HTTPException(status_code=404, detail="دسته‌بندی پیدا نشد")
-    items = db.query(model.GuideItemTable).filter_by(category_id=c.id).all()
-    return [{"id": i.id, "kind": i.kind.value, "text": i.text} for i in items]
+    items = (await db.scalars(select(model.GuideItemTable).filter_by(category_id=c.id))).all()
+    body = [{"id": i.id, "kind": i.kind.value, "text": i.text} for i in items]
+    return respcache.put(etag, changes.GUIDE, json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode(), headers)
 
 # -----------------------------------------------------------------------------
 # CREATE/UPDATE/DELETE دسته‌ها (ادمین)
 # -----------------------------------------------------------------------------
 @router.post("/", response_model=schemas.GuideCategoryOut, status_code=status.HTTP_201_CREATED)
-def creat_category(
+async def creat_category(
     payload: schemas.GuideCategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     ایجاد یک دسته‌بندی جدید:
     - فقط ادمین
     - ساخت اسلاگ از name یا slug ورودی
-    - جلوگیری از اسلاگ تکراری (409)
+    - جلوگیری از اسلاگ تکراری (409) و اسلاگ‌های رزرو مسیرها (422)
     """
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="فقط ادمین می‌تواند دسته ایجاد کند")
@@ -124,34 +159,31 @@ def creat_category(
     if not slug:
         raise HTTPException(status_code=422, detail="slug یا name معتبر نیست")
 
-    if db.query(model.GuideCategoryTable).filter_by(slug=slug).first():
+    if slug in RESERVED_SLUGS:
+        raise HTTPException(status_code=422, detail=f"Slug «{slug}» رزرو است")
+    if (await db.scalars(select(model.GuideCategoryTable).filter_by(slug=slug))).first():
         raise HTTPException(status_code=409, detail="Slug تکراری است")
 
-    c = model.GuideCategoryTable(
+    c = await writes.insert_one(
+        db, model.GuideCategoryTable,
         slug=slug,
         name=payload.name,
         description=payload.description,
         color=payload.color,
     )
-    db.add(c)
-    db.commit()
-    db.refresh(c)
-
-    # بارگذاری مجدد با آیتم‌ها برای خروجی یکدست
-    c = (
-        db.query(model.GuideCategoryTable)
-        .options(selectinload(model.GuideCategoryTable.items))
-        .filter_by(id=c.id)
-        .first()
-    )
+    await changes.mark_changed(db, changes.GUIDE)
+    await db.commit()
+
+    # دستهٔ تازه هنوز آیتمی ندارد؛ خروجی از همین شیء ساخته می‌شود (بدون بارگذاری مجدد)
+    set_committed_value(c, "items", [])
     return to_out(c)
 
 @router.put("/{slug}", response_model=schemas.GuideCategoryOut)
-def update_category(
+async def update_category(
     slug: str,
     payload: schemas.GuideCategoryUpdate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     ویرایش اطلاعات یک دسته:
@@ -162,34 +194,26 @@ def update_category(
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="فقط ادمین می‌تواند ویرایش کند")
 
-    c = db.query(model.GuideCategoryTable).filter_by(slug=slug).first()
+    # UPDATE ... RETURNING + یک SELECT برای آیتم‌ها (به‌جای SELECT/UPDATE/refresh/بارگذاری مجدد)
+    data = payload.model_dump(exclude_unset=True)
+    c = await writes.update_one(db, model.GuideCategoryTable, model.GuideCategoryTable.slug == slug, **data)
     if not c:
         raise HTTPException(status_code=404, detail="دسته‌بندی پیدا نشد")
+    items = (await db.scalars(select(model.GuideItemTable).filter_by(category_id=c.id))).all()
+    await changes.mark_changed(db, changes.GUIDE)
+    await db.commit()
 
-    data = payload.model_dump(exclude_unset=True)
-    for k, v in data.items():
-        setattr(c, k, v)
-
-    db.commit()
-    db.refresh(c)
-
-    # بارگذاری مجدد با آیتم‌ها برای خروجی یکدست
-    c = (
-        db.query(model.GuideCategoryTable)
-        .options(selectinload(model.GuideCategoryTable.items))
-        .filter_by(id=c.id)
-        .first()
-    )
+    set_committed_value(c, "items", list(items))
     return to_out(c)
 
 @router.delete("/{slug}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_category(
+async def delete_category(
     slug: str,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
-    حذف یک دسته به‌همراه تمام آیتم‌های وابسته‌اش (به‌لطف ondelete='CASCADE' در FK):
+    حذف یک دسته به‌همراه تمام آیتم‌های وابسته‌اش (هر دو در یک تراکنش):
     - فقط ادمین
     - 404 اگر دسته وجود نداشته باشد
     - 204 بدون بدنه در صورت موفقیت
@@ -197,23 +221,28 @@ def delete_category(
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="فقط ادمین می‌تواند حذف کند")
 
-    c = db.query(model.GuideCategoryTable).filter_by(slug=slug).first()
-    if not c:
-        raise HTTPException(status_code=404, detail="دسته‌بندی پیدا نشد")
-
-    db.delete(c)
-    db.commit()
+    # دو DELETE در یک تراکنش (FK cascade در SQLite پیش‌فرض خاموش است؛ آیتم‌ها صریحاً حذف می‌شوند)
+    async with writes.atomic(db):
+        cat_id = await writes.delete_one(db, model.GuideCategoryTable, model.GuideCategoryTable.slug == slug)
+        if cat_id is None:
+            raise HTTPException(status_code=404, detail="دسته‌بندی پیدا نشد")
+        await db.execute(
+            delete(model.GuideItemTable)
+            .where(model.GuideItemTable.category_id == cat_id)
+            .execution_options(synchronize_session=False)
+        )
+        await changes.mark_changed(db, changes.GUIDE)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # -----------------------------------------------------------------------------
 # CREATE/UPDATE/DELETE آیتم‌ها (ادمین)
 # -----------------------------------------------------------------------------
 @router.post("/{slug}/items", status_code=status.HTTP_201_CREATED)
-def create_item(
+async def create_item(
     slug: str,
     item: schemas.GuideItemCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     افزودن آیتم جدید به یک دسته:
@@ -223,22 +252,146 @@ def create_item(
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="فقط ادمین می‌تواند آیتم اضافه کند")
 
-    c = db.query(model.GuideCategoryTable).filter_by(slug=slug).first()
-    if not c:
+    cat_id = await db.scalar(select(model.GuideCategoryTable.id).filter_by(slug=slug))
+    if cat_id is None:
         raise HTTPException(status_code=404, detail="دسته‌بندی پیدا نشد")
 
-    it = model.GuideItemTable(category_id=c.id, kind=item.kind, text=item.text.strip())
-    db.add(it)
-    db.commit()
-    db.refresh(it)
+    it = await writes.insert_one(
+        db, model.GuideItemTable, category_id=cat_id, kind=item.kind, text=item.text.strip()
+    )
+    await changes.mark_changed(db, changes.GUIDE)
+    await db.commit()
     return {"ok": True, "id": it.id}
 
+
+# -----------------------------------------------------------------------------
+# ویرایش گروهی آیتم‌های یک دسته (ادمین)
+# -----------------------------------------------------------------------------
+def _check_op(op: schemas.GuideBatchOp, seen: set[int]) -> str | None:
+    """خطای شکل یک عملیات (بدون DB)؛ None = معتبر."""
+    text = op.text.strip() if op.text is not None else None
+    if op.op == "create":
+        if op.id is not None:
+            return "create نباید id داشته باشد"
+        if op.kind is None or not text:
+            return "create به kind و text نیاز دارد"
+        return None
+    if op.id is None:
+        return f"{op.op} به id نیاز دارد"
+    if op.id in seen:
+        return "این آیتم در همین batch بیش از یک بار آمده است"
+    seen.add(op.id)
+    if op.op == "update" and op.kind is None and text is None:
+        return "update به kind یا text نیاز دارد"
+    if op.op == "update" and text == "":
+        return "text خالی است"
+    if op.op == "move" and not op.categorySlug:
+        return "move به categorySlug نیاز دارد"
+    return None
+
+@router.post("/{slug}/batch", response_model=schemas.GuideCategoryOut)
+async def batch_items(
+    slug: str,
+    payload: schemas.GuideBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
+):
+    """
+    ویرایش گروهی آیتم‌های یک دسته در یک درخواست (به‌جای یک درخواست و یک commit برای هر آیتم):
+    - فقط ادمین
+    - عملیات‌ها: create / update / move / delete (schemas.GuideBatchOp)
+    - اول همه با هم اعتبارسنجی می‌شوند (شکل، وجود آیتم در همین دسته، وجود دستهٔ مقصد)؛
+      هر خطا → 422 با فهرست {index, error} و هیچ تغییری اعمال نمی‌شود.
+    - اعمال: INSERT گروهی + UPDATE گروهی بر اساس id + یک DELETE، همه در یک تراکنش و یک
+      افزایش نسخهٔ راهنما (یک بار باطل‌شدن کش/snapshot)
+    - خروجی: دستهٔ گروه‌بندی‌شدهٔ تازه (یک SELECT با آیتم‌ها داخل همان تراکنش)
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="فقط ادمین می‌تواند آیتم‌ها را ویرایش کند")
+
+    cat_id = await db.scalar(select(model.GuideCategoryTable.id).filter_by(slug=slug))
+    if cat_id is None:
+        raise HTTPException(status_code=404, detail="دسته‌بندی پیدا نشد")
+
+    ops, seen = payload.ops, set()
+    errors = {i: err for i, op in enumerate(ops) if (err := _check_op(op, seen)) is not None}
+
+    # یک SELECT برای همهٔ idها و یکی برای همهٔ دسته‌های مقصد
+    I = model.GuideItemTable
+    owners = dict((await db.execute(select(I.id, I.category_id).where(I.id.in_(seen)))).all()) if seen else {}
+    targets = {op.categorySlug for op in ops if op.op == "move" and op.categorySlug}
+    dest = (
+        dict((await db.execute(
+            select(model.GuideCategoryTable.slug, model.GuideCategoryTable.id)
+            .where(model.GuideCategoryTable.slug.in_(targets))
+        )).all())
+        if targets else {}
+    )
+    for i, op in enumerate(ops):
+        if i in errors or op.op == "create":
+            continue
+        if owners.get(op.id) != cat_id:
+            errors[i] = "آیتم در این دسته پیدا نشد"
+        elif op.op == "move" and op.categorySlug not in dest:
+            errors[i] = "دستهٔ مقصد پیدا نشد"
+    if errors:
+        raise HTTPException(
+            status_code=422,
+            detail=[{"index": i, "error": errors[i]} for i in sorted(errors)],
+        )
+
+    creates, updates, deletes = [], [], []
+    for op in ops:
+        if op.op == "create":
+            creates.append({"category_id": cat_id, "kind": model.GuideItemKind(op.kind), "text": op.text.strip()})
+        elif op.op == "delete":
+            deletes.append(op.id)
+        else:
+            values = {"id": op.id}
+            if op.op == "move":
+                values["category_id"] = dest[op.categorySlug]
+            if op.kind is not None:
+                values["kind"] = model.GuideItemKind(op.kind)
+            if op.text is not None:
+                values["text"] = op.text.strip()
+            updates.append(values)
+
+    async with writes.atomic(db):
+        if creates:
+            await db.execute(insert(I), creates)
+        # UPDATE گروهی: یک executemany برای هر ترکیب ستون‌ها (update ORM روی SQLite سطربه‌سطر اجرا می‌شود)
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for values in updates:
+            groups.setdefault(tuple(sorted(values)), []).append({f"b_{k}": v for k, v in values.items()})
+        T = I.__table__
+        for cols, params in groups.items():
+            stmt = update(T).where(T.c.id == bindparam("b_id")).values(
+                {c: bindparam(f"b_{c}") for c in cols if c != "id"}
+            )
+            await db.execute(stmt, params)
+        if deletes:
+            await db.execute(delete(I).where(I.id.in_(deletes)).execution_options(synchronize_session=False))
+        await changes.mark_changed(db, changes.GUIDE)
+        # خروجی از همان ردیف‌هایی که این تراکنش نوشته (قبل از commit)، نه از snapshot حافظه
+        c = (
+            await db.scalars(
+                select(model.GuideCategoryTable)
+                .options(selectinload(model.GuideCategoryTable.items))
+                .where(model.GuideCategoryTable.id == cat_id)
+                .execution_options(populate_existing=True)
+            )
+        ).one()
+    return to_out(c)
+
+# -----------------------------------------------------------------------------
+# UPDATE/DELETE تک‌آیتم (ادمین)
+# -----------------------------------------------------------------------------
 @router.put("/items/{item_id}")
-def update_item(
+async def update_item(
     item_id: int,
     payload: schemas.GuideItemUpdate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     ویرایش یک آیتم:
@@ -249,30 +402,31 @@ def update_item(
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="فقط ادمین می‌تواند ویرایش کند")
 
-    it = db.query(model.GuideItemTable).filter_by(id=item_id).first()
-    if not it:
-        raise HTTPException(status_code=404, detail="آیتم پیدا نشد")
-
+    values = {}
     if payload.kind is not None:
         # تبدیل رشته به Enum مدل (در صورت لزوم)
-        it.kind = model.GuideItemKind(payload.kind)
+        values["kind"] = model.GuideItemKind(payload.kind)
     if payload.text is not None:
-        it.text = payload.text.strip()
+        values["text"] = payload.text.strip()
     if payload.categorySlug:
-        dest = db.query(model.GuideCategoryTable).filter_by(slug=payload.categorySlug).first()
-        if not dest:
+        dest_id = await db.scalar(select(model.GuideCategoryTable.id).filter_by(slug=payload.categorySlug))
+        if dest_id is None:
             raise HTTPException(status_code=404, detail="دستهٔ مقصد پیدا نشد")
-        it.category_id = dest.id
+        values["category_id"] = dest_id
 
-    db.commit()
-    db.refresh(it)
+    # UPDATE ... RETURNING: وضعیت جدید آیتم بدون refresh
+    it = await writes.update_one(db, model.GuideItemTable, item_id, **values)
+    if not it:
+        raise HTTPException(status_code=404, detail="آیتم پیدا نشد")
+    await changes.mark_changed(db, changes.GUIDE)
+    await db.commit()
     return {"id": it.id, "kind": it.kind.value, "text": it.text, "category_id": it.category_id}
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_item(
+async def delete_item(
     item_id: int,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     حذف یک آیتم:
@@ -283,10 +437,8 @@ def delete_item(
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="فقط ادمین می‌تواند حذف کند")
 
-    it = db.query(model.GuideItemTable).filter_by(id=item_id).first()
-    if not it:
+    if await writes.delete_one(db, model.GuideItemTable, item_id) is None:
         raise HTTPException(status_code=404, detail="آیتم پیدا نشد")
-
-    db.delete(it)
-    db.commit()
+    await changes.mark_changed(db, changes.GUIDE)
+    await db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,11 +1,13 @@
 # back/routers/me_router.py
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
 
-from database import get_db
+from database import get_async_db
 from auth import get_current_user
 from model import UserPhotoTable
+import writes
 
 # روترِ ناحیهٔ کاربری (endpoints مربوط به خود کاربر لاگین‌کرده)
 router = APIRouter(prefix="/me", tags=["Me"])
@@ -52,7 +54,7 @@ def _physical_path_from_db(path_str: str) -> Path:
     return abs_p if abs_p.is_absolute() else (BASE_DIR / p)
 
 @router.get("/photos")
-def list_my_photos(db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def list_my_photos(db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
     """
     لیست «عکس‌های من» برای کاربر فعلی.
     - با توجه به اسکیماهای متفاوت، ستون زمان را به‌ترتیب created_at / uploaded_at / id انتخاب می‌کنیم.
@@ -64,11 +66,12 @@ def list_my_photos(db: Session = Depends(get_db), user=Depends(get_current_user)
             or UserPhotoTable.id
 
     rows = (
-        db.query(UserPhotoTable)
-        .filter(UserPhotoTable.user_id == user.id)
-        .order_by(order_col.desc())
-        .all()
-    )
+        await db.scalars(
+            select(UserPhotoTable)
+            .where(UserPhotoTable.user_id == user.id)
+            .order_by(order_col.desc())
+        )
+    ).all()
 
     out = []
     for r in rows:
@@ -86,29 +89,28 @@ def list_my_photos(db: Session = Depends(get_db), user=Depends(get_current_user)
     return out
 
 @router.delete("/photos/{photo_id}", status_code=204)
-def delete_my_photo(photo_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def delete_my_photo(photo_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
     """
     حذف یک عکس از کتابخانهٔ کاربر:
     - فقط عکس‌هایی که مالک‌شان کاربر فعلی است قابل حذف هستند.
     - در صورت وجود فایل فیزیکی روی دیسک، تلاش می‌کنیم آن را نیز پاک کنیم (خطاها نادیده گرفته می‌شوند).
     - در نهایت رکورد دیتابیس حذف می‌شود و 204 برگردانده می‌شود.
     """
-    row = (
-        db.query(UserPhotoTable)
-        .filter(UserPhotoTable.id == photo_id, UserPhotoTable.user_id == user.id)
-        .first()
+    # DELETE ... RETURNING file_path: حذف رکورد و گرفتن مسیر فایل در یک دستور
+    file_path = await writes.delete_one(
+        db, UserPhotoTable,
+        and_(UserPhotoTable.id == photo_id, UserPhotoTable.user_id == user.id),
+        returning=UserPhotoTable.file_path,
     )
-    if not row:
+    if file_path is None:
         raise HTTPException(status_code=404, detail="عکس پیدا نشد.")
+    await db.commit()
 
-    # حذف فایل از دیسک (اگر موجود بود) — خطاهای فایل‌سیستمی عمداً بلعیده می‌شود تا حذف DB انجام شود
+    # حذف فایل از دیسک (اگر موجود بود) — خطاهای فایل‌سیستمی عمداً بلعیده می‌شوند
     try:
-        phys = _physical_path_from_db(str(row.file_path))
+        phys = _physical_path_from_db(str(file_path))
         if phys.exists():
             phys.unlink()
     except Exception:
         pass
-
-    db.delete(row)
-    db.commit()
     return
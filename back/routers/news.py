@@ -1,29 +1,92 @@
-from fastapi import HTTPException, Depends, APIRouter, status, Response
-from sqlalchemy.orm import Session
-from database import get_db
+from pydantic import TypeAdapter
+from fastapi import HTTPException, Depends, APIRouter, status, Request, Response, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 import model, schemas
-from auth import get_current_user
-from typing import List
+from auth import Principal, get_current_claims
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, newest_first, newest_first_cursor, parse_fields
+from typing import List, Optional
+import writes
+import changes, facets, httpcache, respcache
 
 # روتر مربوط به «خبرها»
 # تمام مسیرها با /news شروع می‌شوند.
 router = APIRouter(prefix="/news", tags=["News"])
 
-@router.get("/", response_model=List[schemas.News])
-def get_news(db: Session = Depends(get_db)):
+# سریال‌ساز فهرست (بدنهٔ bytes برای respcache)
+_LIST = TypeAdapter(List[schemas.NewsListItem])
+
+@router.get("/", response_model=List[schemas.NewsListItem], response_model_exclude_unset=True)
+async def get_news(
+    request: Request,
+    category: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="ستون‌های خروجی با کاما، مثلاً title,content (id همیشه)"),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    دریافت فهرست همه خبرها (عمومی).
+    دریافت فهرست خبرها (عمومی)، جدیدترین اول.
     - احراز هویت لازم نیست.
-    - خروجی بر اساس اسکیمای Pydantic «schemas.News» سریالایز می‌شود.
-    نکته: اگر نیاز به ترتیب خاص دارید، می‌توانید .order_by(model.NewsTable.id.desc()) اضافه کنید.
+    - خروجی خلاصه است (schemas.NewsListItem: id, title, summary, category, image, created_at)
+      و content خوانده نمی‌شود؛ ?fields=title,content ستون‌های دلخواه را برمی‌گرداند.
+      متن کامل یک خبر: GET /news/{id}
+    - صفحه‌بندی keyset روی (created_at, id): اگر صفحهٔ بعدی وجود داشته باشد، cursor آن در
+      هدر X-Next-Cursor می‌آید و با ?cursor= فرستاده می‌شود. کلاینت قدیمی (بدون پارامتر)
+      صفحهٔ اول با اندازهٔ پیش‌فرض را می‌گیرد.
+    - category: فیلتر دسته (ایندکس ix_news_category_created_id)
+    - ETag از نسخهٔ تغییر خبرها + query string؛ If-None-Match منطبق → 304 بدون کوئری فهرست
+    - بدنهٔ JSON هر (نسخه، query) در respcache می‌ماند؛ برخورد بعدی بدون کوئری فهرست و سریال‌سازی
+    """
+    ver = await changes.version(db, changes.NEWS)
+    etag = httpcache.make_etag(changes.NEWS, ver.version, request.url.query)
+    if (cached := httpcache.not_modified(request, etag, ver.changed_at)) is not None:
+        return cached
+    if (hit := respcache.get(etag)) is not None:
+        return hit
+    headers = httpcache.validators(etag, ver.changed_at)
+
+    N = model.NewsTable
+    names = parse_fields(fields, N)
+    # فقط ستون‌های لازم (created_at برای cursor)؛ content بدون درخواست صریح خوانده نمی‌شود
+    query = select(*(getattr(N, n) for n in dict.fromkeys([*names, "created_at"])))
+    if category:
+        query = query.where(N.category == category)
+    query = newest_first(query, N.created_at, N.id, cursor)
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = newest_first_cursor(rows[-1].created_at, rows[-1].id)
+    items = _LIST.validate_python([{n: getattr(r, n) for n in names} for r in rows])
+    return respcache.put(etag, changes.NEWS, _LIST.dump_json(items, exclude_unset=True), headers)
+
+@router.get("/facets", response_model=schemas.FacetsOut)
+async def get_news_facets(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
-    return db.query(model.NewsTable).all()
+    تعداد خبرهای هر دسته برای چیپ‌های فیلتر (?category= همین فهرست).
+    - از شمارنده‌های category_count (facets.py) خوانده می‌شود، نه GROUP BY روی کل جدول.
+    - ETag از نسخهٔ تغییر خبرهای (مثل فهرست)؛ پاسخ در respcache
+    """
+    ver = await changes.version(db, changes.NEWS)
+    etag = httpcache.make_etag(changes.NEWS, "facets", ver.version)
+    if (cached := httpcache.not_modified(request, etag, ver.changed_at)) is not None:
+        return cached
+    if (hit := respcache.get(etag)) is not None:
+        return hit
+    f = await facets.counts(db, changes.NEWS)
+    body = schemas.FacetsOut(
+        total=f.total,
+        categories=[schemas.CategoryFacet(category=c, count=n) for c, n in f.categories],
+    )
+    return respcache.put(etag, changes.NEWS, body.model_dump_json().encode(), httpcache.validators(etag, ver.changed_at))
 
 @router.post("/", response_model=schemas.News, status_code=status.HTTP_201_CREATED)
-def create_news(
+async def create_news(
     news: schemas.NewsCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     ایجاد خبر جدید (فقط ادمین).
@@ -36,25 +99,18 @@ def create_news(
             detail="فقط ادمین می‌تواند خبر ایجاد کند",
         )
 
-    db_news = model.NewsTable(
-        title=news.title,
-        summary=news.summary,
-        content=news.content,
-        category=news.category,
-        image=news.image,
-        source=news.source,
-    )
-    db.add(db_news)
-    db.commit()
-    db.refresh(db_news)
+    # INSERT ... RETURNING: id همراه خود دستور برمی‌گردد (بدون refresh)
+    db_news = await writes.insert_one(db, model.NewsTable, **news.model_dump())
+    await changes.mark_changed(db, changes.NEWS)
+    await db.commit()
     return db_news
 
 @router.delete("/{news_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_news(
+async def delete_news(
     news_id: int,
     response: Response,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     حذف یک خبر (فقط ادمین).
@@ -67,31 +123,39 @@ def delete_news(
             detail="فقط ادمین می‌تواند خبر را حذف کند",
         )
 
-    item = db.query(model.NewsTable).filter(model.NewsTable.id == news_id).first()
-    if not item:
+    if await writes.delete_one(db, model.NewsTable, news_id) is None:
         raise HTTPException(status_code=404, detail="خبر پیدا نشد")
-
-    db.delete(item)
-    db.commit()
+    await changes.mark_changed(db, changes.NEWS)
+    await db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.get("/{news_id}", response_model=schemas.News)
-def get_one_news(news_id: int, db: Session = Depends(get_db)):
+async def get_one_news(
+    news_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     دریافت جزئیات یک خبر (عمومی) با شناسه.
     - در صورت نبودن خبر: 404
+    - ETag/Last-Modified از updated_at همان خبر؛ If-None-Match منطبق → 304 بدون سریال‌سازی
     """
-    item = db.query(model.NewsTable).filter(model.NewsTable.id == news_id).first()
+    item = await db.get(model.NewsTable, news_id)
     if not item:
         raise HTTPException(status_code=404, detail="خبر پیدا نشد")
+    etag = httpcache.make_etag(changes.NEWS, item.id, item.updated_at)
+    if (cached := httpcache.not_modified(request, etag, item.updated_at)) is not None:
+        return cached
+    httpcache.apply(response, etag, item.updated_at)
     return item
 
 @router.put("/{news_id}", response_model=schemas.News)
-def update(
+async def update(
     news_id: int,
     payload: schemas.NewsCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     به‌روزرسانی کامل یک خبر (فقط ادمین).
@@ -105,19 +169,10 @@ def update(
             detail="فقط ادمین می‌تواند خبر را ویرایش کند",  # ← پیام تصحیح شد
         )
 
-    item = db.query(model.NewsTable).filter(model.NewsTable.id == news_id).first()
+    # UPDATE ... RETURNING: یک دستور به‌جای SELECT + UPDATE + refresh
+    item = await writes.update_one(db, model.NewsTable, news_id, **payload.model_dump())
     if not item:
         raise HTTPException(status_code=404, detail="خبر پیدا نشد")
-
-    # نکته: قبلاً این خط به‌اشتباه از عملگر مقایسه (==) استفاده می‌کرد.
-    # اینجا باید انتساب انجام شود:
-    item.title = payload.title
-    item.content = payload.content
-    item.summary = payload.summary
-    item.category = payload.category
-    item.image = payload.image
-    item.source = payload.source
-
-    db.commit()
-    db.refresh(item)
+    await changes.mark_changed(db, changes.NEWS)
+    await db.commit()
     return item
@@ -8,17 +8,18 @@
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import model, schemas
-from database import get_db
-from auth import get_current_user
+from database import get_async_db
+from auth import Principal, get_current_claims
+import writes
 
 router = APIRouter(prefix="/notifs", tags=["Notifications"])
 
-def _is_admin(u: model.UserTable) -> bool:
-    """بررسی نقش ادمین روی آبجکت کاربر ORM (ایمنی در برابر نبودن فیلد نقش)."""
+def _is_admin(u: Principal) -> bool:
+    """بررسی نقش ادمین روی کاربر جاری (ایمنی در برابر نبودن فیلد نقش)."""
     return getattr(u, "role", None) == "admin"
 
 
@@ -30,17 +31,17 @@ def _is_admin(u: model.UserTable) -> bool:
 # خروجی با اسکیمای Pydantic: List[schemas.NotificationOut]
 # -------------------------------------------------------------------
 @router.get("", response_model=List[schemas.NotificationOut])
-def list_notifications(
+async def list_notifications(
     only: str = Query("all", pattern="^(all|unread|read)$"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    user: model.UserTable = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_claims),
 ):
     # فقط اعلان‌های «قابل‌مشاهده» برای کاربر: عمومی (user_id IS NULL) یا متعلق به خودش
     q = (
-        db.query(model.Notification)
-        .filter(
+        select(model.Notification)
+        .where(
             or_(
                 model.Notification.user_id == user.id,
                 model.Notification.user_id.is_(None),
@@ -50,22 +51,23 @@ def list_notifications(
 
     # فیلتر خوانده/نخوانده روی همان مجموعه قابل‌مشاهده اعمال می‌شود
     if only == "unread":
-        q = q.filter(
+        q = q.where(
             or_(
                 model.Notification.is_read.is_(False),
                 model.Notification.is_read.is_(None),  # سازگاری عقب‌رو با رکوردهای قدیمی
             )
         )
     elif only == "read":
-        q = q.filter(model.Notification.is_read.is_(True))
+        q = q.where(model.Notification.is_read.is_(True))
 
     # ترتیب: جدیدترین در ابتدا + صفحه‌بندی
     return (
-        q.order_by(model.Notification.created_at.desc())
-         .offset(offset)
-         .limit(limit)
-         .all()
-    )
+        await db.scalars(
+            q.order_by(model.Notification.created_at.desc())
+             .offset(offset)
+             .limit(limit)
+        )
+    ).all()
 
 
 # -------------------------------------------------------------------
@@ -74,23 +76,24 @@ def list_notifications(
 # خروجی: {"unread": <int>}
 # -------------------------------------------------------------------
 @router.get("/unread-count")
-def unread_count(
-    db: Session = Depends(get_db),
-    user: model.UserTable = Depends(get_current_user),
+async def unread_count(
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_claims),
 ):
     cnt = (
-        db.query(func.count(model.Notification.id))
-        .filter(
-            or_(
-                model.Notification.user_id == user.id,
-                model.Notification.user_id.is_(None),
-            ),
-            or_(
-                model.Notification.is_read.is_(False),
-                model.Notification.is_read.is_(None),
-            ),
+        await db.scalar(
+            select(func.count(model.Notification.id))
+            .where(
+                or_(
+                    model.Notification.user_id == user.id,
+                    model.Notification.user_id.is_(None),
+                ),
+                or_(
+                    model.Notification.is_read.is_(False),
+                    model.Notification.is_read.is_(None),
+                ),
+            )
         )
-        .scalar()
         or 0
     )
     return {"unread": cnt}
@@ -103,12 +106,12 @@ def unread_count(
 # در موفقیت 204 بدون بدنه برمی‌گردد.
 # -------------------------------------------------------------------
 @router.patch("/{notif_id}/read", status_code=status.HTTP_204_NO_CONTENT)
-def mark_read_single(
+async def mark_read_single(
     notif_id: int,
-    db: Session = Depends(get_db),
-    user: model.UserTable = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_claims),
 ):
-    notif = db.query(model.Notification).filter(model.Notification.id == notif_id).first()
+    notif = await db.get(model.Notification, notif_id)
     if not notif:
         raise HTTPException(status_code=404, detail="اعلان یافت نشد.")
 
@@ -123,7 +126,7 @@ def mark_read_single(
 
     if not notif.is_read:
         notif.is_read = True
-        db.commit()
+        await db.commit()
     return Response(status_code=204)
 
 
@@ -133,13 +136,13 @@ def mark_read_single(
 # خروجی: {"updated": <int>} تعداد رکوردهای به‌روزشده
 # -------------------------------------------------------------------
 @router.patch("/read-all")
-def mark_read_all(
-    db: Session = Depends(get_db),
-    user: model.UserTable = Depends(get_current_user),
+async def mark_read_all(
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_claims),
 ):
-    updated = (
-        db.query(model.Notification)
-        .filter(
+    result = await db.execute(
+        update(model.Notification)
+        .where(
             or_(
                 model.Notification.user_id == user.id,
                 model.Notification.user_id.is_(None),
@@ -149,10 +152,11 @@ def mark_read_all(
                 model.Notification.is_read.is_(None),
             ),
         )
-        .update({"is_read": True}, synchronize_session=False)
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
     )
-    db.commit()
-    return {"updated": updated}
+    await db.commit()
+    return {"updated": result.rowcount}
 
 
 # -------------------------------------------------------------------
@@ -168,16 +172,17 @@ class NotifCreate(BaseModel):
     user_id: Optional[int] = None     # None => عمومی
 
 @router.post("", response_model=schemas.NotificationOut, status_code=status.HTTP_201_CREATED)
-def create_notification(
+async def create_notification(
     payload: NotifCreate,
-    db: Session = Depends(get_db),
-    user: model.UserTable = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_claims),
 ):
     if not _is_admin(user):
         raise HTTPException(status_code=403, detail="فقط ادمین مجاز است.")
 
     # is_read را صراحتاً False می‌گذاریم تا مقدار NULL ذخیره نشود (سازگاری بهتر)
-    notif = model.Notification(
+    notif = await writes.insert_one(
+        db, model.Notification,
         user_id=payload.user_id,
         type=payload.type or "content",
         title=(payload.title or "").strip(),
@@ -185,9 +190,7 @@ def create_notification(
         link=(payload.link or "").strip() or None,
         is_read=False,
     )
-    db.add(notif)
-    db.commit()
-    db.refresh(notif)
+    await db.commit()
     return notif
 
 
@@ -197,21 +200,22 @@ def create_notification(
 # در موفقیت 204 بدون بدنه برمی‌گردد.
 # -------------------------------------------------------------------
 @router.delete("/{notif_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_notification(
+async def delete_notification(
     notif_id: int,
-    db: Session = Depends(get_db),
-    user: model.UserTable = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_claims),
 ):
-    notif = db.query(model.Notification).filter(model.Notification.id == notif_id).first()
-    if not notif:
-        raise HTTPException(status_code=404, detail="اعلان یافت نشد.")
-
     # مجوز حذف: ادمین => همه؛ کاربر عادی => فقط اعلان‌های user_id == خودش
-    if not _is_admin(user) and notif.user_id != user.id:
+    # (شرط مجوز داخل خود DELETE است؛ فقط در صورت شکست برای تشخیص 404/403 دوباره می‌خوانیم)
+    cond = model.Notification.id == notif_id
+    if not _is_admin(user):
+        cond = and_(cond, model.Notification.user_id == user.id)
+    if await writes.delete_one(db, model.Notification, cond) is None:
+        if await db.get(model.Notification, notif_id) is None:
+            raise HTTPException(status_code=404, detail="اعلان یافت نشد.")
         raise HTTPException(status_code=403, detail="اجازه‌ی حذف ندارید.")
 
-    db.delete(notif)
-    db.commit()
+    await db.commit()
     return Response(status_code=204)
 
 
@@ -221,13 +225,17 @@ def delete_notification(
 # برای یک‌بار مهاجرت/پاک‌سازی داده‌ها؛ در محیط عملیاتی استفاده نکنید مگر با آگاهی.
 # -------------------------------------------------------------------
 @router.post("/_normalize-null-is_read", status_code=204)
-def normalize_null_is_read(
-    db: Session = Depends(get_db),
-    user: model.UserTable = Depends(get_current_user),
+async def normalize_null_is_read(
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_claims),
 ):
     if not _is_admin(user):
         raise HTTPException(403, "فقط ادمین")
-    db.query(model.Notification).filter(model.Notification.is_read.is_(None))\
-      .update({"is_read": False}, synchronize_session=False)
-    db.commit()
+    await db.execute(
+        update(model.Notification)
+        .where(model.Notification.is_read.is_(None))
+        .values(is_read=False)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
     return Response(status_code=204)
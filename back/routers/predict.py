@@ -6,18 +6,23 @@
 #  - هر دو مسیر /predict و /predict/ پشتیبانی می‌شود.
 #  - لاگ و متن خطای TF-Serving در پاسخ 502 برگردانده می‌شود تا عیب‌یابی آسان شود.
 #  - اندازه ورودی پیش‌فرض 224x224 (VGG16) است؛ در صورت تفاوت، IMG_SIZE را تغییر دهید.
+#  - با advice=true خلاصهٔ راهنمای تفکیک کلاس پیش‌بینی‌شده (بله/نه/آماده‌سازی) هم در پاسخ می‌آید
+#    (از snapshot حافظهٔ guidecache؛ بدون کوئری و بدون درخواست دوم به /guide/{slug}).
+#  - /predict/stream (WebSocket) برای دوربین کیوسک: فقط تازه‌ترین فریم طبقه‌بندی می‌شود
+#    و فریم‌های کهنه دور ریخته می‌شوند (صف نمی‌شوند).
 
 from typing import Optional, Tuple
 import os
+import time
 import uuid
+import asyncio
 import inspect
 import logging
-from io import BytesIO
 from pathlib import Path
 
 import numpy as np
 import requests
-from PIL import Image
+from requests.adapters import HTTPAdapter
 from fastapi import (
     APIRouter,
     Depends,
@@ -27,14 +32,20 @@ from fastapi import (
     Request,
     Security,
     UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
 )
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
-from tensorflow.keras.applications.vgg16 import preprocess_input
+from sqlalchemy.ext.asyncio import AsyncSession
 
+import guidecache
 from auth import get_current_user
-from database import get_db
+from database import get_async_db
 from model import UserPhotoTable
+from preprocess import PoolExhausted, PreprocessEngine
+import writes
 
 # ---------------------- تنظیمات و ثوابت ----------------------
 
@@ -48,6 +59,14 @@ PREDICT_URL = f"{TF_SERVING_URL}/v1/models/{MODEL_NAME}:predict"
 # برچسب‌های کلاس خروجی (ترتیب باید با آموزش یکسان باشد)
 CLASS_NAMES = ["cardboard", "glass", "metal", "paper", "plastic", "trash"]
 
+# کلاس مدل → slug دستهٔ راهنما؛ کلاسی که اینجا نیست به دسته‌ای با همان slug می‌رود.
+# از ENV قابل تغییر: PREDICT_GUIDE_SLUGS="cardboard=paper,trash=general"
+PREDICT_GUIDE_SLUGS = {"cardboard": "paper"}
+PREDICT_GUIDE_SLUGS.update(
+    pair.split("=", 1) for pair in os.getenv("PREDICT_GUIDE_SLUGS", "").replace(" ", "").split(",") if "=" in pair
+)
+CLASS_GUIDE_SLUGS = {c: PREDICT_GUIDE_SLUGS.get(c, c) for c in CLASS_NAMES}
+
 # اندازه ورودی مدل (VGG16 استاندارد: 224x224)
 IMG_SIZE: Tuple[int, int] = (256, 256)
 
@@ -55,6 +74,19 @@ IMG_SIZE: Tuple[int, int] = (256, 256)
 BASE_DIR = Path(__file__).resolve().parents[1]  # پوشه back/
 UPLOADS_DIR = BASE_DIR / "uploads"
 
+# کلاینت مدل با connection pool مشترک (به‌جای باز کردن اتصال TCP تازه در هر درخواست)
+MODEL_POOL_SIZE = int(os.getenv("MODEL_POOL_SIZE", "8"))
+MODEL_TIMEOUT = float(os.getenv("MODEL_TIMEOUT", "120"))
+_model_client = requests.Session()
+_model_client.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=MODEL_POOL_SIZE))
+_model_client.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MODEL_POOL_SIZE))
+
+# حداکثر اندازهٔ یک فریم JPEG در استریم (بایت)
+STREAM_MAX_FRAME_BYTES = int(os.getenv("STREAM_MAX_FRAME_BYTES", str(2 * 1024 * 1024)))
+
+# موتور پیش‌پردازش با استخر بافر (اندازهٔ استخر = PREDICT_CONCURRENCY)
+_engine = PreprocessEngine(IMG_SIZE)
+
 # امنیت (Bearer اختیاری)
 _bearer = HTTPBearer(auto_error=False)
 
@@ -67,7 +99,7 @@ logger = logging.getLogger(__name__)
 async def get_current_user_optional(
     request: Request,
     creds: Optional[HTTPAuthorizationCredentials] = Security(_bearer),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     احراز هویت اختیاری:
@@ -94,19 +126,103 @@ async def get_current_user_optional(
         return None
 
 
-def _read_image(data: bytes) -> np.ndarray:
+def _call_model(body: bytes) -> np.ndarray:
     """
-    تبدیل بایت‌های تصویر به آرایه NumPy با اندازه ثابت و سه‌کاناله RGB
-    سپس اعمال preprocess_input مخصوص VGG16.
-    خروجی: float32 با شکل (H, W, 3)
+    ارسال بدنهٔ آمادهٔ درخواست (encode_instances) به TF-Serving از طریق کلاینت مشترک و
+    برگرداندن بردار احتمال. خطاهای سرویس مدل به HTTPException (502/504) تبدیل می‌شوند.
     """
     try:
-        image = Image.open(BytesIO(data)).convert("RGB").resize(IMG_SIZE)
-    except Exception as e:
+        # تایم‌اوت بالا (inference نخستین بار کمی طولانی‌تر است)
+        resp = _model_client.post(
+            PREDICT_URL,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=MODEL_TIMEOUT,
+        )
+    except requests.Timeout:
+        raise HTTPException(status_code=504, detail="Timeout هنگام فراخوانی سرویس مدل.")
+
+    if not resp.ok:
+        # متن خطای TF-Serving را هم لاگ و هم به کلاینت می‌دهیم برای عیب‌یابی
+        logger.warning("TF-Serving error %s: %s", resp.status_code, resp.text[:500])
+        raise HTTPException(
+            status_code=502,
+            detail=f"Model server error {resp.status_code}: {resp.text}"
+        )
+
+    data = resp.json()
+    arr = data.get("predictions") or data.get("outputs")
+    if arr is None:
+        raise HTTPException(status_code=502, detail=f"Unexpected TF Serving response: {data}")
+    return np.array(arr[0], dtype=np.float32)
+
+
+def _classify(data: bytes) -> Tuple[str, float]:
+    """
+    پیش‌پردازش داخل یک بافر از استخر + فراخوانی مدل (بلاک‌کننده؛ در threadpool اجرا شود).
+    بافر بلافاصله پس از ساخته شدن بدنهٔ درخواست مدل به استخر برمی‌گردد؛ رفت‌وبرگشت HTTP
+    مدل (تا MODEL_TIMEOUT) بیرون از بلوک است و بافری نگه نمی‌دارد.
+    """
+    try:
+        with _engine.preprocess(data) as image:  # (H,W,3) float32
+            body = _engine.encode_instances(image)  # شکل [1,H,W,3]
+    except PoolExhausted:
+        raise HTTPException(status_code=503, detail="سرویس پیش‌بینی مشغول است؛ کمی بعد دوباره تلاش کنید.")
+    except (OSError, ValueError, SyntaxError) as e:
+        # خطاهای PIL هنگام باز کردن/دیکود تصویر
         raise HTTPException(status_code=400, detail=f"فایل تصویر نامعتبر است: {e}")
-    arr = np.asarray(image, dtype=np.float32)
-    arr = preprocess_input(arr)  # مطابق VGG16
-    return arr
+    return _top_class(_call_model(body))
+
+
+def _top_class(prediction: np.ndarray) -> Tuple[str, float]:
+    """استخراج برچسب کلاس و میزان اعتماد از بردار خروجی مدل."""
+    idx = int(np.argmax(prediction))
+    predicted_cls = CLASS_NAMES[idx] if 0 <= idx < len(CLASS_NAMES) else str(idx)
+    return predicted_cls, float(np.max(prediction))
+
+
+async def _guide_advice(predicted_cls: str):
+    """خلاصهٔ راهنمای کلاس پیش‌بینی‌شده از snapshot فعلی راهنما؛ None اگر دسته‌ای متناظر نباشد."""
+    slug = CLASS_GUIDE_SLUGS.get(predicted_cls, predicted_cls)
+    return (await guidecache.fresh()).advice.get(slug)
+
+
+class _LatestFrame:
+    """
+    خانهٔ تک‌ظرفیتی برای استریم: فریم جدید جای فریمِ هنوز پردازش‌نشده را می‌گیرد.
+    به این ترتیب حافظهٔ هر اتصال حداکثر یک فریم است و شبکهٔ کند صف نمی‌سازد.
+    (همه‌چیز روی یک event loop اجرا می‌شود؛ قفل لازم نیست.)
+    """
+
+    def __init__(self):
+        self._data: Optional[bytes] = None
+        self._received_at = 0.0
+        self._event = asyncio.Event()
+        self.seq = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, data: bytes) -> None:
+        if self._data is not None:
+            self.dropped += 1
+        self._data = data
+        self._received_at = time.perf_counter()
+        self.seq += 1
+        self._event.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._event.set()
+
+    async def take(self) -> Optional[Tuple[int, bytes, float]]:
+        """منتظر فریم بعدی می‌ماند؛ پس از بسته‌شدن اتصال None برمی‌گرداند."""
+        while self._data is None:
+            if self.closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        data, self._data = self._data, None
+        return self.seq, data, self._received_at
 
 
 def _save_user_file(user_id: int, filename: str, data: bytes) -> Tuple[str, int]:
@@ -134,7 +250,8 @@ def _save_user_file(user_id: int, filename: str, data: bytes) -> Tuple[str, int]
 async def predict(
     file: UploadFile = File(...),      # تصویر (الزامی)
     save: bool = Form(False),          # ذخیره‌ی نتیجه و فایل در صورت ورود
-    db: Session = Depends(get_db),
+    advice: bool = Form(False),        # افزودن خلاصهٔ راهنمای تفکیک کلاس به پاسخ
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user_optional),
 ):
     # ۱) خواندن فایل
@@ -142,41 +259,15 @@ async def predict(
     if not raw:
         raise HTTPException(status_code=400, detail="فایل خالی یا نامعتبر است.")
 
-    # ۲) پیش‌پردازش و تماس با سرویس مدل
+    # ۲) پیش‌پردازش و تماس با سرویس مدل (خارج از event loop) + ۳) استخراج کلاس و اعتماد
     try:
-        image = _read_image(raw)  # (H,W,3) float32
-        payload = {"instances": [image.tolist()]}  # شکل [1,H,W,3]
-
-        # تایم‌اوت بالا (inference نخستین بار کمی طولانی‌تر است)
-        resp = requests.post(PREDICT_URL, json=payload, timeout=120)
-
-        if not resp.ok:
-            # متن خطای TF-Serving را هم لاگ و هم به کلاینت می‌دهیم برای عیب‌یابی
-            logger.warning("TF-Serving error %s: %s", resp.status_code, resp.text[:500])
-            raise HTTPException(
-                status_code=502,
-                detail=f"Model server error {resp.status_code}: {resp.text}"
-            )
-
-        data = resp.json()
-        arr = data.get("predictions") or data.get("outputs")
-        if arr is None:
-            raise HTTPException(status_code=502, detail=f"Unexpected TF Serving response: {data}")
-        prediction = np.array(arr[0], dtype=np.float32)
-
+        predicted_cls, confidence = await run_in_threadpool(_classify, raw)
     except HTTPException:
         raise
-    except requests.Timeout:
-        raise HTTPException(status_code=504, detail="Timeout هنگام فراخوانی سرویس مدل.")
     except Exception as e:
         logger.exception("predict failed")
         raise HTTPException(status_code=500, detail=f"خطا در پردازش تصویر/مدل: {e}")
 
-    # ۳) استخراج کلاس و اعتماد
-    idx = int(np.argmax(prediction))
-    predicted_cls = CLASS_NAMES[idx] if 0 <= idx < len(CLASS_NAMES) else str(idx)
-    confidence = float(np.max(prediction))
-
     result = {
         "class": predicted_cls,
         "confidence": confidence,
@@ -184,13 +275,16 @@ async def predict(
         "url": None,
         "saved": False,
     }
+    if advice:
+        result["advice"] = await _guide_advice(predicted_cls)
 
     # ۴) ذخیره‌ی اختیاری (نیازمند ورود)
     if save:
         if current_user is None:
             raise HTTPException(status_code=401, detail="برای ذخیره باید وارد شوید.")
-        public_url, size = _save_user_file(current_user.id, file.filename or "image.jpg", raw)
-        row = UserPhotoTable(
+        public_url, size = await run_in_threadpool(_save_user_file, current_user.id, file.filename or "image.jpg", raw)
+        row = await writes.insert_one(
+            db, UserPhotoTable,
             user_id=current_user.id,
             file_path=public_url.lstrip("/"),
             mime=file.content_type or "",
@@ -199,14 +293,95 @@ async def predict(
             predicted_class=predicted_cls,
             confidence=confidence,
         )
-        db.add(row)
-        db.commit()
-        db.refresh(row)
+        await db.commit()
         result.update({"photo_id": row.id, "url": public_url, "saved": True})
 
     return result
 
 
+@router.websocket("/stream")
+async def predict_stream(websocket: WebSocket, advice: bool = False):
+    """
+    طبقه‌بندی بلادرنگ فریم‌های دوربین:
+      - کلاینت فریم‌های JPEG را به‌صورت پیام باینری می‌فرستد.
+      - سرور همیشه فقط تازه‌ترین فریم را پردازش می‌کند؛ فریم‌هایی که در این فاصله
+        رسیده‌اند دور ریخته می‌شوند (dropped).
+      - برای هر فریم پردازش‌شده: {"frame", "class", "confidence", "latency_ms", "model_ms", "dropped"}
+      - خطای یک فریم (تصویر خراب/خطای مدل) به‌صورت {"frame", "error", "status"} فرستاده
+        می‌شود و اتصال باز می‌ماند.
+      - با ?advice=true هر نتیجه کلید "advice" (خلاصهٔ راهنمای تفکیک، مثل POST /predict) هم دارد.
+    """
+    await websocket.accept()
+    latest = _LatestFrame()
+    send_lock = asyncio.Lock()
+
+    async def send(payload: dict) -> None:
+        # receiver (پاسخ 413) و worker هم‌زمان می‌فرستند؛ send_json هم‌زمان روی یک WebSocket امن نیست
+        async with send_lock:
+            await websocket.send_json(payload)
+
+    def classify(data: bytes) -> Tuple[str, float, float]:
+        # بافر پیش‌پردازش از همان استخر مشترک با POST /predict گرفته می‌شود
+        started = time.perf_counter()
+        predicted_cls, confidence = _classify(data)
+        return predicted_cls, confidence, (time.perf_counter() - started) * 1000
+
+    async def receiver():
+        try:
+            while True:
+                msg = await websocket.receive()
+                if msg["type"] == "websocket.disconnect":
+                    break
+                data = msg.get("bytes")
+                if not data:
+                    continue  # پیام متنی (مثلاً ping) نادیده گرفته می‌شود
+                if len(data) > STREAM_MAX_FRAME_BYTES:
+                    await send({"error": "فریم بیش از حد بزرگ است.", "status": 413})
+                    continue
+                latest.put(data)
+        finally:
+            latest.close()
+
+    async def worker():
+        while True:
+            frame = await latest.take()
+            if frame is None:
+                return
+            seq, data, received_at = frame
+            try:
+                predicted_cls, confidence, model_ms = await run_in_threadpool(classify, data)
+            except HTTPException as e:
+                await send({"frame": seq, "error": e.detail, "status": e.status_code})
+                continue
+            except Exception as e:
+                logger.exception("stream predict failed")
+                await send({"frame": seq, "error": str(e), "status": 500})
+                continue
+            await send({
+                "frame": seq,
+                "class": predicted_cls,
+                "confidence": confidence,
+                "latency_ms": round((time.perf_counter() - received_at) * 1000, 2),
+                "model_ms": round(model_ms, 2),
+                "dropped": latest.dropped,
+                **({"advice": jsonable_encoder(await _guide_advice(predicted_cls))} if advice else {}),
+            })
+
+    recv_task = asyncio.create_task(receiver())
+    work_task = asyncio.create_task(worker())
+    try:
+        done, _ = await asyncio.wait({recv_task, work_task}, return_when=asyncio.FIRST_COMPLETED)
+        if work_task in done:
+            work_task.result()  # خطای ارسال (مثلاً قطع اتصال) را بالا بیاور
+        else:
+            await work_task     # پس از قطع، آخرین فریم در حال پردازش تمام شود
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        for t in (recv_task, work_task):
+            t.cancel()
+
+
 @router.get("/_config")
 def debug_config():
     """
@@ -217,4 +392,8 @@ def debug_config():
         "model_name": MODEL_NAME,
         "predict_url": PREDICT_URL,
         "img_size": IMG_SIZE,
+        "class_guide_slugs": CLASS_GUIDE_SLUGS,
+        "model_pool_size": MODEL_POOL_SIZE,
+        "buffer_pool": {"size": _engine.pool.size, "available": _engine.pool.available},
+        "stream_max_frame_bytes": STREAM_MAX_FRAME_BYTES,
     }
@@ -0,0 +1,60 @@
+# routers/search.py
+# -----------------------------------------------------------------------------
+# روتر «جستجو» (عمومی)
+# - GET /search?q=...&type=news,articles,guide&limit=20&cursor=...
+# - منطق نمایه/رتبه‌بندی در search.py است (FTS5 روی SQLite، LIKE روی بقیه).
+# - صفحه‌بندی: cursor صفحهٔ بعد در هدر X-Next-Cursor (مثل فهرست خبرها)؛ چون نتایج بر اساس
+#   رتبه مرتب‌اند، cursor همان offset است و تا search.SEARCH_MAX_OFFSET مجاز است.
+# -----------------------------------------------------------------------------
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+import schemas
+import search
+from database import get_async_db
+from pagination import decode_cursor, encode_cursor
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+@router.get("", response_model=List[schemas.SearchHit])
+@router.get("/", response_model=List[schemas.SearchHit])
+async def search_all(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="عبارت جستجو (فارسی/انگلیسی)"),
+    type: Optional[str] = Query(None, description="محدود به منابع: news,articles,guide"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    جستجوی متن کامل در خبرها، مقالات و آیتم‌های راهنما.
+    - واژه‌ها با AND و به‌صورت پیشوندی تطبیق داده می‌شوند («بطری» → «بطری‌ها»).
+    - ی/ک عربی، نیم‌فاصله، اعراب و ارقام فارسی در عبارت و متن یکسان می‌شوند.
+    - عبارت بدون واژهٔ قابل جستجو (مثلاً فقط علامت) → فهرست خالی.
+    """
+    # type خالی یا فقط ویرگول/فاصله (مثلاً "?type=,") = بدون فیلتر، مثل نبودن type
+    kinds = tuple(dict.fromkeys(t.strip() for t in (type or "").split(",") if t.strip())) or search.KINDS
+    bad = [k for k in kinds if k not in search.KINDS]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"نوع نامعتبر: {', '.join(bad)}")
+
+    after = decode_cursor(cursor, "o")
+    try:
+        offset = int(after["o"]) if after else 0
+    except (TypeError, ValueError):
+        offset = -1
+    if not 0 <= offset <= search.SEARCH_MAX_OFFSET:
+        raise HTTPException(status_code=400, detail="cursor نامعتبر است")
+
+    hits = await search.search(db, q, kinds, limit + 1, offset)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        if offset + limit <= search.SEARCH_MAX_OFFSET:
+            response.headers["X-Next-Cursor"] = encode_cursor({"o": offset + limit})
+    return hits
@@ -0,0 +1,59 @@
+# routers/sync.py
+# -----------------------------------------------------------------------------
+# روتر «همگام‌سازی» برای اپ موبایل آفلاین (عمومی)
+# - GET /sync              : نسخهٔ کامل خبرها، مقالات و راهنما (صفحه‌به‌صفحه با has_more)
+# - GET /sync?since=<token>: فقط ردیف‌های درج/ویرایش‌شده و idهای حذف‌شده بعد از آن توکن
+# - منطق فید (sync_log، تریگرها، tombstoneها) در sync.py است.
+# - توکن مات است (مثل cursor فهرست‌ها): seq آخرین تغییر دیده‌شده + زمان صدور؛ توکنی قدیمی‌تر از
+#   نگهداری tombstoneها (sync.SYNC_TOMBSTONE_DAYS) → 410 و کلاینت باید بدون since از نو بگیرد.
+# -----------------------------------------------------------------------------
+
+from datetime import datetime
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import schemas
+import sync
+from database import get_async_db
+from pagination import decode_cursor, encode_cursor
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+def _since(token: Optional[str]) -> int:
+    key = decode_cursor(token, "s", "t")
+    if key is None:
+        return 0
+    try:
+        seq, issued = int(key["s"]), datetime.utcfromtimestamp(int(key["t"]))
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise HTTPException(status_code=400, detail="توکن همگام‌سازی نامعتبر است")
+    if issued < sync.tombstone_cutoff():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="توکن همگام‌سازی منقضی شده است؛ بدون since از نو دریافت کنید",
+        )
+    return seq
+
+
+@router.get("", response_model=schemas.SyncOut)
+@router.get("/", response_model=schemas.SyncOut)
+async def get_changes(
+    since: Optional[str] = Query(None, description="token پاسخ قبلی؛ خالی = نسخهٔ کامل"),
+    limit: int = Query(sync.SYNC_DEFAULT_LIMIT, ge=1, le=sync.SYNC_MAX_LIMIT, description="حداکثر تغییر در این پاسخ"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    تغییرات محتوای عمومی از آخرین همگام‌سازی.
+    - ردیف‌ها کامل (با content) برمی‌گردند تا اپ بدون اینترنت کار کند.
+    - اگر has_more=true بود، بلافاصله با token همین پاسخ دوباره بخوانید.
+    - پاسخ بدون تغییر: فهرست‌های خالی؛ token تازه را برای دفعهٔ بعد نگه دارید.
+    """
+    if not sync.SYNC_ENABLED:
+        raise HTTPException(status_code=503, detail="همگام‌سازی روی این دیتابیس فعال نیست")
+    d = await sync.delta(db, _since(since), limit)
+    token = encode_cursor({"s": d.seq, "t": int(time.time())})
+    return schemas.SyncOut(token=token, has_more=d.has_more, deleted=d.deleted, **d.rows)
@@ -1,9 +1,11 @@
 # routers/users.py
 # -----------------------------------------------
 # روتر «Users»:
+#  - /users/                : فهرست کاربران برای ادمین (جستجوی پیشوندی، فیلتر نقش، صفحه‌بندی keyset)
 #  - /users/check           : بررسی تکراری‌بودن ایمیل/نام‌کاربری
 #  - /users/signup          : ثبت‌نام (بدون تأیید ایمیل؛ نقش پیش‌فرض user)
-#  - /users/login           : ورود و دریافت توکن JWT
+#  - /users/login           : ورود و دریافت توکن JWT (access + refresh)
+#  - /users/refresh         : گرفتن access token تازه با refresh token
 #  - /users/me              : دریافت پروفایل کاربرِ جاری
 #  - /users/{id}/role       : تغییر نقش با شناسه (ادمین فقط)
 #  - /users/by-email/{}/role: تغییر نقش با ایمیل (ادمین فقط)
@@ -14,25 +16,37 @@
 #    اسکیمای جدا تعریف کنید اما برای سادگی همین کافی است.
 #  * ثبت‌نام ایمیل را هم در username و هم در email ذخیره می‌کند تا ورود با هر کدام کار کند.
 #  * تغییر نقش نیازمند نقش ادمین است (get_current_user + بررسی role).
+#  * get_current_user یک Principal سبک و کش‌شده برمی‌گرداند؛ تغییر نقش ورودی کش را باطل می‌کند.
+#  * signup/login هش bcrypt را در process pool اختصاصی (hashing.pool) اجرا می‌کنند؛
+#    اگر صف آن پر باشد فوراً 503 برمی‌گردد.
+#  * همهٔ اندپوینت‌ها async هستند و با AsyncSession (get_async_db) کار می‌کنند.
+#  * check/signup/login با token bucket (ratelimit.py) بر اساس IP و نام کاربری محدود می‌شوند (429).
+#  * جستجوی ایمیل (ورود/بررسی/تغییر نقش) روی lower(email) است تا از ایندکس عبارتی
+#    ix_user_email_lower استفاده شود؛ ورود اول username (یکتا) و بعد ایمیل را جدا جستجو می‌کند.
 #  * مدت اعتبار توکن از ACCESS_TOKEN_EXPIRE_MINUTES خوانده می‌شود.
+#  * access token ادعاهای امضاشدهٔ uid/role دارد؛ تغییر نقش توکن‌های قبلی کاربر را باطل می‌کند
+#    (auth.revoke_user_tokens) و کلاینت با refresh token نقش جدید را می‌گیرد.
 # -----------------------------------------------
 
-from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
+import hashing
 import model, schemas
-from database import get_db
+import ratelimit
+from database import get_async_db
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, prefix_upper_bound
 from auth import (
-    get_password_hash, verify_password, create_access_token,
-    get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_user_tokens, decode_refresh_token, revoke_user_tokens,
+    get_current_user, get_current_claims, get_admin_user, get_principal, invalidate_principal, Principal,
 )
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-def _user_out(u: model.UserTable) -> schemas.UserOut:
+def _user_out(u: model.UserTable | Principal) -> schemas.UserOut:
     """
     مبدل ORM → اسکیمای خروجی (UserOut).
     این‌جا نگاشت فیلدهای snake_case مدل به کلیدهای camelCase خروجی انجام می‌شود.
@@ -46,15 +60,42 @@ def _user_out(u: model.UserTable) -> schemas.UserOut:
     )
 
 
-def _ensure_admin(current: model.UserTable):
+async def _hash_call(fn, *args):
+    """اجرای تابع bcrypt در process pool؛ صف پر → 503 با Retry-After."""
+    try:
+        return await hashing.pool.run(fn, *args)
+    except hashing.HashPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="سرور مشغول است؛ لطفاً چند لحظه بعد دوباره تلاش کنید",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def _find_by_login(db: AsyncSession, q: str, *columns) -> model.UserTable | None:
+    """
+    جستجوی کاربر با username یا ایمیل (q باید trim/lower شده باشد).
+    به‌جای or_ روی دو ستون، دو جستجوی نقطه‌ای جدا انجام می‌شود: اول username (ایندکس یکتا)،
+    بعد lower(email) (ایندکس ix_user_email_lower). columns: فقط همین ستون‌ها را بخوان.
+    """
+    U = model.UserTable
+    stmt = select(*columns) if columns else select(U)
+    for cond in (U.username == q, func.lower(U.email) == q):
+        row = (await db.execute(stmt.where(cond).limit(1))).first()
+        if row is not None:
+            return row if columns else row[0]
+    return None
+
+
+def _ensure_admin(current: Principal):
     """گارد ساده: فقط ادمین اجازه‌ی عملیات مدیریتی دارد."""
     if current.role != "admin":
         raise HTTPException(status_code=403, detail="فقط ادمین مجاز است")
 
 
 # ---------- Check (optional) ----------
-@router.get("/check")
-def check_email(email: str = Query(..., min_length=3), db: Session = Depends(get_db)):
+@router.get("/check", dependencies=[Depends(ratelimit.limit("check", "email"))])
+async def check_email(email: str = Query(..., min_length=3), db: AsyncSession = Depends(get_async_db)):
     """
     بررسی در دسترس بودن ایمیل/نام‌کاربری.
     - ورودی: ?email=user@example.com
@@ -64,20 +105,70 @@ def check_email(email: str = Query(..., min_length=3), db: Session = Depends(get
     q = (email or "").strip().lower()
     if "@" not in q:
         raise HTTPException(400, detail="ایمیل نامعتبر است")
-    exists = (
-        db.query(model.UserTable)
-        .filter(or_(model.UserTable.username == q, model.UserTable.email == q))
-        .first()
-    )
+    exists = await _find_by_login(db, q, model.UserTable.id)
     return {"available": not bool(exists)}
 
 
+# ---------- Directory (ادمین-فقط) ----------
+@router.get("/", response_model=schemas.UserPage)
+async def list_users(
+    q: Optional[str] = Query(None, max_length=120, description="پیشوند ایمیل یا نام نمایشی"),
+    role: Optional[schemas.Role] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: Principal = Depends(get_admin_user),
+):
+    """
+    فهرست کاربران برای ادمین.
+    - q: جستجوی پیشوندی روی lower(email) و lower(display_name) (بازهٔ >= / < روی ایندکس‌های عبارتی)
+    - role: فیلتر نقش (ایندکس ix_user_role_id)
+    - صفحه‌بندی keyset بر اساس id: nextCursor صفحهٔ قبل را در ?cursor= بفرستید.
+    """
+    U = model.UserTable
+    query = select(U.id, U.username, U.role, U.display_name, U.email, U.avatar_url)
+
+    prefix = (q or "").strip().lower()
+    if prefix:
+        upper = prefix_upper_bound(prefix)
+        email_l, name_l = func.lower(U.email), func.lower(U.display_name)
+        query = query.where(or_(
+            and_(email_l >= prefix, email_l < upper),
+            and_(name_l >= prefix, name_l < upper),
+        ))
+    if role:
+        query = query.where(U.role == role)
+
+    after = decode_cursor(cursor, "id")
+    if after is not None:
+        query = query.where(U.id > after["id"])
+
+    rows = (await db.execute(query.order_by(U.id).limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return schemas.UserPage(
+        items=[
+            schemas.UserAdminOut(
+                id=r.id, username=r.username, role=r.role or "user",
+                displayName=r.display_name, email=r.email, avatarUrl=r.avatar_url,
+            )
+            for r in rows
+        ],
+        nextCursor=encode_cursor({"id": rows[-1].id}) if has_more else None,
+    )
+
+
 # ---------- Signup (بدون تأیید ایمیل) ----------
-@router.post("/signup", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
-def signup(payload: schemas.UserCreate, db: Session = Depends(get_db)):
+@router.post(
+    "/signup",
+    response_model=schemas.UserOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(ratelimit.limit("signup", "username"))],
+)
+async def signup(payload: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     ثبت‌نام کاربر جدید.
-    - رمز با bcrypt هش می‌شود.
+    - رمز با bcrypt (در process pool اختصاصی) هش می‌شود.
     - ایمیل هم در username و هم در email ذخیره می‌شود تا ورود با هر دو ممکن باشد.
     - تأیید ایمیل در این نسخه غیرفعال است (email_verified=True).
     """
@@ -85,11 +176,7 @@ def signup(payload: schemas.UserCreate, db: Session = Depends(get_db)):
     if not username or not payload.password:
         raise HTTPException(400, detail="ایمیل و کلمه عبور الزامی است")
 
-    exists = (
-        db.query(model.UserTable)
-        .filter(or_(model.UserTable.username == username, model.UserTable.email == username))
-        .first()
-    )
+    exists = await _find_by_login(db, username)
     if exists:
         raise HTTPException(400, detail="این ایمیل/نام کاربری قبلاً ثبت شده است")
 
@@ -99,41 +186,65 @@ def signup(payload: schemas.UserCreate, db: Session = Depends(get_db)):
     user = model.UserTable(
         username=username,
         email=username,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=await _hash_call(hashing.hash_password, payload.password),
         role=role,
     )
+
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     return _user_out(user)
 
 
 # ---------- Login ----------
-@router.post("/login", response_model=schemas.Token)
-def login(payload: schemas.UserCreate, db: Session = Depends(get_db)):
+@router.post(
+    "/login",
+    response_model=schemas.Token,
+    dependencies=[Depends(ratelimit.limit("login", "username"))],
+)
+async def login(payload: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     ورود با username/email و password:
-    - جستجو با or_(username==q, email==q)
-    - اعتبارسنجی رمز با verify_password (bcrypt)
-    - ساخت JWT با subject=username و انقضاء ACCESS_TOKEN_EXPIRE_MINUTES
+    - جستجو با username و سپس lower(email) (هر دو روی ایندکس)
+    - اعتبارسنجی رمز با verify_and_update (bcrypt در process pool)
+    - اگر BCRYPT_ROUNDS عوض شده باشد، هش کاربر بی‌صدا با ضریب جدید ذخیره می‌شود
+    - ساخت JWT با subject=username، ادعاهای uid/role و انقضاء ACCESS_TOKEN_EXPIRE_MINUTES
+      به‌همراه refresh token
     """
     q = (payload.username or "").strip().lower()
-    user = (
-        db.query(model.UserTable)
-        .filter(or_(model.UserTable.username == q, model.UserTable.email == q))
-        .first()
-    )
-    if not user or not verify_password(payload.password or "", user.hashed_password):
+    user = await _find_by_login(db, q)
+    if not user:
         raise HTTPException(status_code=401, detail="ایمیل/نام کاربری یا رمز نادرست است")
 
-    expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    token = create_access_token(data={"sub": user.username}, expires_delta=expires)
-    return schemas.Token(access_token=token, token_type="bearer")
+    ok, new_hash = await _hash_call(hashing.verify_and_update, payload.password or "", user.hashed_password)
+    if not ok:
+        raise HTTPException(status_code=401, detail="ایمیل/نام کاربری یا رمز نادرست است")
+
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    return schemas.Token(**create_user_tokens(user))
+
+
+# ---------- Refresh ----------
+@router.post("/refresh", response_model=schemas.Token)
+async def refresh(payload: schemas.RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    صدور access token تازه با نقش فعلی کاربر در DB.
+    - refresh token معتبر (typ=refresh) لازم است.
+    - refresh token جدید هم صادر می‌شود (چرخشی)؛ قبلی تا انقضا معتبر می‌ماند.
+    """
+    claims = decode_refresh_token(payload.refresh_token)
+    invalidate_principal(claims["sub"])  # نقش را حتماً از DB بخوان
+    user = await get_principal(db, claims["sub"])
+    if user is None or user.id != claims["uid"]:
+        raise HTTPException(status_code=401, detail="کاربر پیدا نشد")
+    return schemas.Token(**create_user_tokens(user))
 
 
 # ---------- Me ----------
 @router.get("/me", response_model=schemas.UserOut)
-def read_me(current_user: model.UserTable = Depends(get_current_user)):
+async def read_me(current_user: Principal = Depends(get_current_user)):
     """اطلاعات کاربر جاری بر اساس توکن Bearer."""
     return _user_out(current_user)
 
@@ -144,11 +255,11 @@ def read_me(current_user: model.UserTable = Depends(get_current_user)):
 
 # با "شناسه کاربر"
 @router.patch("/{user_id}/role", response_model=schemas.UserOut)
-def change_role_by_id(
+async def change_role_by_id(
     user_id: int,
     payload: schemas.RoleUpdate,
-    db: Session = Depends(get_db),
-    current_user: model.UserTable = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     تغییر نقش کاربر با id.
@@ -157,41 +268,45 @@ def change_role_by_id(
     """
     _ensure_admin(current_user)
 
-    user = db.query(model.UserTable).filter(model.UserTable.id == user_id).first()
+    user = await db.get(model.UserTable, user_id)
     if not user:
         raise HTTPException(404, detail="کاربر پیدا نشد")
 
     if user.role != payload.role:
         user.role = payload.role
-        db.commit()
-        db.refresh(user)
+        await revoke_user_tokens(db, user.id)  # توکن‌های قبلی با نقش قدیمی دیگر پذیرفته نمی‌شوند
+        await db.commit()  # user در حافظه به‌روز است (expire_on_commit=False)؛ refresh لازم نیست
+        invalidate_principal(user.username)  # نقش جدید از درخواست بعدی اعمال شود
 
     return _user_out(user)
 
 
 # با "ایمیل کاربر"
 @router.patch("/by-email/{email}/role", response_model=schemas.UserOut)
-def change_role_by_email(
+async def change_role_by_email(
     email: str,
     payload: schemas.RoleUpdate,
-    db: Session = Depends(get_db),
-    current_user: model.UserTable = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims),
 ):
     """
     تغییر نقش بر اساس ایمیل (username/email).
     - فقط ادمین مجاز است.
-    - ایمیل ورودی trim/lower می‌شود؛ سپس جستجو روی فیلد email انجام می‌گیرد.
+    - ایمیل ورودی trim/lower می‌شود؛ سپس جستجو روی lower(email) (ایندکس عبارتی) انجام می‌گیرد.
     """
     _ensure_admin(current_user)
 
     target = (email or "").strip().lower()
-    user = db.query(model.UserTable).filter(model.UserTable.email == target).first()
+    user = (
+        await db.scalars(select(model.UserTable).where(func.lower(model.UserTable.email) == target))
+    ).first()
     if not user:
         raise HTTPException(404, detail="کاربری با این ایمیل پیدا نشد")
 
     if user.role != payload.role:
         user.role = payload.role
-        db.commit()
-        db.refresh(user)
+        await revoke_user_tokens(db, user.id)  # توکن‌های قبلی با نقش قدیمی دیگر پذیرفته نمی‌شوند
+        await db.commit()  # user در حافظه به‌روز است (expire_on_commit=False)؛ refresh لازم نیست
+        invalidate_principal(user.username)  # نقش جدید از درخواست بعدی اعمال شود
 
     return _user_out(user)
@@ -0,0 +1,257 @@
+# routers/users_bulk.py
+# -----------------------------------------------
+# عملیات گروهی روی کاربران (ادمین فقط):
+#  - POST /users/bulk        : ورود گروهی کاربران از فایل CSV یا NDJSON
+#  - POST /users/bulk/roles  : تغییر نقش گروهی از فایل CSV یا NDJSON (ستون‌های email, role)
+#
+# نکات:
+#  * فایل جریانی خوانده می‌شود (bulkio.py) و در دسته‌های batch_size پردازش می‌شود؛
+#    هر دسته یک تراکنش است و دسته‌های قبلی با خطای دسته‌های بعدی برنمی‌گردند.
+#  * رمزهای هر دسته در hashing.bulk_pool به‌صورت موازی هش می‌شوند (استخر جدا از ورود/ثبت‌نام).
+#    در هر worker فقط یک ورود گروهی هم‌زمان اجرا می‌شود؛ درخواست دوم 503 می‌گیرد.
+#  * خطای هر سطر (اعتبارسنجی، تکراری در فایل، موجود در DB) با شمارهٔ سطر گزارش می‌شود.
+#  * تغییر نقش گروهی توکن‌های قبلی کاربران تغییرکرده را باطل و کش Principal را پاک می‌کند.
+#
+# نمونهٔ CSV:
+#   username,password,role,display_name
+#   a@city.ir,secret123,user,کاربر الف
+# نمونهٔ NDJSON:
+#   {"email": "a@city.ir", "password": "secret123"}
+# -----------------------------------------------
+
+import asyncio
+import time
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import bulkio
+import hashing
+import model, schemas
+from auth import Principal, get_admin_user, invalidate_principal, revoke_tokens_for
+from database import get_async_db
+
+router = APIRouter(prefix="/users/bulk", tags=["Users"])
+
+# فقط یک ورود گروهی هم‌زمان در هر worker (bulk_pool برای یک درخواست اندازه شده است)
+_import_lock = asyncio.Lock()
+
+DUPLICATE = "این ایمیل/نام کاربری قبلاً ثبت شده است"
+
+
+async def _taken_logins(db: AsyncSession, logins: list[str]) -> set[str]:
+    """کدام‌یک از این نام‌ها به‌عنوان username یا ایمیل در DB هستند (دو جستجوی ایندکس‌دار)."""
+    if not logins:
+        return set()
+    U = model.UserTable
+    taken = set(await db.scalars(select(U.username).where(U.username.in_(logins))))
+    taken |= set(await db.scalars(select(func.lower(U.email)).where(func.lower(U.email).in_(logins))))
+    return taken
+
+
+async def _insert_users(db: AsyncSession, rows: list[tuple[int, dict]]) -> list[tuple[int, str]]:
+    """
+    درج یک دسته با یک INSERT چندسطری در یک تراکنش.
+    اگر در این فاصله کسی همان ایمیل را ثبت کرده باشد (IntegrityError)، دسته سطر به سطر
+    درج می‌شود تا فقط سطرهای تکراری خطا بگیرند. خروجی: [(شمارهٔ سطر, خطا)]
+    """
+    try:
+        await db.execute(insert(model.UserTable), [values for _, values in rows])
+        await db.commit()
+        return []
+    except IntegrityError:
+        await db.rollback()
+
+    failures = []
+    for line, values in rows:
+        try:
+            await db.execute(insert(model.UserTable), [values])
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            failures.append((line, DUPLICATE))
+    return failures
+
+
+# ---------- ورود گروهی کاربران ----------
+@router.post("", response_model=schemas.BulkReportOut)
+async def import_users(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="اگر نباشد از پسوند/نوع فایل تشخیص داده می‌شود"),
+    batch_size: int = Query(bulkio.BULK_BATCH_SIZE, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    _admin: Principal = Depends(get_admin_user),
+):
+    """
+    ساخت کاربران از فایل CSV/NDJSON.
+    - ستون‌ها: username (یا email)، password، role (اختیاری، پیش‌فرض user)، display_name (اختیاری)
+    - هر دسته: اعتبارسنجی → حذف تکراری‌ها → یک کوئری برای موجودها → هش موازی → INSERT گروهی
+    - خروجی: گزارش موفق/ناموفق با خطای هر سطر و rows_per_sec
+    """
+    fmt = bulkio.open_format(file, format)
+    if _import_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="یک ورود گروهی دیگر در حال اجراست؛ بعداً دوباره تلاش کنید",
+            headers={"Retry-After": "5"},
+        )
+
+    async with _import_lock:
+        report = bulkio.BulkReport()
+        started = time.perf_counter()
+        seen: set[str] = set()
+        batches = bulkio.batched(bulkio.iter_records(file.file, fmt), batch_size)
+
+        while (batch := await bulkio.next_batch(batches)) is not None:
+            valid: list[tuple[int, schemas.UserImportRow]] = []
+            for rec in batch:
+                report.processed += 1
+                if rec.error:
+                    report.fail(rec.line, rec.error)
+                    continue
+                data = dict(rec.data)
+                if "username" not in data and "email" in data:
+                    data["username"] = data.pop("email")
+                data = {k: v for k, v in data.items() if v not in (None, "")}
+                try:
+                    row = schemas.UserImportRow.model_validate(data)
+                except ValidationError as e:
+                    report.fail(rec.line, bulkio.row_error(e))
+                    continue
+                row.username = row.username.strip().lower()
+                if row.username in seen:
+                    report.fail(rec.line, "در همین فایل تکراری است")
+                    continue
+                seen.add(row.username)
+                valid.append((rec.line, row))
+
+            taken = await _taken_logins(db, [r.username for _, r in valid])
+            fresh = []
+            for line, row in valid:
+                if row.username in taken:
+                    report.fail(line, DUPLICATE)
+                else:
+                    fresh.append((line, row))
+            if not fresh:
+                continue
+
+            hashes = await hashing.bulk_pool.map_chunks(
+                hashing.hash_passwords, [row.password for _, row in fresh]
+            )
+            rows = [
+                (line, {
+                    "username": row.username,
+                    "email": row.username,
+                    "hashed_password": hashed,
+                    "role": row.role,
+                    "display_name": row.display_name,
+                })
+                for (line, row), hashed in zip(fresh, hashes)
+            ]
+            failures = await _insert_users(db, rows)
+            for line, error in failures:
+                report.fail(line, error)
+            report.succeeded += len(rows) - len(failures)
+
+    return bulkio.finish(report, started)
+
+
+# ---------- تغییر نقش گروهی ----------
+async def _apply_roles(db: AsyncSession, rows: list[tuple[int, schemas.RoleImportRow]], report: bulkio.BulkReport) -> list[str]:
+    """
+    یک دسته تغییر نقش در یک تراکنش. خروجی: usernameهایی که نقششان عوض شد (برای پاک‌کردن کش).
+    سطرها فقط بعد از commit موفق در succeeded شمرده می‌شوند؛ اگر دیتابیس دسته را نپذیرد همهٔ
+    سطرهای پیداشدهٔ دسته خطا می‌گیرند.
+    """
+    U = model.UserTable
+    logins = [row.email for _, row in rows]
+    found = (
+        await db.execute(
+            select(U.id, U.username, func.lower(U.email).label("email"), U.role)
+            .where(or_(U.username.in_(logins), func.lower(U.email).in_(logins)))
+        )
+    ).all()
+    by_login = {}
+    for r in found:
+        by_login.setdefault(r.username, r)
+        if r.email:
+            by_login.setdefault(r.email, r)
+
+    changes, changed_names, matched, done = [], [], [], set()
+    for line, row in rows:
+        user = by_login.get(row.email)
+        if user is None:
+            report.fail(line, "کاربر پیدا نشد")
+            continue
+        if user.id in done:
+            report.fail(line, "در همین فایل تکراری است")
+            continue
+        done.add(user.id)
+        matched.append(line)
+        if (user.role or "user") != row.role:
+            changes.append({"id": user.id, "role": row.role})
+            changed_names.append(user.username)
+
+    if changes:
+        try:
+            await db.execute(update(U), changes)  # UPDATE گروهی بر اساس کلید اصلی
+            await revoke_tokens_for(db, [c["id"] for c in changes])
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            for line in matched:
+                report.fail(line, f"دیتابیس تغییر نقش را نپذیرفت: {getattr(e, 'orig', e)}")
+            return []
+    report.succeeded += len(matched)
+    return changed_names
+
+
+@router.post("/roles", response_model=schemas.BulkReportOut)
+async def import_roles(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None),
+    role: Optional[schemas.Role] = Query(None, description="نقش پیش‌فرض برای سطرهای بدون ستون role"),
+    batch_size: int = Query(bulkio.BULK_BATCH_SIZE, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    _admin: Principal = Depends(get_admin_user),
+):
+    """
+    تغییر نقش گروهی از فایل (ستون‌های email یا username، و role).
+    - کاربران پیدانشده/تکراری به‌عنوان خطای سطر گزارش می‌شوند.
+    - برای کاربرانی که نقششان واقعاً عوض شد: ابطال توکن‌های قبلی + پاک‌کردن کش Principal.
+    """
+    fmt = bulkio.open_format(file, format)
+    report = bulkio.BulkReport()
+    started = time.perf_counter()
+    batches = bulkio.batched(bulkio.iter_records(file.file, fmt), batch_size)
+
+    while (batch := await bulkio.next_batch(batches)) is not None:
+        valid: list[tuple[int, schemas.RoleImportRow]] = []
+        for rec in batch:
+            report.processed += 1
+            if rec.error:
+                report.fail(rec.line, rec.error)
+                continue
+            data = dict(rec.data)
+            if "email" not in data and "username" in data:
+                data["email"] = data.pop("username")
+            if not data.get("role") and role:
+                data["role"] = role
+            try:
+                row = schemas.RoleImportRow.model_validate(data)
+            except ValidationError as e:
+                report.fail(rec.line, bulkio.row_error(e))
+                continue
+            row.email = row.email.strip().lower()
+            valid.append((rec.line, row))
+
+        if valid:
+            changed = await _apply_roles(db, valid, report)
+            for username in changed:
+                invalidate_principal(username)
+
+    return bulkio.finish(report, started)
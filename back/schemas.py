@@ -45,6 +45,20 @@ class UserOut(_UserBase):
     pass
 
 
+class UserAdminOut(_UserBase):
+    """آیتم فهرست کاربران برای ادمین (همراه با id)."""
+    id: int
+
+
+class UserPage(BaseModel):
+    """
+    یک صفحه از فهرست کاربران (GET /users).
+    nextCursor را برای صفحهٔ بعد در ?cursor= بفرستید؛ None یعنی صفحهٔ آخر.
+    """
+    items: List[UserAdminOut]
+    nextCursor: Optional[str] = None
+
+
 class UserCreate(BaseModel):
     """
     ورودی ساخت کاربر جدید.
@@ -60,11 +74,51 @@ class RoleUpdate(BaseModel):
     role: Role
 
 
+# ------------------- ورود گروهی کاربران (ادمین) -------------------
+class UserImportRow(BaseModel):
+    """یک سطر فایل CSV/NDJSON ورود گروهی کاربران (ستون email هم به‌جای username پذیرفته می‌شود)."""
+    username: EmailStr
+    password: constr(min_length=6)
+    role: Role = "user"
+    display_name: Optional[constr(max_length=100)] = None
+
+
+class RoleImportRow(BaseModel):
+    """یک سطر فایل تغییر نقش گروهی: ایمیل/نام کاربری + نقش جدید."""
+    email: constr(min_length=3)
+    role: Role
+
+
+class BulkRowError(BaseModel):
+    line: int
+    error: str
+
+
+class BulkReportOut(BaseModel):
+    """
+    گزارش عملیات گروهی.
+    - errors: خطای هر سطر با شمارهٔ سطر فایل (حداکثر ۱۰۰۰ مورد)
+    - rows_per_sec: توان عملیاتی (سطرهای اعمال‌شده در ثانیه)
+    """
+    processed: int
+    succeeded: int
+    failed: int
+    errors: List[BulkRowError] = Field(default_factory=list)
+    elapsed_ms: float
+    rows_per_sec: float
+
+
 # ============================== Auth ==============================
 class Token(BaseModel):
-    """خروجی استاندارد توکن ورود."""
+    """خروجی استاندارد توکن ورود (refresh_token برای گرفتن access token تازه)."""
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    """ورودی /users/refresh."""
+    refresh_token: str
 
 
 class ChangePassword(BaseModel):
@@ -113,6 +167,17 @@ class NewsCreate(NewsBase):
     pass
 
 
+class NewsImportRow(NewsCreate):
+    """
+    یک سطر ورود گروهی خبر (POST /content/bulk/news یا scripts/content_bulk.py).
+    - id اختیاری: اگر خبر با همین id باشد به‌روزرسانی می‌شود (فقط ستون‌های موجود در سطر)، وگرنه
+      با همین id ساخته می‌شود؛ بدون id خبر تازه.
+    - created_at اختیاری: تاریخ انتشار در CMS قبلی (ترتیب «جدیدترین اول» حفظ می‌شود).
+    """
+    id: Optional[int] = Field(None, ge=1)
+    created_at: Optional[datetime] = None
+
+
 class News(NewsBase):
     """
     خروجی یک خبر.
@@ -120,6 +185,26 @@ class News(NewsBase):
     """
     model_config = ConfigDict(from_attributes=True)
     id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class NewsListItem(BaseModel):
+    """
+    یک آیتم فهرست خبرها (GET /news/).
+    بدون ?fields= فقط فیلدهای خلاصه (pagination.LIST_FIELDS) برمی‌گردند و content اصلاً از DB
+    خوانده نمی‌شود؛ با ?fields= دقیقاً همان فیلدها (به‌علاوهٔ id). فیلدهای انتخاب‌نشده در JSON
+    نمی‌آیند (response_model_exclude_unset). متن کامل: GET /news/{id}
+    """
+    id: int
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    content: Optional[str] = None
+    category: Optional[str] = None
+    image: Optional[str] = None
+    source: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
 
 # ============================ Articles ============================
@@ -138,6 +223,12 @@ class ArticleCreate(ArticleBase):
     pass
 
 
+class ArticleImportRow(ArticleCreate):
+    """یک سطر ورود گروهی مقاله؛ id و created_at مثل NewsImportRow."""
+    id: Optional[int] = Field(None, ge=1)
+    created_at: Optional[datetime] = None
+
+
 class ArticleUpdate(BaseModel):
     """
     ورودی ویرایش مقاله (همه اختیاری تا PATCH/PUT ساده شود).
@@ -165,6 +256,56 @@ class Article(BaseModel):
     category: Optional[str] = None
     source: Optional[str] = None
     image: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class ArticleListItem(BaseModel):
+    """یک آیتم فهرست مقالات (GET /articles/)؛ مثل NewsListItem. متن کامل: GET /articles/{id}"""
+    id: int
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    content: Optional[str] = None
+    category: Optional[str] = None
+    source: Optional[str] = None
+    image: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+# ============================== Facets ==============================
+class CategoryFacet(BaseModel):
+    """یک چیپ فیلتر: نام دسته (همان مقدار ?category=) و تعداد ردیف‌هایش."""
+    category: str
+    count: int
+
+
+class FacetsOut(BaseModel):
+    """
+    خروجی GET /news/facets و GET /articles/facets.
+    - total: تعداد کل (شامل ردیف‌های بدون دسته) — برای چیپ «همه»
+    - categories: دسته‌ها، پرتعدادترین اول
+    """
+    total: int
+    categories: List[CategoryFacet]
+
+
+# ============================== Search ==============================
+class SearchHit(BaseModel):
+    """
+    یک نتیجهٔ GET /search (رتبه‌بندی‌شده؛ score بزرگ‌تر = مرتبط‌تر).
+    - kind: news | articles | guide ؛ id شناسهٔ همان منبع (برای guide شناسهٔ آیتم و slug دسته)
+    - snippet: گزیدهٔ متن یکسان‌شده (ی/ک فارسی، ارقام لاتین)، HTML-escaped و واژه‌های منطبق
+      داخل <mark>…</mark> — می‌توان مستقیم به‌صورت HTML نمایش داد.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    kind: str
+    id: int
+    title: str
+    snippet: str
+    score: float
+    slug: Optional[str] = None
 
 
 # ============================== Guide ==============================
@@ -189,6 +330,40 @@ class GuideCategoryOut(BaseModel):
     notes: Optional[List[str]] = None
 
 
+class GuideAdvice(BaseModel):
+    """
+    خلاصهٔ راهنمای یک دسته که کنار نتیجهٔ /predict می‌آید (با advice=true)؛
+    همان نام فیلدهای GuideCategoryOut، بدون توضیح/رنگ/نکته‌ها و با چند نمونهٔ اول هر گروه.
+    برای راهنمای کامل: GET /guide/{slug}
+    """
+    slug: str
+    name: str
+    examplesYes: List[str]
+    examplesNo: List[str]
+    prep: List[str]
+
+
+class GuideLookupMatch(BaseModel):
+    """آیتم راهنمایی که با عبارت جستجو جور شد (kind: yes/no/prep/note)."""
+    text: str
+    kind: GuideKind
+
+
+class GuideLookupHit(BaseModel):
+    """یک دستهٔ پیشنهادی برای GET /guide/lookup؛ score بین 0 و 1 (1 = همهٔ واژه‌ها کامل خوردند)."""
+    slug: str
+    name: str
+    color: str
+    score: float
+    matches: List[GuideLookupMatch]
+
+
+class GuideLookupOut(BaseModel):
+    """خروجی GET /guide/lookup: دسته‌ها به ترتیب امتیاز (بهترین اول)."""
+    query: str
+    results: List[GuideLookupHit]
+
+
 class GuideCategoryCreate(BaseModel):
     """ورودی ساخت دسته‌ی راهنما."""
     slug: Optional[str] = None
@@ -240,6 +415,65 @@ class GuideItemUpdate(BaseModel):
     categorySlug: Optional[str] = None
 
 
+class GuideBatchOp(BaseModel):
+    """
+    یک عملیات در ویرایش گروهی آیتم‌های یک دسته (POST /guide/{slug}/batch).
+    - create: kind و text لازم (آیتم تازه در همین دسته)
+    - update: id و دست‌کم یکی از kind / text
+    - move  : id و categorySlug (انتقال به دستهٔ دیگر)
+    - delete: id
+    id در update/move/delete باید آیتمی از همین دسته باشد و در یک batch فقط یک بار بیاید.
+    """
+    op: Literal["create", "update", "move", "delete"]
+    id: Optional[int] = None
+    kind: Optional[GuideKind] = None
+    text: Optional[str] = None
+    categorySlug: Optional[str] = None
+
+
+class GuideBatch(BaseModel):
+    """ورودی POST /guide/{slug}/batch: همهٔ عملیات‌ها با هم اعتبارسنجی و در یک تراکنش اعمال می‌شوند."""
+    ops: List[GuideBatchOp] = Field(..., min_length=1, max_length=500)
+
+
+# =============================== Sync ===============================
+class SyncGuideCategory(BaseModel):
+    """یک دستهٔ راهنما در فید همگام‌سازی (ردیف خام؛ آیتم‌ها جدا در guide_items می‌آیند)."""
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    slug: str
+    name: str
+    description: str
+    color: str
+    updated_at: Optional[datetime] = None
+
+
+class SyncGuideItem(BaseModel):
+    """یک آیتم راهنما در فید همگام‌سازی؛ category_id به SyncGuideCategory.id اشاره می‌کند."""
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    category_id: int
+    kind: GuideKind
+    text: str
+    updated_at: Optional[datetime] = None
+
+
+class SyncOut(BaseModel):
+    """
+    پاسخ GET /sync: ردیف‌های درج/ویرایش‌شده و idهای حذف‌شده از آخرین توکن.
+    - token: در درخواست بعدی به‌عنوان since فرستاده شود.
+    - has_more: true یعنی تغییرات بیشتری مانده؛ بلافاصله با همین token دوباره بخوانید.
+    - deleted: منبع ('news' | 'articles' | 'guide_categories' | 'guide_items') → idهای حذف‌شده
+    """
+    token: str
+    has_more: bool = False
+    news: List[News] = Field(default_factory=list)
+    articles: List[Article] = Field(default_factory=list)
+    guide_categories: List[SyncGuideCategory] = Field(default_factory=list)
+    guide_items: List[SyncGuideItem] = Field(default_factory=list)
+    deleted: dict[str, List[int]] = Field(default_factory=dict)
+
+
 # =========================== Notifications ===========================
 # نوع‌های مجاز اعلان؛ رشته‌ی آزاد هم پشتیبانی می‌شود (| str)
 NotifType = Literal["system", "content", "moderation", "role", "message"]
@@ -323,3 +557,4 @@ class PredictOut(BaseModel):
     photo_id: Optional[int] = None
     url: Optional[str] = None
     saved: bool = False
+    advice: Optional[GuideAdvice] = None      # فقط با advice=true (None = دستهٔ متناظری نیست)
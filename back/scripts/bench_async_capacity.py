@@ -0,0 +1,182 @@
+# back/scripts/bench_async_capacity.py
+"""
+بنچمارک ظرفیت درخواست‌های هم‌زمان: روتر همگام (Session + threadpool) در برابر
+روتر async (AsyncSession) با تعداد worker ثابت.
+
+سرور: یک پروسهٔ uvicorn با یک worker روی یک فایل SQLite موقت که دو مسیر یکسان دارد:
+- /_bench/sync   : def + Session از get_db (الگوی قبلی روترها؛ هر درخواست یک slot از threadpool)
+- /_bench/async  : async def + AsyncSession از get_async_db (الگوی فعلی روترها)
+هر دو ۲۰ خبر آخر را می‌خوانند. برای شبیه‌سازی تأخیر دیتابیس سروری، قبل از آن تابع SQL
+bench_sleep(ms) اجرا می‌شود (داخل خود درایور، پس event loop را بلوکه نمی‌کند).
+اندازهٔ threadpool با --threads محدود می‌شود (پیش‌فرض anyio = 40).
+
+کلاینت: --concurrency درخواست هم‌زمان به مدت --seconds روی هر مسیر.
+خروجی هر مسیر: درخواست/ثانیه، p50/p95 تأخیر و تعداد خطا.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_async_capacity.py --concurrency 64 --threads 8 --db-latency-ms 20 --seconds 10
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+# ---------- سرور ----------
+def serve(args) -> None:
+    """(داخلی) اجرای uvicorn با مسیرهای بنچمارک؛ DATABASE_URL از قبل در ENV است."""
+    import anyio.to_thread
+    import uvicorn
+    from fastapi import Depends
+    from sqlalchemy import event, func, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    import main
+    import model
+    from database import SessionLocal, async_engine, engine, get_async_db, get_db
+
+    def _register_sleep(dbapi_conn, _record):
+        dbapi_conn.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+    for e in (engine, async_engine.sync_engine):
+        event.listen(e, "connect", _register_sleep)
+    engine.dispose()  # اتصال‌های باز‌شده هنگام import main (create_all) تابع را ندارند
+
+    model.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all(model.NewsTable(title=f"خبر {i}", summary="خلاصه", content="متن") for i in range(200))
+    db.commit()
+    db.close()
+
+    latency = args.db_latency_ms
+    latest = select(model.NewsTable.id, model.NewsTable.title).order_by(model.NewsTable.id.desc()).limit(20)
+
+    @main.app.get("/_bench/sync")
+    def bench_sync(db: Session = Depends(get_db)):
+        db.execute(select(func.bench_sleep(latency)))
+        return [r._asdict() for r in db.execute(latest)]
+
+    @main.app.get("/_bench/async")
+    async def bench_async(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(select(func.bench_sleep(latency)))
+        return [r._asdict() for r in await db.execute(latest)]
+
+    app_lifespan = main.app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+        async with app_lifespan(app):
+            yield
+
+    main.app.router.lifespan_context = lifespan
+
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, workers=1, log_level="warning")
+
+
+# ---------- کلاینت ----------
+async def _load(url: str, concurrency: int, seconds: float) -> dict:
+    import httpx
+
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(url)
+                    if r.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    return {
+        "req_per_s": round(len(latencies) / seconds, 1),
+        "p50_ms": round(_percentile(latencies, 0.50), 1),
+        "p95_ms": round(_percentile(latencies, 0.95), 1),
+        "errors": errors,
+    }
+
+
+def _wait_port(port: int, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError("سرور بالا نیامد")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--threads", type=int, default=8, help="اندازهٔ threadpool سرور")
+    ap.add_argument("--db-latency-ms", type=float, default=20, help="تأخیر شبیه‌سازی‌شدهٔ هر درخواست DB")
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--port", type=int)
+    ap.add_argument("--serve", action="store_true", help="(داخلی) فقط اجرای سرور")
+    args = ap.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    port = _free_port()
+    tmp = tempfile.mkdtemp(prefix="zebin-bench-")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/bench.db")
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", "--port", str(port),
+         "--threads", str(args.threads), "--db-latency-ms", str(args.db_latency_ms)],
+        env=env, cwd=tmp,
+    )
+    try:
+        _wait_port(port)
+        print(f">> 1 worker, threadpool={args.threads}, concurrency={args.concurrency}, "
+              f"db latency={args.db_latency_ms}ms, {args.seconds}s")
+        for kind in ("sync", "async"):
+            url = f"http://127.0.0.1:{port}/_bench/{kind}"
+            asyncio.run(_load(url, args.concurrency, 1))  # گرم کردن pool/اتصال‌ها
+            print(f"{kind:5}: {asyncio.run(_load(url, args.concurrency, args.seconds))}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# back/scripts/bench_auth_queries.py
+"""
+اندازه‌گیری تعداد کوئری SQL در هر درخواست احرازشده (GET /users/me)
+
+سه حالت اندازه‌گیری می‌شود:
+- legacy:   جست‌وجوی قبلی get_current_user (کل ردیف UserTable + selectin روی photos)
+- no-cache: Principal ستونی بدون کش (PRINCIPAL_CACHE_TTL=0)
+- cached:   Principal کش‌شده (پیش‌فرض)
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+نیازمند httpx (برای TestClient).
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_auth_queries.py --requests 200 --photos 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload
+
+import auth
+import main
+import model
+from database import SessionLocal, async_engine, engine
+
+_count = 0
+
+
+def _on_execute(*_):
+    global _count
+    _count += 1
+
+
+# روترها روی async_engine هستند؛ اسکریپت‌ها روی engine همگام
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _on_execute)
+
+
+def _seed(photos: int) -> str:
+    db = SessionLocal()
+    user = model.UserTable(
+        username="bench@example.com",
+        email="bench@example.com",
+        hashed_password=auth.get_password_hash("secret123"),
+    )
+    db.add(user)
+    db.flush()
+    db.add_all(
+        model.UserPhotoTable(user_id=user.id, file_path=f"uploads/photos/{i}.jpg")
+        for i in range(photos)
+    )
+    db.commit()
+    db.close()
+    return auth.create_access_token({"sub": "bench@example.com"})
+
+
+def _legacy_lookup(token: str) -> None:
+    payload = auth.jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+    db = SessionLocal()
+    (
+        db.query(model.UserTable)
+        .options(selectinload(model.UserTable.photos))  # رفتار lazy="selectin" قبلی
+        .filter(model.UserTable.username == payload["sub"])
+        .first()
+    )
+    db.close()
+
+
+def main_():
+    global _count
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--photos", type=int, default=50)
+    args = ap.parse_args()
+
+    token = _seed(args.photos)
+    client = TestClient(main.app)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    _count = 0
+    for _ in range(args.requests):
+        _legacy_lookup(token)
+    print(f"legacy   : {_count / args.requests:.2f} queries/request")
+
+    ttl = auth.PRINCIPAL_CACHE_TTL
+    for label, auth.PRINCIPAL_CACHE_TTL in (("no-cache", 0), ("cached", ttl)):
+        auth.invalidate_principal()
+        _count = 0
+        for _ in range(args.requests):
+            assert client.get("/users/me", headers=headers).status_code == 200
+        print(f"{label:9}: {_count / args.requests:.2f} queries/request")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,92 @@
+# back/scripts/bench_bulk_import.py
+"""
+بنچمارک توان ساخت کاربر (کاربر در ثانیه)
+
+دو مسیر مقایسه می‌شوند:
+- signup: یک POST /users/signup برای هر کاربر (هش + commit جدا)
+- bulk:   یک POST /users/bulk با فایل CSV (هش موازی در bulk_pool + INSERT گروهی)
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+ضریب bcrypt از BCRYPT_ROUNDS خوانده می‌شود (پیش‌فرض 12، مثل تولید).
+نیازمند httpx (برای TestClient).
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_bulk_import.py --users 2000 --signups 100
+    BCRYPT_ROUNDS=10 BULK_HASH_WORKERS=8 python scripts/bench_bulk_import.py --users 10000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("RATE_LIMIT_SIGNUP_IP", "0")  # سقف ثبت‌نام برای این اندازه‌گیری خاموش
+
+from fastapi.testclient import TestClient
+
+import auth
+import hashing
+import main
+import model
+from database import SessionLocal
+
+
+def _admin_headers() -> dict:
+    db = SessionLocal()
+    db.add(model.UserTable(
+        username="bench-admin@example.com",
+        email="bench-admin@example.com",
+        hashed_password=auth.get_password_hash("secret123"),
+        role="admin",
+    ))
+    db.commit()
+    user = db.query(model.UserTable).filter_by(username="bench-admin@example.com").one()
+    db.close()
+    return {"Authorization": f"Bearer {auth.create_user_tokens(user)['access_token']}"}
+
+
+def _csv(n: int, prefix: str) -> bytes:
+    lines = ["username,password,display_name"]
+    lines += [f"{prefix}{i}@example.com,password{i},کاربر {i}" for i in range(n)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=2000, help="تعداد کاربران فایل bulk")
+    ap.add_argument("--signups", type=int, default=100, help="تعداد ثبت‌نام تکی برای مقایسه")
+    ap.add_argument("--batch-size", type=int, default=500)
+    args = ap.parse_args()
+
+    with TestClient(main.app) as client:
+        headers = _admin_headers()
+        print(f">> bcrypt rounds={os.getenv('BCRYPT_ROUNDS', '12')} "
+              f"bulk workers={hashing.bulk_pool.workers}")
+
+        started = time.perf_counter()
+        for i in range(args.signups):
+            r = client.post("/users/signup", json={"username": f"single{i}@example.com", "password": f"password{i}"})
+            assert r.status_code == 201, r.text
+        elapsed = time.perf_counter() - started
+        print(f"signup : {args.signups} users in {elapsed:.2f}s → {args.signups / elapsed:.1f} users/s")
+
+        r = client.post(
+            "/users/bulk",
+            params={"batch_size": args.batch_size},
+            files={"file": ("users.csv", _csv(args.users, "bulk"), "text/csv")},
+            headers=headers,
+        )
+        report = r.json()
+        assert r.status_code == 200 and report["failed"] == 0, r.text
+        print(f"bulk   : {report['succeeded']} users in {report['elapsed_ms'] / 1000:.2f}s "
+              f"→ {report['rows_per_sec']:.1f} users/s")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,159 @@
+# back/scripts/bench_db_contention.py
+"""
+بنچمارک رقابت نوشتن/خواندن روی SQLite در پروفایل‌های مختلف database.py
+
+بار کاری شبیه مسیرهای پرتکرار API:
+- writerها: درج اعلان + درج نشانک (هر کدام یک commit؛ مثل ذخیرهٔ predict/bookmarks)
+- readerها: ۲۰ اعلان آخر یک کاربر (مثل GET /notifs)
+
+هر پروفایل (sqlite-legacy و sqlite-wal) در یک پروسهٔ جدا و روی یک فایل SQLite موقتِ تازه
+اجرا می‌شود (DATABASE_URL/DB_PROFILE از ENV خوانده می‌شوند). --procs پروسه‌های هم‌زمان
+را شبیه چند worker uvicorn روی یک فایل اجرا می‌کند.
+
+خروجی هر پروفایل: نوشتن/ثانیه، خواندن/ثانیه، p95 تأخیر نوشتن و تعداد خطای «database is locked».
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_db_contention.py --writers 8 --readers 8 --seconds 10 --procs 2
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def _worker(writers: int, readers: int, seconds: float, out) -> None:
+    """یک پروسه: writers + readers رشته روی SessionLocal همین پروسه."""
+    from sqlalchemy.exc import OperationalError
+
+    import model
+    from database import SessionLocal
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"writes": 0, "reads": 0, "locked": 0, "write_ms": []}
+
+    def write_loop(n: int):
+        i = 0
+        while not stop.is_set():
+            i += 1
+            db = SessionLocal()
+            t0 = time.perf_counter()
+            try:
+                db.add(model.Notification(user_id=n % 4 + 1, type="content", title=f"bench {n}-{i}"))
+                db.commit()
+                db.add(model.Bookmark(user_id=n % 4 + 1, target_type="news", target_id=f"{os.getpid()}-{n}-{i}"))
+                db.commit()
+                with lock:
+                    stats["writes"] += 2
+                    stats["write_ms"].append((time.perf_counter() - t0) * 1000)
+            except OperationalError as e:
+                db.rollback()
+                with lock:
+                    stats["locked"] += "locked" in str(e)
+            finally:
+                db.close()
+
+    def read_loop(n: int):
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                (
+                    db.query(model.Notification)
+                    .filter(model.Notification.user_id == n % 4 + 1)
+                    .order_by(model.Notification.created_at.desc())
+                    .limit(20)
+                    .all()
+                )
+                with lock:
+                    stats["reads"] += 1
+            except OperationalError as e:
+                with lock:
+                    stats["locked"] += "locked" in str(e)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=write_loop, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=read_loop, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    out.put(stats)
+
+
+def run_profile(args) -> dict:
+    """(داخلی) اجرای یک پروفایل؛ DATABASE_URL و DB_PROFILE از قبل در ENV هستند."""
+    import model
+    from database import engine
+
+    model.Base.metadata.create_all(bind=engine)
+    engine.dispose()  # اتصال‌ها را قبل از fork نبند/به اشتراک نگذار
+
+    ctx = mp.get_context("fork") if hasattr(os, "fork") else mp.get_context()
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(args.writers, args.readers, args.seconds, out))
+             for _ in range(args.procs)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    write_ms = [x for r in results for x in r["write_ms"]]
+    return {
+        "profile": os.environ["DB_PROFILE"],
+        "writes_per_s": round(sum(r["writes"] for r in results) / args.seconds, 1),
+        "reads_per_s": round(sum(r["reads"] for r in results) / args.seconds, 1),
+        "write_p95_ms": round(_percentile(write_ms, 0.95), 1),
+        "locked_errors": sum(r["locked"] for r in results),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writers", type=int, default=8)
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--procs", type=int, default=2, help="تعداد پروسه‌ها (شبیه workerهای uvicorn)")
+    ap.add_argument("--profile", choices=["sqlite-legacy", "sqlite-wal"], help="(داخلی) فقط یک پروفایل")
+    args = ap.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    print(f">> {args.procs} procs x ({args.writers} writers + {args.readers} readers), {args.seconds}s")
+    for profile in ("sqlite-legacy", "sqlite-wal"):
+        tmp = tempfile.mkdtemp(prefix="zebin-bench-")
+        env = dict(os.environ, DB_PROFILE=profile, DATABASE_URL=f"sqlite:///{tmp}/bench.db")
+        out = subprocess.run(
+            [sys.executable, __file__, "--profile", profile,
+             "--writers", str(args.writers), "--readers", str(args.readers),
+             "--seconds", str(args.seconds), "--procs", str(args.procs)],
+            check=True, capture_output=True, text=True, env=env,
+        )
+        print(out.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
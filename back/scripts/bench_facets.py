@@ -0,0 +1,95 @@
+# back/scripts/bench_facets.py
+"""
+تأخیر شمارش دسته‌ها (چیپ‌های فیلتر) روی آرشیو بزرگ (پیش‌فرض ۲۰۰هزار خبر، ۴۰ دسته)
+
+حالت‌ها (مستقیم با AsyncSession؛ بدون HTTP و بدون respcache):
+- group-by : SELECT category, count(*) ... GROUP BY category روی کل جدول خبرها
+- counter  : facets.counts از جدول category_count
+و هزینهٔ نوشتن: زمان درج --writes خبر تکی با/بدون تریگرهای شمارنده.
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_facets.py --items 200000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+
+from sqlalchemy import insert
+
+import main  # noqa: F401  (ساخت جدول‌ها و تریگرها)
+import changes
+import facets
+import model
+from database import AsyncSessionLocal, engine
+
+
+def _seed(items: int, categories: int) -> None:
+    with engine.begin() as conn:
+        for i in range(0, items, 10000):
+            conn.execute(insert(model.NewsTable), [
+                {"title": "خبر", "summary": "خلاصه", "content": "متن",
+                 "category": f"دسته-{j % categories}" if j % 10 else None}
+                for j in range(i, min(items, i + 10000))
+            ])
+
+
+async def _measure(fn, repeat: int) -> float:
+    times = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            await fn(db)
+            times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def _writes(n: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(n):
+        with engine.begin() as conn:
+            conn.execute(insert(model.NewsTable).values(title="تازه", summary="s", content="c", category=f"دسته-{i % 5}"))
+    return (time.perf_counter() - t0) * 1000 / n
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=200_000)
+    ap.add_argument("--categories", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--writes", type=int, default=200)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    _seed(args.items, args.categories)
+    print(f">> seeded {args.items} news in {time.perf_counter() - t0:.1f}s")
+
+    group_by = lambda db: db.execute(facets._group_by(model.NewsTable))
+    counter = lambda db: facets.counts(db, changes.NEWS)
+    print(f"group-by  {asyncio.run(_measure(group_by, args.repeat)):9.2f} ms")
+    print(f"counter   {asyncio.run(_measure(counter, args.repeat)):9.2f} ms")
+
+    with_triggers = _writes(args.writes)
+    with engine.begin() as conn:
+        for table in facets.SOURCES.values():
+            for op in ("ai", "ad", "au"):
+                conn.exec_driver_sql(f"DROP TRIGGER facet_{table.__tablename__}_{op}")
+    without = _writes(args.writes)
+    print(f"insert    {with_triggers:9.2f} ms/row with counter triggers, {without:.2f} ms/row without")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,138 @@
+# back/scripts/bench_guide_batch.py
+"""
+ویرایش آیتم‌های یک دستهٔ راهنما: یک درخواست برای هر آیتم در برابر POST /guide/{slug}/batch
+
+برای هر حالت به تعداد --ops عملیات (ترکیب افزودن / ویرایش / انتقال / حذف) اعمال می‌شود:
+- per-item : POST /guide/{slug}/items، PUT و DELETE /guide/items/{id} (هر کدام commit، افزایش
+             نسخه و بازسازی snapshot راهنما)
+- batch    : همهٔ عملیات‌ها در یک POST /guide/{slug}/batch (یک تراکنش، یک بازسازی)
+خروجی: زمان کل، تعداد کوئری و چند بار نسخهٔ راهنما (X-Guide-Version) عوض شد.
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_guide_batch.py --ops 200 --categories 40 --items 25
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+os.environ.setdefault("SNAPSHOT_DIR", "")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+import auth
+import main
+import model
+import sqlstats
+from database import SessionLocal, engine
+
+
+def _admin_headers() -> dict:
+    db = SessionLocal()
+    db.add(model.UserTable(
+        username="bench-admin@example.com",
+        email="bench-admin@example.com",
+        hashed_password=auth.get_password_hash("secret123"),
+        role="admin",
+    ))
+    db.commit()
+    user = db.query(model.UserTable).filter_by(username="bench-admin@example.com").one()
+    db.close()
+    return {"Authorization": f"Bearer {auth.create_user_tokens(user)['access_token']}"}
+
+
+def _seed(prefix: str, categories: int, items: int) -> list[int]:
+    """دسته‌های {prefix}-N؛ خروجی: idهای آیتم‌های دستهٔ اول."""
+    kinds = list(model.GuideItemKind)
+    with engine.begin() as conn:
+        for c in range(categories):
+            cat = conn.execute(insert(model.GuideCategoryTable).values(
+                slug=f"{prefix}-{c}", name=f"{prefix} {c}", description="توضیح کوتاه دسته")).inserted_primary_key[0]
+            conn.execute(insert(model.GuideItemTable), [
+                {"category_id": cat, "kind": kinds[k % 4], "text": f"آیتم راهنمای شمارهٔ {k}"} for k in range(items)
+            ])
+            if c == 0:
+                first = cat
+        I = model.GuideItemTable
+        return list(conn.execute(select(I.id).where(I.category_id == first).order_by(I.id)).scalars())
+
+
+def _ops(ids: list[int], n: int, prefix: str) -> list[dict]:
+    """n عملیات: یک‌چهارم هر نوع؛ ویرایش/انتقال/حذف روی آیتم‌های موجود دستهٔ اول."""
+    ops, pool = [], iter(ids)
+    for i in range(n):
+        kind = ("create", "update", "move", "delete")[i % 4]
+        if kind == "create":
+            ops.append({"op": "create", "kind": "yes", "text": f"آیتم تازهٔ {i}"})
+            continue
+        item = next(pool, None)
+        if item is None:
+            ops.append({"op": "create", "kind": "no", "text": f"آیتم تازهٔ {i}"})
+        elif kind == "update":
+            ops.append({"op": "update", "id": item, "text": f"متن ویرایش‌شدهٔ {i}"})
+        elif kind == "move":
+            ops.append({"op": "move", "id": item, "categorySlug": f"{prefix}-1"})
+        else:
+            ops.append({"op": "delete", "id": item})
+    return ops
+
+
+def _per_item(client, headers, slug: str, ops: list[dict]) -> None:
+    for op in ops:
+        if op["op"] == "create":
+            client.post(f"/guide/{slug}/items", json={"kind": op["kind"], "text": op["text"]}, headers=headers)
+        elif op["op"] == "delete":
+            client.delete(f"/guide/items/{op['id']}", headers=headers)
+        else:
+            body = {k: v for k, v in op.items() if k in ("text", "kind", "categorySlug")}
+            client.put(f"/guide/items/{op['id']}", json=body, headers=headers)
+
+
+def _version(client) -> int:
+    return int(client.get("/guide/").headers["x-guide-version"])
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ops", type=int, default=200)
+    ap.add_argument("--categories", type=int, default=40)
+    ap.add_argument("--items", type=int, default=25, help="آیتم در هر دسته")
+    args = ap.parse_args()
+
+    with TestClient(main.app) as client:
+        headers = _admin_headers()
+        rows = []
+        for label, prefix in (("per-item", "a"), ("batch", "b")):
+            ids = _seed(prefix, args.categories, max(args.items, args.ops))
+            client.post("/guide/", json={"name": "warmup", "description": "-"}, headers=headers)  # snapshot تازه
+            ops = _ops(ids, args.ops, prefix)
+            v0 = _version(client)
+            with sqlstats.max_queries(10**9) as st:
+                t0 = time.perf_counter()
+                if label == "batch":
+                    r = client.post(f"/guide/{prefix}-0/batch", json={"ops": ops}, headers=headers)
+                    assert r.status_code == 200, r.text
+                else:
+                    _per_item(client, headers, f"{prefix}-0", ops)
+                ms = (time.perf_counter() - t0) * 1000
+            rows.append((label, ms, st.queries, _version(client) - v0))
+            client.delete("/guide/warmup", headers=headers)
+
+    print(f">> {args.ops} ops, {args.categories} categories")
+    for label, ms, queries, versions in rows:
+        print(f"{label:10} {ms:10.1f} ms  {queries:6} queries  {versions:4} guide versions")
+
+
+if __name__ == "__main__":
+    main_()
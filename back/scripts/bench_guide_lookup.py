@@ -0,0 +1,172 @@
+# back/scripts/bench_guide_lookup.py
+"""
+GET /guide/lookup?q=: اسکن پایتونی متن آیتم‌ها در برابر نمایهٔ trigram حافظه (guidelookup.py)
+
+حالت‌ها:
+- scan        : روش قبلی — همهٔ آیتم‌ها از DB، normalize و جستجوی زیررشته در پایتون، شمارش دسته‌ها
+- index       : guidelookup.lookup درون‌پروسه (بدون HTTP)
+- http        : GET /guide/lookup از طریق TestClient (شامل کل پشتهٔ HTTP)
+- incremental : guidelookup.update بعد از ویرایش --edits آیتم (فقط ردیف‌های تازهٔ sync_log)
+- rebuild     : ساخت کامل نمایه از DB
+- reload      : کل guidecache.reload بعد از یک ویرایش (snapshot راهنما + به‌روزرسانی نمایه)
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_guide_lookup.py --items 50000 --categories 40 --repeat 300
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+os.environ.setdefault("SNAPSHOT_DIR", "")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+import main
+import changes
+import guidecache
+import guidelookup
+import model
+from database import engine
+from textnorm import normalize
+
+# واژگان مصنوعی: اسم‌ها، صفت‌ها و چند واژهٔ انگلیسی (برچسب‌های روی بسته‌بندی)
+NOUNS = (
+    "بطری پاکت کارتن قوطی شیشه کیسه ظرف درپوش روزنامه مجله دستمال جعبه لیوان بشقاب قاشق "
+    "چنگال نی باتری لامپ لباس کفش پارچه اسفنج فویل سیم کابل گوشی شارژر کاغذ مقوا تتراپک "
+    "کنسرو اسپری رنگ روغن پوست هسته تفاله برگ چوب"
+).split()
+ADJS = "شیر آب نوشابه پیتزا چرب تمیز خالی شکسته پلاستیکی فلزی کوچک بزرگ کهنه رنگی".split()
+LATIN = "PET HDPE PP PS tetra pak milk carton can foil glass".split()
+KINDS = list(model.GuideItemKind)
+QUERIES = ["پاکت شیر", "بطری", "بطر", "جعبه پیتزا", "قوطی کنسرو", "milk carton", "PET", "باتری", "لامپ شکسته", "تتراپک"]
+
+
+def _text(rnd: random.Random, i: int) -> str:
+    parts = [rnd.choice(NOUNS), rnd.choice(ADJS)]
+    if rnd.random() < 0.3:
+        parts.append(rnd.choice(LATIN))
+    if rnd.random() < 0.5:
+        parts.append(f"مدل{i % 5000}")  # واژه‌های کم‌تکرار تا واژگان واقعی‌تر باشد
+    return " ".join(parts)
+
+
+def _seed(items: int, categories: int) -> None:
+    rnd = random.Random(7)
+    with engine.begin() as conn:
+        cats = [
+            conn.execute(insert(model.GuideCategoryTable).values(
+                slug=f"cat-{c}", name=f"دسته {rnd.choice(NOUNS)} {c}", description="-")).inserted_primary_key[0]
+            for c in range(categories)
+        ]
+        rows = [
+            {"category_id": rnd.choice(cats), "kind": KINDS[i % 4], "text": _text(rnd, i)}
+            for i in range(items)
+        ]
+        for i in range(0, items, 5000):
+            conn.execute(insert(model.GuideItemTable), rows[i:i + 5000])
+
+
+def _scan(q: str) -> list:
+    """روش قبلی: خواندن همهٔ متن‌ها و جستجوی زیررشته در پایتون."""
+    needle = normalize(q)
+    I = model.GuideItemTable
+    with Session(engine) as session:
+        rows = session.execute(select(I.category_id, I.text)).all()
+    hits = Counter(cid for cid, text in rows if needle in normalize(text))
+    return hits.most_common(5)
+
+
+def _timed(fn, repeat: int) -> tuple[float, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.99))]
+
+
+def _edit(n: int, rnd: random.Random) -> None:
+    """n آیتم تصادفی ویرایش و نسخهٔ راهنما زیاد می‌شود (مثل یک نوشتن ادمین)."""
+    I = model.GuideItemTable
+    with engine.begin() as conn:
+        ids = conn.execute(select(I.id).order_by(I.id)).scalars().all()
+        for iid in rnd.sample(ids, n):
+            conn.execute(update(I).where(I.id == iid).values(text=_text(rnd, iid)))
+        conn.execute(
+            update(model.ContentVersion).where(model.ContentVersion.name == changes.GUIDE)
+            .values(version=model.ContentVersion.version + 1)
+        )
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=50000)
+    ap.add_argument("--categories", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=300)
+    ap.add_argument("--edits", type=int, default=10, help="آیتم ویرایش‌شده برای حالت incremental")
+    args = ap.parse_args()
+
+    with TestClient(main.app) as client:
+        _seed(args.items, args.categories)
+        _edit(0, random.Random(0))   # افزایش نسخهٔ راهنما مثل یک نوشتن ادمین
+        guidecache.reload()
+        idx = guidelookup.current()
+        print(f">> {len(idx.items)} items, {args.categories} categories, "
+              f"{len(idx.postings)} distinct words, {len(idx.grams)} trigrams")
+        qs = iter(QUERIES * args.repeat)
+        rows = [
+            ("scan", _timed(lambda: _scan(next(qs)), max(args.repeat // 30, 5))),
+            ("index", _timed(lambda: guidelookup.lookup(next(qs)), args.repeat)),
+            ("http", _timed(lambda: client.get("/guide/lookup", params={"q": next(qs)}), args.repeat)),
+        ]
+        rnd = random.Random(11)
+
+        def after_edit(fn):
+            def run():
+                _edit(args.edits, rnd)
+                t0 = time.perf_counter()
+                fn()
+                return (time.perf_counter() - t0) * 1000
+            return statistics.median(run() for _ in range(5))
+
+        def update():
+            with Session(engine) as session:
+                guidelookup.update(session)
+
+        def rebuild():
+            with Session(engine) as session:
+                guidelookup.rebuild(session)
+
+        rows.append(("incremental", (after_edit(update),) * 2))
+        rows.append(("rebuild", _timed(rebuild, 3)))
+        rows.append(("reload", (after_edit(guidecache.reload),) * 2))
+
+        print("\nsample:")
+        for q in QUERIES[:4]:
+            _, hits = guidelookup.lookup(q, 3)
+            print(f"  {q}: " + ", ".join(f"{h.slug} {h.score}" for h in hits))
+
+    print()
+    for label, (p50, p99) in rows:
+        print(f"{label:12} p50 {p50:9.3f} ms   p99 {p99:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main_()
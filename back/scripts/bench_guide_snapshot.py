@@ -0,0 +1,96 @@
+# back/scripts/bench_guide_snapshot.py
+"""
+GET /guide/ و GET /guide/{slug}: ساخت پاسخ در هر درخواست در برابر snapshot حافظه (guidecache.py)
+
+حالت‌ها:
+- per-request : همان کاری که هندلر قبلی در هر درخواست می‌کرد (selectinload همهٔ دسته‌ها و
+                آیتم‌ها + to_out + سریال‌سازی JSON)؛ مستقیم روی Session، بدون HTTP
+- snapshot    : GET /guide/ از طریق TestClient (شامل کل پشتهٔ HTTP) — بدون کوئری
+- slug        : GET /guide/{slug} از snapshot
+- rebuild     : هزینهٔ ساخت دوبارهٔ snapshot بعد از هر ویرایش ادمین
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_guide_snapshot.py --categories 40 --items 25 --repeat 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+os.environ.setdefault("SNAPSHOT_DIR", "")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import main
+import guidecache
+import model
+import sqlstats
+from database import engine
+
+
+def _seed(categories: int, items: int) -> None:
+    kinds = list(model.GuideItemKind)
+    with engine.begin() as conn:
+        for c in range(categories):
+            cat = conn.execute(insert(model.GuideCategoryTable).values(
+                slug=f"cat-{c}", name=f"دسته {c}", description="توضیح کوتاه دسته")).inserted_primary_key[0]
+            conn.execute(insert(model.GuideItemTable), [
+                {"category_id": cat, "kind": kinds[k % 4], "text": f"آیتم راهنمای شمارهٔ {k}"} for k in range(items)
+            ])
+
+
+def _timed(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def _per_request() -> None:
+    with Session(engine) as session:
+        guidecache.build(session).list_body
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--categories", type=int, default=40)
+    ap.add_argument("--items", type=int, default=25, help="آیتم در هر دسته")
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    _seed(args.categories, args.items)
+    guidecache.reload(engine)
+    print(f">> {args.categories} categories x {args.items} items, list body {len(guidecache.current().list_body) / 1024:.1f} KiB")
+
+    with TestClient(main.app) as client:
+        with sqlstats.max_queries(0) as st:
+            client.get("/guide/")
+            client.get("/guide/cat-1")
+        print(f">> queries per snapshot read: {st.queries}")
+        rows = [
+            ("per-request", _timed(_per_request, max(args.repeat // 10, 5))),
+            ("snapshot", _timed(lambda: client.get("/guide/"), args.repeat)),
+            ("slug", _timed(lambda: client.get("/guide/cat-1"), args.repeat)),
+            ("rebuild", _timed(guidecache.reload, max(args.repeat // 10, 5))),
+        ]
+    for label, ms in rows:
+        print(f"{label:12} {ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main_()
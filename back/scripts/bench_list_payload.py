@@ -0,0 +1,117 @@
+# back/scripts/bench_list_payload.py
+"""
+اندازهٔ پاسخ و تأخیر فهرست خبرها روی یک آرشیو بزرگ (پیش‌فرض ۵۰هزار خبر)
+
+حالت‌ها (همه از طریق TestClient، یعنی شامل سریال‌سازی JSON):
+- legacy-all    : هندلر قدیمی (همهٔ ردیف‌ها با content، بدون ترتیب) — فقط یک بار اجرا می‌شود
+- page-full     : یک صفحه (۵۰ تایی) با همهٔ ستون‌ها (?fields=...,content,...)
+- page-summary  : یک صفحه با خروجی خلاصهٔ پیش‌فرض (بدون content)
+- deep-summary  : همان، وسط آرشیو با cursor (keyset؛ مستقل از عمق)
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_list_payload.py --items 50000 --content-bytes 2000 --repeat 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+import main
+import model
+import schemas
+from database import engine, get_async_db
+from pagination import newest_first_cursor
+
+ALL_FIELDS = "title,summary,content,category,image,source,created_at,updated_at"
+
+
+@main.app.get("/_bench/legacy-news", response_model=List[schemas.News])
+async def legacy_news(db: AsyncSession = Depends(get_async_db)):
+    """هندلر قبلی GET /news/ برای مقایسه"""
+    return (await db.scalars(select(model.NewsTable))).all()
+
+
+def _seed(items: int, content_bytes: int) -> None:
+    body = ("پسماند خشک را جدا کنید. " * (content_bytes // 40 + 1))[: content_bytes // 2]
+    start = datetime.utcnow() - timedelta(minutes=items)
+    rows = [
+        {
+            "title": f"خبر شمارهٔ {i}",
+            "summary": "خلاصهٔ کوتاه خبر برای نمایش در فهرست",
+            "content": body,
+            "category": ("recycle", "city", "event")[i % 3],
+            "image": f"/uploads/news/{i}.jpg",
+            "created_at": start + timedelta(minutes=i),
+            "updated_at": start + timedelta(minutes=i),
+        }
+        for i in range(items)
+    ]
+    with engine.begin() as conn:
+        for i in range(0, len(rows), 5000):
+            conn.execute(insert(model.NewsTable), rows[i:i + 5000])
+
+
+def _measure(client: TestClient, url: str, repeat: int, **params) -> tuple[float, int]:
+    times, size = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        r = client.get(url, params=params)
+        times.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200, r.text
+        size = len(r.content)
+    return statistics.median(times), size
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=50_000)
+    ap.add_argument("--content-bytes", type=int, default=2000, help="اندازهٔ تقریبی content هر خبر (UTF-8)")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--skip-legacy", action="store_true", help="بدون حالت legacy-all (کند)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    _seed(args.items, args.content_bytes)
+    print(f">> seeded {args.items} news in {time.perf_counter() - t0:.1f}s")
+
+    with engine.connect() as conn:
+        mid = conn.execute(
+            select(model.NewsTable.id, model.NewsTable.created_at)
+            .order_by(model.NewsTable.created_at.desc(), model.NewsTable.id.desc())
+            .offset(args.items // 2).limit(1)
+        ).one()
+    deep_cursor = newest_first_cursor(mid.created_at, mid.id)
+
+    results = []
+    with TestClient(main.app) as client:
+        if not args.skip_legacy:
+            results.append(("legacy-all", *_measure(client, "/_bench/legacy-news", 1)))
+        results.append(("page-full", *_measure(client, "/news/", args.repeat, fields=ALL_FIELDS)))
+        results.append(("page-summary", *_measure(client, "/news/", args.repeat)))
+        results.append(("deep-summary", *_measure(client, "/news/", args.repeat, cursor=deep_cursor)))
+
+    for label, ms, size in results:
+        print(f"{label:13} {ms:9.1f} ms  {size / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main_()
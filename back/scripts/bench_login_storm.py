@@ -0,0 +1,92 @@
+# back/scripts/bench_login_storm.py
+"""
+بنچمارک تأخیر GET /news/ در حین «طوفان ورود» (login storm)
+
+روی یک سرور در حال اجرا کار می‌کند:
+  1) یک کاربر آزمایشی ثبت‌نام می‌شود (اگر از قبل باشد، خطا نادیده گرفته می‌شود)
+  2) تأخیر /news/ بدون بار اندازه‌گیری می‌شود (baseline)
+  3) --storm رشته به‌طور همزمان POST /users/login می‌زنند و هم‌زمان تأخیر /news/
+     دوباره اندازه‌گیری می‌شود
+خروجی: p50/p95/max تأخیر /news/ در دو حالت + تعداد پاسخ‌های 200/401/503 ورود.
+
+نحوۀ اجرا (در یک ترمینال سرور، در ترمینال دیگر اسکریپت):
+    cd back
+    uvicorn main:app --port 8000
+    python scripts/bench_login_storm.py --base http://127.0.0.1:8000 --storm 64 --seconds 10
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+EMAIL = "storm-bench@example.com"
+PASSWORD = "storm-bench-pass"
+
+
+def _percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "no samples"
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return (f"n={len(samples)} p50={statistics.median(samples):.1f}ms "
+            f"p95={p95:.1f}ms max={samples[-1]:.1f}ms")
+
+
+def _sample_news(base: str, stop: threading.Event, out: list[float]) -> None:
+    s = requests.Session()
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        s.get(f"{base}/news/", timeout=60)
+        out.append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.05)
+
+
+def _login_loop(base: str, stop: threading.Event, codes: Counter, lock: threading.Lock) -> None:
+    s = requests.Session()
+    body = {"username": EMAIL, "password": PASSWORD}
+    while not stop.is_set():
+        code = s.post(f"{base}/users/login", json=body, timeout=60).status_code
+        with lock:
+            codes[code] += 1
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://127.0.0.1:8000")
+    ap.add_argument("--storm", type=int, default=64, help="تعداد رشته‌های همزمان ورود")
+    ap.add_argument("--seconds", type=float, default=10)
+    args = ap.parse_args()
+    base = args.base.rstrip("/")
+
+    requests.post(f"{base}/users/signup", json={"username": EMAIL, "password": PASSWORD}, timeout=60)
+
+    stop = threading.Event()
+    baseline: list[float] = []
+    t = threading.Thread(target=_sample_news, args=(base, stop, baseline))
+    t.start()
+    time.sleep(min(args.seconds, 3))
+    stop.set()
+    t.join()
+    print("baseline /news/ :", _percentiles(baseline))
+
+    stop = threading.Event()
+    during: list[float] = []
+    codes: Counter = Counter()
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=args.storm + 1) as ex:
+        for _ in range(args.storm):
+            ex.submit(_login_loop, base, stop, codes, lock)
+        ex.submit(_sample_news, base, stop, during)
+        time.sleep(args.seconds)
+        stop.set()
+    print("storm    /news/ :", _percentiles(during))
+    print("login responses :", dict(codes))
+
+
+if __name__ == "__main__":
+    main()
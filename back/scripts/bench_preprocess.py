@@ -0,0 +1,126 @@
+# back/scripts/bench_preprocess.py
+"""
+بنچمارک حافظهٔ پیش‌پردازش Predict زیر بار همزمان
+
+دو مسیر مقایسه می‌شوند:
+- legacy: همان روش قبلی _read_image (آرایهٔ float32 تازه در هر درخواست + tolist برای JSON)
+- pooled: PreprocessEngine با استخر بافر (preprocess.py)
+
+برای هر مسیر:
+- per_call_peak: بیشینهٔ حافظهٔ پایتون/NumPy که یک فراخوانی تکی تخصیص می‌دهد (tracemalloc)
+- traced_peak:   بیشینهٔ حافظهٔ ردیابی‌شده در طول اجرای همزمان
+- peak RSS:       بیشینهٔ RSS پروسه (هر مسیر در یک پروسهٔ جدا اجرا می‌شود تا با هم قاطی نشوند)
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_preprocess.py --threads 8 --requests 400 --width 1280 --height 720
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+from PIL import Image
+
+from preprocess import PreprocessEngine, VGG16_MEAN_BGR
+
+IMG_SIZE = (256, 256)
+
+
+def _sample_jpeg(width: int, height: int) -> bytes:
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    buf = BytesIO()
+    Image.fromarray(pixels).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _legacy(data: bytes) -> int:
+    image = Image.open(BytesIO(data)).convert("RGB").resize(IMG_SIZE)
+    arr = np.asarray(image, dtype=np.float32)
+    arr = arr[..., ::-1] - VGG16_MEAN_BGR  # معادل preprocess_input (caffe)
+    return len(json.dumps({"instances": [arr.tolist()]}))
+
+
+def _make_pooled(threads: int):
+    engine = PreprocessEngine(IMG_SIZE, pool_size=threads)
+
+    def run(data: bytes) -> int:
+        with engine.preprocess(data) as tensor:
+            return len(engine.encode_instances(tensor))
+
+    return run
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # ویندوز
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # لینوکس: KB
+
+
+def run_mode(mode: str, threads: int, requests: int, data: bytes) -> dict:
+    fn = _legacy if mode == "legacy" else _make_pooled(threads)
+    fn(data)  # warm-up
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    fn(data)
+    _, single_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(fn, [data] * requests))
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": mode,
+        "req_per_s": round(requests / elapsed, 1),
+        "per_call_peak_mb": round((single_peak - base) / 2**20, 2),
+        "traced_peak_mb": round(traced_peak / 2**20, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--mode", choices=["legacy", "pooled"], help="(داخلی) فقط یک مسیر را اجرا کن")
+    args = ap.parse_args()
+
+    data = _sample_jpeg(args.width, args.height)
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.threads, args.requests, data)))
+        return
+
+    print(f">> {args.requests} requests, {args.threads} threads, frame {args.width}x{args.height}")
+    for mode in ("legacy", "pooled"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode,
+             "--threads", str(args.threads), "--requests", str(args.requests),
+             "--width", str(args.width), "--height", str(args.height)],
+            check=True, capture_output=True, text=True,
+        )
+        print(out.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# back/scripts/bench_response_cache.py
+"""
+تأخیر و تعداد کوئری مسیرهای عمومی با و بدون کش پاسخ (respcache)
+
+برای هر مسیر (/news/، /articles/، /guide/، /guide/{slug}) میانهٔ زمان پاسخ
+(از طریق TestClient، شامل سریال‌سازی) و تعداد کوئری SQL یک درخواست چاپ می‌شود:
+- no-cache : RESPONSE_CACHE_MAX_BYTES=0 (مسیر قبلی: کوئری + Pydantic + JSON)
+- cached   : کش گرم (فقط کوئری نسخهٔ تغییر + فرستادن bytes ذخیره‌شده)
+در پایان آمار کش (hit_ratio، حجم) هم چاپ می‌شود.
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_response_cache.py --items 2000 --guide 12 --repeat 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+import main
+import model
+import respcache
+import sqlstats
+from database import engine
+
+
+def _seed(items: int, guide: int) -> None:
+    start = datetime.utcnow() - timedelta(minutes=items)
+    rows = [
+        {
+            "title": f"عنوان {i}",
+            "summary": "خلاصهٔ کوتاه برای نمایش در فهرست",
+            "content": "متن کامل " * 50,
+            "category": ("recycle", "city", "event")[i % 3],
+            "created_at": start + timedelta(minutes=i),
+            "updated_at": start + timedelta(minutes=i),
+        }
+        for i in range(items)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(model.NewsTable), rows)
+        conn.execute(insert(model.ArticleTable), [{k: v for k, v in r.items() if k != "summary"} for r in rows])
+        for c in range(guide):
+            cat_id = conn.execute(
+                insert(model.GuideCategoryTable).values(
+                    slug=f"cat-{c}", name=f"دسته {c}", description="توضیح", color="border-blue-300 bg-blue-50"
+                )
+            ).inserted_primary_key[0]
+            conn.execute(insert(model.GuideItemTable), [
+                {"category_id": cat_id, "kind": kind, "text": f"نمونهٔ {kind.value} {j}"}
+                for kind in model.GuideItemKind for j in range(8)
+            ])
+
+
+def _measure(client: TestClient, url: str, repeat: int) -> tuple[float, int]:
+    client.get(url)  # گرم کردن (و پر کردن کش در حالت cached)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        r = client.get(url)
+        times.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200, r.text
+    with sqlstats.max_queries(10**6) as st:
+        client.get(url)
+    return statistics.median(times), st.queries
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=2000)
+    ap.add_argument("--guide", type=int, default=12, help="تعداد دسته‌های راهنما")
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    _seed(args.items, args.guide)
+    urls = ["/news/", "/articles/", "/guide/", "/guide/cat-0"]
+    enabled = respcache.RESPONSE_CACHE_MAX_BYTES
+
+    rows = []
+    with TestClient(main.app) as client:
+        for url in urls:
+            respcache.RESPONSE_CACHE_MAX_BYTES = 0
+            base = _measure(client, url, args.repeat)
+            respcache.RESPONSE_CACHE_MAX_BYTES = enabled
+            rows.append((url, base, _measure(client, url, args.repeat)))
+
+    print(f"{'route':14} {'no-cache':>16} {'cached':>16}")
+    for url, (b_ms, b_q), (c_ms, c_q) in rows:
+        print(f"{url:14} {b_ms:7.2f} ms {b_q:2d} q  {c_ms:7.2f} ms {c_q:2d} q")
+    print(respcache.stats())
+
+
+if __name__ == "__main__":
+    main_()
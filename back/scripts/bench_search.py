@@ -0,0 +1,137 @@
+# back/scripts/bench_search.py
+"""
+تأخیر جستجو روی یک پیکرهٔ بزرگ (پیش‌فرض ۱۰۰هزار سند: ۶۰٪ خبر، ۳۰٪ مقاله، ۱۰٪ آیتم راهنما)
+
+حالت‌ها (مستقیم روی search.py با AsyncSession؛ بدون HTTP):
+- fts5 : نمایهٔ FTS5 (پیش‌فرض SQLite)
+- like : LIKE '%...%' روی ستون‌های اصلی (همان جستجوی ساده‌ای که بدون نمایه نوشته می‌شد)
+برای هر عبارت میانهٔ زمان صفحهٔ اول (۲۰ نتیجه) چاپ می‌شود. متن‌ها از یک واژگان فارسی
+با توزیع نامتوازن ساخته می‌شوند (بعضی واژه‌ها پرتکرار، بعضی نادر) و نیمی از «ی/ک»ها
+عربی نوشته می‌شوند تا یکسان‌سازی هم سنجیده شود.
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_search.py --docs 100000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+
+from sqlalchemy import insert
+
+import main  # noqa: F401  (ساخت جدول‌ها و نمایه)
+import model
+import search
+from database import AsyncSessionLocal, engine
+
+WORDS = (
+    "بازیافت پسماند پلاستیک کاغذ شیشه فلز بطری قوطی کارتن زباله تفکیک محله شهرداری طرح جدید "
+    "شهروندان آموزش محیط زیست کمپوست باتری لامپ روغن پارچه لباس الکترونیک مقوا نایلون کیسه "
+    "جمع‌آوری ایستگاه غرفه مدرسه پارک هفته روز سال برنامه کاهش مصرف انرژی آب هوا آلودگی "
+    "سلامت کودکان خانواده همکاری مشارکت داوطلب جایزه مسابقه گزارش آمار افزایش کاهش درصد"
+).split()
+RARE = ["ورمی‌کمپوست", "میکروپلاستیک", "تتراپک", "آلومینیوم"]
+QUERIES = {
+    "common": "بازیافت",
+    "two-words": "بطری پلاستیک",
+    "rare": "تتراپک",
+    "arabic-yeh": "كيسه",
+    "prefix": "الکترون",
+    "no-match": "فضاپیما",
+}
+
+
+def _arabic(s: str, rnd: random.Random) -> str:
+    return s.replace("ی", "ي").replace("ک", "ك") if rnd.random() < 0.5 else s
+
+
+def _text(rnd: random.Random, n: int) -> str:
+    words = rnd.choices(WORDS, weights=[1 / (i + 1) for i in range(len(WORDS))], k=n)
+    if rnd.random() < 0.01:
+        words[rnd.randrange(n)] = rnd.choice(RARE)
+    return _arabic(" ".join(words), rnd)
+
+
+def _seed(docs: int) -> None:
+    rnd = random.Random(42)
+    n_news, n_articles = int(docs * 0.6), int(docs * 0.3)
+    n_items = docs - n_news - n_articles
+    with engine.begin() as conn:
+        for i in range(0, n_news, 5000):
+            conn.execute(insert(model.NewsTable), [
+                {"title": _text(rnd, 6), "summary": _text(rnd, 12), "content": _text(rnd, 80)}
+                for _ in range(min(5000, n_news - i))
+            ])
+        for i in range(0, n_articles, 5000):
+            conn.execute(insert(model.ArticleTable), [
+                {"title": _text(rnd, 6), "content": _text(rnd, 150)}
+                for _ in range(min(5000, n_articles - i))
+            ])
+        cats = [
+            conn.execute(insert(model.GuideCategoryTable).values(
+                slug=f"cat-{c}", name=f"دسته {c}", description="توضیح")).inserted_primary_key[0]
+            for c in range(20)
+        ]
+        conn.execute(insert(model.GuideItemTable), [
+            {"category_id": rnd.choice(cats), "kind": model.GuideItemKind.yes, "text": _text(rnd, 5)}
+            for _ in range(n_items)
+        ])
+
+
+async def _measure(q: str, repeat: int) -> tuple[float, int]:
+    times, n = [], 0
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            n = len(await search.search(db, q, limit=20))
+            times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), n
+
+
+async def _run(repeat: int, like_repeat: int) -> None:
+    results = {}
+    for name, backend in (("fts5", search.Fts5Backend()), ("like", search.LikeBackend())):
+        search.backend = backend
+        for label, q in QUERIES.items():
+            results[name, label] = await _measure(q, repeat if name == "fts5" else like_repeat)
+    print(f"{'query':12} {'fts5':>18} {'like':>18}")
+    for label in QUERIES:
+        (f_ms, f_n), (l_ms, l_n) = results["fts5", label], results["like", label]
+        print(f"{label:12} {f_ms:9.2f} ms {f_n:3d} hits {l_ms:9.2f} ms {l_n:3d} hits")
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--like-repeat", type=int, default=3, help="تکرار حالت like (کند)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    _seed(args.docs)
+    print(f">> seeded {args.docs} docs in {time.perf_counter() - t0:.1f}s")
+    t0 = time.perf_counter()
+    search.rebuild(engine)
+    print(f">> full rebuild of the index in {time.perf_counter() - t0:.1f}s")
+    with engine.connect() as conn:  # حالت پایدار: WAL بزرگ بارگذاری اولیه به فایل اصلی منتقل شود
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    asyncio.run(_run(args.repeat, args.like_repeat))
+
+
+if __name__ == "__main__":
+    main_()
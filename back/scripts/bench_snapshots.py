@@ -0,0 +1,102 @@
+# back/scripts/bench_snapshots.py
+"""
+خواندن ناشناس فهرست‌های عمومی: هندلر API در برابر snapshot ایستا (snapshots.py)
+
+حالت‌ها (همه از طریق TestClient؛ پروکسی جلویی از این هم سریع‌تر است چون اصلاً به پایتون نمی‌رسد):
+- api-miss     : GET /news/ وقتی respcache خالی است (کوئری + سریال‌سازی)
+- api-hit      : GET /news/ از respcache (هنوز هندلر + کوئری نسخه)
+- static       : GET /snapshots/news.json (بدون فشرده‌سازی)
+- static-gzip  : همان با Accept-Encoding: gzip (فایل .gz از قبل ساخته‌شده)
+برای /guide/ هم همین چهار حالت. و زمان publish کامل/تدریجی.
+
+اسکریپت روی یک دیتابیس SQLite و پوشهٔ snapshot موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_snapshots.py --news 20000 --categories 40 --repeat 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+os.environ.setdefault("SNAPSHOT_DIR", os.path.join(os.getcwd(), "snapshots"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+import main
+import model
+import respcache
+import snapshots
+from database import engine
+
+
+def _seed(news: int, categories: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(insert(model.NewsTable), [
+            {"title": f"خبر شمارهٔ {i}", "summary": "خلاصهٔ کوتاه خبر برای نمایش در فهرست", "content": "متن",
+             "image": f"/uploads/news/{i}.jpg"}
+            for i in range(news)
+        ])
+        for c in range(categories):
+            cat = conn.execute(insert(model.GuideCategoryTable).values(
+                slug=f"cat-{c}", name=f"دسته {c}", description="توضیح کوتاه دسته")).inserted_primary_key[0]
+            conn.execute(insert(model.GuideItemTable), [
+                {"category_id": cat, "kind": model.GuideItemKind.yes, "text": f"آیتم قابل بازیافت شمارهٔ {k}"}
+                for k in range(25)
+            ])
+
+
+def _measure(client: TestClient, url: str, repeat: int, clear: bool = False, **headers) -> tuple[float, int]:
+    times, size = [], 0
+    for _ in range(repeat):
+        if clear:
+            respcache.cache.invalidate(frozenset(snapshots.NAMES))
+        t0 = time.perf_counter()
+        r = client.get(url, headers=headers)
+        times.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200, r.text
+        size = int(r.headers.get("content-length", len(r.content)))
+    return statistics.median(times), size
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--news", type=int, default=20_000)
+    ap.add_argument("--categories", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    _seed(args.news, args.categories)
+    t0 = time.perf_counter()
+    snapshots.publish(engine, force=True)
+    full_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    snapshots.publish(engine, [snapshots.changes.NEWS], force=True)
+    news_ms = (time.perf_counter() - t0) * 1000
+    print(f">> publish all {full_ms:.1f} ms, news only {news_ms:.1f} ms (brotli: {'yes' if snapshots.brotli else 'no'})")
+
+    plain = {"Accept-Encoding": "identity"}
+    with TestClient(main.app) as client:
+        for api, static in (("/news/", "/snapshots/news.json"), ("/guide/", "/snapshots/guide.json")):
+            rows = [
+                ("api-miss", *_measure(client, api, args.repeat, clear=True, **plain)),
+                ("api-hit", *_measure(client, api, args.repeat, **plain)),
+                ("static", *_measure(client, static, args.repeat, **plain)),
+                ("static-gzip", *_measure(client, static, args.repeat, **{"Accept-Encoding": "gzip"})),
+            ]
+            for label, ms, size in rows:
+                print(f"{api:8} {label:12} {ms:8.3f} ms  {size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,130 @@
+# back/scripts/bench_sync.py
+"""
+حجم و تأخیر همگام‌سازی اپ آفلاین: دانلود کامل در برابر GET /sync?since=<token>
+
+سناریو: آرشیو (پیش‌فرض ۲۰هزار خبر + ۵هزار مقاله + راهنما) یک بار کامل همگام می‌شود؛ بعد
+ادمین --edits تغییر می‌دهد (ویرایش، درج، حذف) و کلاینت فقط دلتا را می‌گیرد.
+- full-legacy : همان کاری که اپ در هر اجرا می‌کرد (فهرست کامل خبرها/مقالات با content + /guide/)
+- full-sync   : GET /sync از صفر (صفحه‌های ۵۰۰۰تایی تا has_more=false)
+- delta       : GET /sync?since=... بعد از تغییرات
+- no-change   : GET /sync?since=... وقتی چیزی عوض نشده
+
+اسکریپت روی یک دیتابیس SQLite موقت اجرا می‌شود و به zebin.db دست نمی‌زند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_sync.py --news 20000 --articles 5000 --edits 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, update
+
+import main
+import model
+from database import engine
+
+FIELDS = "title,summary,content,category,image,source,created_at,updated_at"
+BODY = "پسماند خشک را از تر جدا کنید و بطری‌ها را بشویید. " * 20
+
+
+def _seed(news: int, articles: int) -> None:
+    with engine.begin() as conn:
+        for i in range(0, news, 5000):
+            conn.execute(insert(model.NewsTable), [
+                {"title": f"خبر {j}", "summary": "خلاصهٔ خبر", "content": BODY} for j in range(i, min(news, i + 5000))
+            ])
+        conn.execute(insert(model.ArticleTable), [{"title": f"مقاله {j}", "content": BODY} for j in range(articles)])
+        for c in range(20):
+            cat = conn.execute(insert(model.GuideCategoryTable).values(
+                slug=f"cat-{c}", name=f"دسته {c}", description="توضیح")).inserted_primary_key[0]
+            conn.execute(insert(model.GuideItemTable), [
+                {"category_id": cat, "kind": model.GuideItemKind.yes, "text": f"آیتم {k}"} for k in range(30)
+            ])
+
+
+def _edit(edits: int) -> None:
+    with engine.begin() as conn:
+        for i in range(1, edits // 2 + 1):
+            conn.execute(update(model.NewsTable).where(model.NewsTable.id == i * 7).values(title=f"ویرایش {i}"))
+        conn.execute(insert(model.NewsTable), [
+            {"title": f"تازه {i}", "summary": "خلاصه", "content": BODY} for i in range(edits - edits // 2 - 1)
+        ])
+        conn.execute(delete(model.ArticleTable).where(model.ArticleTable.id == 3))
+
+
+def _full_legacy(client: TestClient) -> int:
+    size, cursor = 0, None
+    for url in ("/news/", "/articles/"):
+        while True:
+            r = client.get(url, params={"fields": FIELDS, "limit": 200, **({"cursor": cursor} if cursor else {})})
+            size += len(r.content)
+            cursor = r.headers.get("x-next-cursor")
+            if not cursor:
+                break
+    return size + len(client.get("/guide/").content)
+
+
+def _sync(client: TestClient, since: str | None) -> tuple[int, str]:
+    size = 0
+    while True:
+        r = client.get("/sync", params={"limit": 5000, **({"since": since} if since else {})})
+        assert r.status_code == 200, r.text
+        size += len(r.content)
+        body = r.json()
+        since = body["token"]
+        if not body["has_more"]:
+            return size, since
+
+
+def _timed(fn, repeat: int):
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), out
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--news", type=int, default=20_000)
+    ap.add_argument("--articles", type=int, default=5_000)
+    ap.add_argument("--edits", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    _seed(args.news, args.articles)
+    print(f">> seeded {args.news} news + {args.articles} articles in {time.perf_counter() - t0:.1f}s")
+
+    with TestClient(main.app) as client:
+        legacy_ms, legacy_size = _timed(lambda: _full_legacy(client), 1)
+        full_ms, (full_size, token) = _timed(lambda: _sync(client, None), 1)
+        idle_ms, (idle_size, _) = _timed(lambda: _sync(client, token), args.repeat)
+        _edit(args.edits)
+        delta_ms, (delta_size, _) = _timed(lambda: _sync(client, token), args.repeat)
+
+    for label, ms, size in (
+        ("full-legacy", legacy_ms, legacy_size),
+        ("full-sync", full_ms, full_size),
+        ("delta", delta_ms, delta_size),
+        ("no-change", idle_ms, idle_size),
+    ):
+        print(f"{label:12} {ms:9.1f} ms  {size / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main_()
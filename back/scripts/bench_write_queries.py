@@ -0,0 +1,87 @@
+# back/scripts/bench_write_queries.py
+"""
+تعداد کوئری SQL هر اندپوینت نوشتنی (با sqlstats.max_queries)
+
+هر اندپوینت یک بار روی یک دیتابیس SQLite موقت صدا زده می‌شود و تعداد دستورهای
+اجراشده (شامل INSERT/UPDATE/DELETE و SELECTها؛ بدون BEGIN/COMMIT) چاپ می‌شود.
+احراز هویت ادمین فقط از روی توکن است (get_current_claims) و کوئری ندارد؛
+مسیرهای get_current_user (نشانک‌ها، /me) با کش Principal گرم اندازه‌گیری می‌شوند.
+مدل پیش‌بینی با یک تابع ثابت جایگزین می‌شود (TensorFlow لازم نیست).
+
+نحوۀ اجرا:
+    cd back
+    python scripts/bench_write_queries.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(tempfile.mkdtemp(prefix="zebin-bench-"))  # sqlite:///./zebin.db → پوشهٔ موقت
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_SIGNUP_IP", "0")
+
+from fastapi.testclient import TestClient
+
+import main
+import sqlstats
+from routers import predict
+
+predict._classify = lambda raw: ("plastic", 0.9)
+
+
+def main_():
+    rows = []
+
+    with TestClient(main.app) as client:
+        def measure(label, method, url, expect, **kw):
+            with sqlstats.max_queries(10**6) as st:
+                r = client.request(method, url, **kw)
+            assert r.status_code == expect, (label, r.status_code, r.text)
+            rows.append((label, st.queries))
+            return r
+
+        client.post("/users/signup", json={"username": "admin@example.com", "password": "secret123", "role": "admin"})
+        client.post("/users/signup", json={"username": "user@example.com", "password": "secret123"})
+        login = lambda u: client.post("/users/login", json={"username": u, "password": "secret123"}).json()
+        A = {"Authorization": f"Bearer {login('admin@example.com')['access_token']}"}
+        U = {"Authorization": f"Bearer {login('user@example.com')['access_token']}"}
+        client.get("/users/me", headers=U)  # گرم کردن کش Principal
+
+        news = {"title": "t", "summary": "s", "content": "c"}
+        measure("POST /news", "POST", "/news/", 201, json=news, headers=A)
+        measure("PUT /news/{id}", "PUT", "/news/1", 200, json={**news, "title": "t2"}, headers=A)
+        measure("POST /articles", "POST", "/articles/", 201, json={"title": "t", "content": "c"}, headers=A)
+        measure("PUT /articles/{id}", "PUT", "/articles/1", 200, json={"title": "t2"}, headers=A)
+        measure("POST /bookmarks", "POST", "/bookmarks", 201,
+                json={"target_type": "news", "target_id": "1"}, headers=U)
+        measure("DELETE /bookmarks/{t}/{id}", "DELETE", "/bookmarks/news/1", 204, headers=U)
+        measure("POST /notifs", "POST", "/notifs", 201, json={"title": "hi", "user_id": 2}, headers=A)
+        measure("PATCH /notifs/{id}/read", "PATCH", "/notifs/1/read", 204, headers=U)
+        measure("DELETE /notifs/{id}", "DELETE", "/notifs/1", 204, headers=A)
+        measure("POST /guide", "POST", "/guide/", 201, json={"name": "plastic", "description": "d"}, headers=A)
+        measure("PUT /guide/{slug}", "PUT", "/guide/plastic", 200, json={"color": "c"}, headers=A)
+        measure("POST /guide/{slug}/items", "POST", "/guide/plastic/items", 201,
+                json={"kind": "yes", "text": "bottle"}, headers=A)
+        measure("PUT /guide/items/{id}", "PUT", "/guide/items/1", 200, json={"text": "bottles"}, headers=A)
+        measure("DELETE /guide/items/{id}", "DELETE", "/guide/items/1", 204, headers=A)
+        client.post("/guide/plastic/items", json={"kind": "no", "text": "bag"}, headers=A)
+        measure("DELETE /guide/{slug}", "DELETE", "/guide/plastic", 204, headers=A)
+        measure("PATCH /users/{id}/role", "PATCH", "/users/2/role", 200, json={"role": "admin"}, headers=A)
+        r = measure("POST /predict (save)", "POST", "/predict/", 200,
+                    files={"file": ("a.jpg", b"x", "image/jpeg")}, data={"save": "true"}, headers=U)
+        measure("DELETE /me/photos/{id}", "DELETE", f"/me/photos/{r.json()['photo_id']}", 204, headers=U)
+        measure("DELETE /articles/{id}", "DELETE", "/articles/1", 204, headers=A)
+        measure("DELETE /news/{id}", "DELETE", "/news/1", 204, headers=A)
+
+    width = max(len(label) for label, _ in rows)
+    for label, n in rows:
+        print(f"{label:{width}}  {n}")
+
+
+if __name__ == "__main__":
+    main_()
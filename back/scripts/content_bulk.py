@@ -0,0 +1,114 @@
+# back/scripts/content_bulk.py
+"""
+ورود/خروج گروهی خبرها و مقالات از خط فرمان (همان منطق POST/GET /content/bulk/{kind})
+
+- import: فایل CSV/NDJSON را جریانی می‌خواند، هر سطر را با NewsImportRow/ArticleImportRow
+  اعتبارسنجی و در دسته‌های --batch-size (هر دسته یک تراکنش) upsert می‌کند؛ در پایان گزارش
+  JSON (موفق/ناموفق + خطای هر سطر) چاپ می‌شود. نسخهٔ تغییر محتوا هم زیاد می‌شود تا ETag و
+  کش پاسخ سرور در حال اجرا باطل شوند.
+- export: همهٔ ردیف‌ها به ترتیب id با cursor سمت سرور (yield_per) خوانده و تکه‌تکه در فایل
+  (یا stdout) نوشته می‌شوند.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/content_bulk.py import news old_cms_news.ndjson
+    python scripts/content_bulk.py import articles articles.csv --batch-size 1000
+    python scripts/content_bulk.py export news -o news.ndjson
+    python scripts/content_bulk.py export articles --format csv -o articles.csv
+
+محیط/دیتابیس: از پیکربندی database.py (DATABASE_URL) استفاده می‌کند.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import bulkio
+import changes
+import contentio
+import model
+from database import SessionLocal, engine
+
+
+def _import(args) -> int:
+    kind = contentio.KINDS[args.kind]
+    fmt = bulkio.detect_format(args.file, None, args.format)
+    if fmt is None:
+        sys.exit("قالب فایل باید csv یا ndjson باشد (--format)")
+
+    report = bulkio.BulkReport()
+    started = time.perf_counter()
+    seen: set[int] = set()
+    with open(args.file, "rb") as f, SessionLocal() as db:
+        for batch in bulkio.batched(bulkio.iter_records(f, fmt), args.batch_size):
+            rows = contentio.validate(kind, batch, report, seen)
+            if not rows:
+                continue
+            failures = contentio.apply_batch(db, kind, rows)
+            for line, error in failures:
+                report.fail(line, error)
+            report.succeeded += len(rows) - len(failures)
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "processed": report.processed,
+        "succeeded": report.succeeded,
+        "failed": report.failed,
+        "errors": sorted(report.errors, key=lambda e: e["line"]),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_sec": round(report.processed / elapsed, 1) if elapsed > 0 else 0.0,
+    }, ensure_ascii=False, indent=2))
+    return 1 if report.failed else 0
+
+
+def _export(args) -> int:
+    kind = contentio.KINDS[args.kind]
+    cols = contentio.columns(kind)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    rows = 0
+    try:
+        with engine.connect() as conn:
+            if args.format == "csv":
+                out.write(bulkio.encode_csv(cols, [], header=True))
+            for part in conn.execute(contentio.export_query(kind)).partitions():
+                out.write(bulkio.encode_csv(cols, part) if args.format == "csv" else bulkio.encode_ndjson(cols, part))
+                rows += len(part)
+    finally:
+        if args.output:
+            out.close()
+    print(f">> exported {rows} {kind.name}", file=sys.stderr)
+    return 0
+
+
+def main_():
+    ap = argparse.ArgumentParser(description="ورود/خروج گروهی خبرها و مقالات")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="ورود از فایل CSV/NDJSON")
+    imp.add_argument("kind", choices=sorted(contentio.KINDS))
+    imp.add_argument("file")
+    imp.add_argument("--format", choices=bulkio.FORMATS, help="اگر نباشد از پسوند فایل")
+    imp.add_argument("--batch-size", type=int, default=bulkio.BULK_BATCH_SIZE)
+    imp.set_defaults(run=_import)
+
+    exp = sub.add_parser("export", help="خروجی جریانی NDJSON/CSV")
+    exp.add_argument("kind", choices=sorted(contentio.KINDS))
+    exp.add_argument("--format", choices=bulkio.FORMATS, default="ndjson")
+    exp.add_argument("-o", "--output", help="فایل خروجی (پیش‌فرض stdout)")
+    exp.set_defaults(run=_export)
+
+    args = ap.parse_args()
+    # اسکریپت ممکن است روی دیتابیس تازه اجرا شود
+    model.Base.metadata.create_all(bind=engine)
+    model.ensure_columns(engine)
+    changes.ensure_versions(engine)
+    sys.exit(args.run(args))
+
+
+if __name__ == "__main__":
+    main_()
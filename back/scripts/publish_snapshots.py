@@ -0,0 +1,47 @@
+# back/scripts/publish_snapshots.py
+"""
+انتشار snapshotهای ایستای /guide/، /news/ و /articles/ در SNAPSHOT_DIR (snapshots.py)
+
+سرور در حال اجرا بعد از هر نوشتن ادمین خودش snapshotها را به‌روز می‌کند؛ این اسکریپت برای
+وقتی است که داده از بیرون سرور تغییر کرده (مثلاً scripts/content_bulk.py یا seed.py) یا
+پوشه روی سرور دیگری (پشت پروکسی) ساخته می‌شود. فقط دسته‌هایی که نسخه‌شان عوض شده نوشته
+می‌شوند؛ با --force همه.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/publish_snapshots.py
+    python scripts/publish_snapshots.py --only news --force
+    SNAPSHOT_DIR=/var/www/zebin/snapshots python scripts/publish_snapshots.py
+
+محیط/دیتابیس: از پیکربندی database.py (DATABASE_URL) استفاده می‌کند.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import snapshots
+from database import engine
+
+
+def main_():
+    ap = argparse.ArgumentParser(description="انتشار snapshotهای JSON ایستا")
+    ap.add_argument("--only", choices=snapshots.NAMES, action="append", help="فقط این دسته (قابل تکرار)")
+    ap.add_argument("--force", action="store_true", help="حتی اگر نسخه عوض نشده باشد")
+    ap.add_argument("--dir", default=snapshots.SNAPSHOT_DIR, help="پوشهٔ خروجی (پیش‌فرض SNAPSHOT_DIR)")
+    args = ap.parse_args()
+    if not args.dir:
+        sys.exit("SNAPSHOT_DIR خالی است (--dir)")
+
+    t0 = time.perf_counter()
+    published = snapshots.publish(engine, args.only or snapshots.NAMES, args.dir, force=args.force)
+    print(f">> published {published or 'nothing (up to date)'} to {args.dir} "
+          f"in {(time.perf_counter() - t0) * 1000:.1f} ms (brotli: {'yes' if snapshots.brotli else 'no'})")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,66 @@
+# back/scripts/rebuild_facets.py
+"""
+ساخت دوبارهٔ شمارنده‌های دسته (category_count) از روی جدول‌های خبر و مقاله
+
+شمارنده‌ها در حالت عادی با تریگرهای SQLite یا مسیر نوشتن برنامه همگام می‌مانند (facets.py)؛
+این اسکریپت برای وقتی است که داده مستقیماً و بیرون از آن‌ها تغییر کرده (مثلاً بازیابی نسخهٔ
+پشتیبان یک جدول، یا نوشتن با ابزار بیرونی روی دیتابیس server).
+با --check فقط اختلاف شمارنده‌ها با GROUP BY واقعی گزارش می‌شود و چیزی نوشته نمی‌شود.
+
+نحوۀ اجرا:
+    cd back
+    python scripts/rebuild_facets.py
+    python scripts/rebuild_facets.py --check
+
+محیط/دیتابیس: از پیکربندی database.py (DATABASE_URL) استفاده می‌کند.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import select
+
+import facets
+import model
+from database import engine
+
+
+def _drift() -> list[tuple[str, str, int, int]]:
+    """[(منبع، دسته، شمارنده، مقدار واقعی)] برای دسته‌هایی که با هم نمی‌خوانند."""
+    C = model.CategoryCount
+    out = []
+    with engine.connect() as conn:
+        for kind, table in facets.SOURCES.items():
+            stored = dict(conn.execute(select(C.category, C.count).where(C.kind == kind)).all())
+            actual = dict(conn.execute(facets._group_by(table)).all())
+            for category in sorted(stored.keys() | actual.keys()):
+                if stored.get(category, 0) != actual.get(category, 0):
+                    out.append((kind, category, stored.get(category, 0), actual.get(category, 0)))
+    return out
+
+
+def main_():
+    ap = argparse.ArgumentParser(description="ساخت دوبارهٔ شمارنده‌های دسته (facets)")
+    ap.add_argument("--check", action="store_true", help="فقط گزارش اختلاف، بدون نوشتن")
+    args = ap.parse_args()
+
+    model.Base.metadata.create_all(bind=engine)
+    if args.check:
+        drift = _drift()
+        for kind, category, stored, actual in drift:
+            print(f"{kind:9} {category or '(بدون دسته)':30} stored={stored} actual={actual}")
+        print(">> in sync" if not drift else f">> {len(drift)} categories out of sync")
+        sys.exit(1 if drift else 0)
+
+    t0 = time.perf_counter()
+    totals = facets.rebuild(engine)
+    print(f">> rebuilt {totals} in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,299 @@
+# back/search.py
+# ---------------------------------------------------------------------------
+# جستجوی متن کامل در خبرها، مقالات و آیتم‌های راهنما (GET /search)
+# - همهٔ متن‌ها با textnorm.normalize یکسان می‌شوند (ی/ک عربی، نیم‌فاصله، اعراب، ارقام).
+# - backend قابل تعویض (SEARCH_BACKEND):
+#     fts5 (پیش‌فرض SQLite): برای هر منبع یک جدول مجازی FTS5 (news_fts, articles_fts,
+#          guide_item_fts) با rowid = id ردیف اصلی؛ متن یکسان‌شده در آن ذخیره می‌شود.
+#          جدول‌های اصلی تریگر مخصوص جستجو ندارند: ردیف‌های تغییرکرده از sync_log (تریگرهای
+#          SQL خالص sync.py) بعد از search_state.seq خوانده، در پایتون normalize و نمایه می‌شوند
+#          (catch_up). نوشتن‌های برنامه (mark_changed خبر/مقاله/راهنما) این کار را در همان
+#          تراکنش پیش از commit می‌کنند؛ نوشتن از بیرون برنامه (sqlite3 CLI، ابزار مهاجرت) خطا
+#          نمی‌دهد و در نوشتن بعدی برنامه یا راه‌اندازی بعدی نمایه می‌شود.
+#          رتبه با bm25 (وزن عنوان ۱۰ برابر متن) روی همهٔ تطبیق‌ها؛ snippet (با <mark>، از متن یا
+#          اگر تطبیق فقط در عنوان است از عنوان) فقط برای ردیف‌های صفحه.
+#     like (پیش‌فرض Postgres/MySQL): LIKE روی ستون‌های اصلی بدون ایندکس متنی — فقط برای
+#          این‌که API روی دیتابیس سرور هم کار کند؛ برای بار واقعی یک backend مخصوص همان
+#          دیتابیس (مثلاً tsvector در Postgres) با همین رابط (setup / search) اضافه کنید.
+# - ensure_search(engine) در main.py (بعد از ensure_sync): ساخت جدول‌ها، پر کردن اولیهٔ نمایه و
+#   نمایه کردن تغییرات عقب‌مانده (idempotent).
+#   rebuild(engine) نمایه را از نو می‌سازد (مثلاً بعد از نوشتن مستقیم در دیتابیس).
+# ---------------------------------------------------------------------------
+
+from dataclasses import dataclass
+import html
+import os
+import re
+
+from sqlalchemy import and_, bindparam, event, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import changes
+import model
+from database import IS_SQLITE
+from textnorm import normalize
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "fts5" if IS_SQLITE else "like")
+SEARCH_MAX_TERMS = 8
+SEARCH_MAX_OFFSET = 1000       # رتبه‌بندی عمیق‌تر از این معنای عملی ندارد
+SNIPPET_TOKENS = 16
+
+KINDS = (changes.NEWS, changes.ARTICLES, changes.GUIDE)
+
+_TERM = re.compile(r"\w+")
+
+
+@dataclass
+class Hit:
+    kind: str                 # news | articles | guide
+    id: int                   # شناسهٔ خبر/مقاله/آیتم راهنما
+    title: str                # عنوان اصلی (برای guide: نام دسته)
+    snippet: str              # گزیدهٔ یکسان‌شده، HTML-escaped با <mark>…</mark>
+    score: float              # بزرگ‌تر = مرتبط‌تر
+    slug: str | None = None   # فقط guide: اسلاگ دسته (لینک /guide/{slug})
+
+
+def terms(q: str) -> list[str]:
+    """عبارت کاربر → واژه‌های یکسان‌شده (حداکثر SEARCH_MAX_TERMS)."""
+    return _TERM.findall(normalize(q))[:SEARCH_MAX_TERMS]
+
+
+def snippet(norm_body: str, words: list[str], size: int = SNIPPET_TOKENS, norm_title: str = "") -> str:
+    """
+    گزیدهٔ size واژه‌ای از متن یکسان‌شده حول اولین واژهٔ منطبق (تطبیق پیشوندی، مثل جستجو)؛
+    HTML-escaped با <mark>…</mark>. عبارت چندواژه‌ای (جمع آوری) شکل چسبیده را هم علامت می‌زند.
+    اگر متن واژهٔ منطبقی ندارد (تطبیق فقط در عنوان)، گزیده از عنوان یکسان‌شده ساخته می‌شود.
+    """
+    prefixes = (*words, "".join(words)) if len(words) > 1 else tuple(words)
+    marked = lambda text: [(tok, any(w.startswith(prefixes) for w in _TERM.findall(tok))) for tok in text.split()]
+    pairs = marked(norm_body)
+    if norm_title and not any(hit for _, hit in pairs):
+        title = marked(norm_title)
+        if any(hit for _, hit in title):
+            pairs = title
+    tokens = [tok for tok, _ in pairs]
+    hits = [hit for _, hit in pairs]
+    first = hits.index(True) if True in hits else 0
+    start = max(0, min(first - size // 4, len(tokens) - size))
+    piece = [
+        f"<mark>{html.escape(tok)}</mark>" if hit else html.escape(tok)
+        for tok, hit in zip(tokens[start:start + size], hits[start:start + size])
+    ]
+    return ("… " if start > 0 else "") + " ".join(piece) + (" …" if start + size < len(tokens) else "")
+
+
+# ---------- FTS5 ----------
+# منبع → (جدول اصلی، جدول FTS، عبارت عنوان، عبارت متن، نام منبع در sync_log)
+_FTS_SOURCES = {
+    changes.NEWS: ("news", "news_fts", "{r}.title", "coalesce({r}.summary, '') || ' ' || {r}.content", "news"),
+    changes.ARTICLES: ("articles", "articles_fts", "{r}.title", "coalesce({r}.summary, '') || ' ' || {r}.content",
+                       "articles"),
+    changes.GUIDE: ("guide_item", "guide_item_fts", "''", "{r}.text", "guide_items"),
+}
+_FILL_CHUNK = 2000      # ردیف در هر INSERT گروهی نمایه
+
+
+class Fts5Backend:
+    name = "fts5"
+
+    def setup(self, bind) -> None:
+        with bind.begin() as conn:
+            existing = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").scalars())
+            conn.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS search_state (id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL)"
+            )
+            for _, fts, title, body, _ in _FTS_SOURCES.values():
+                conn.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+                    "USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+                )
+                # تریگرهای نسخهٔ قبلی تابع zebin_normalize برنامه را صدا می‌زدند و نوشتن از بیرون
+                # برنامه (sqlite3 CLI، ابزار مهاجرت) روی جدول‌های اصلی را خراب می‌کردند
+                for op in ("ai", "ad", "au"):
+                    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{op}")
+            if "search_state" not in existing:
+                # نصب تازه: همهٔ نمایه‌ها از نو؛ ارتقا از تریگرها: نمایه تا همین لحظه درست است
+                fresh = any(fts not in existing for _, fts, *_ in _FTS_SOURCES.values())
+                if fresh:
+                    self._rebuild(conn)
+                conn.exec_driver_sql("INSERT INTO search_state(id, seq) VALUES (1, ?)", (self._top(conn),))
+        with bind.begin() as conn:
+            self.catch_up(conn)   # ردیف‌هایی که بیرون از برنامه نوشته شده‌اند
+
+    def rebuild(self, bind) -> None:
+        with bind.begin() as conn:
+            self._lock(conn)
+            self._rebuild(conn)
+            conn.exec_driver_sql("UPDATE search_state SET seq = ?", (self._top(conn),))
+
+    def _rebuild(self, conn) -> None:
+        for table, fts, title, body, _ in _FTS_SOURCES.values():
+            conn.exec_driver_sql(f"DELETE FROM {fts}")
+            self._index(conn, table, fts, title, body)
+            # ادغام segmentهای بارگذاری انبوه در یک b-tree (وگرنه هر جستجو همه را جدا می‌خواند)
+            conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+
+    def catch_up(self, conn) -> int:
+        """
+        نمایه کردن ردیف‌هایی که بعد از search_state.seq در sync_log آمده‌اند (متن با normalize پایتون).
+        در تراکنش همان نوشتن صدا زده می‌شود؛ خروجی: تعداد ردیف بازنمایه‌شده.
+        """
+        self._lock(conn)
+        since = conn.exec_driver_sql("SELECT seq FROM search_state").scalar()
+        top = self._top(conn)
+        if top <= since:
+            return 0
+        L = model.SyncLog
+        changed = conn.execute(select(L.kind, L.row_id).where(L.seq > since, L.seq <= top)).all()
+        count = 0
+        for table, fts, title, body, sync_kind in _FTS_SOURCES.values():
+            ids = [r.row_id for r in changed if r.kind == sync_kind]
+            for i in range(0, len(ids), _FILL_CHUNK):
+                chunk = ids[i:i + _FILL_CHUNK]
+                conn.execute(text(f"DELETE FROM {fts} WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True)),
+                             {"ids": chunk})
+                self._index(conn, table, fts, title, body, chunk)
+            count += len(ids)
+        conn.exec_driver_sql("UPDATE search_state SET seq = ?", (top,))
+        return count
+
+    @staticmethod
+    def _lock(conn) -> None:
+        # اول یک نوشتن: قفل نوشتن SQLite پیش از خواندن seq گرفته می‌شود (دو worker هم‌زمان یک بازه را
+        # نمایه نمی‌کنند و تراکنش WAL با snapshot کهنه به نوشتن ارتقا نمی‌یابد)
+        conn.exec_driver_sql("UPDATE search_state SET seq = seq")
+
+    @staticmethod
+    def _top(conn) -> int:
+        return conn.execute(select(func.max(model.SyncLog.seq))).scalar() or 0
+
+    @staticmethod
+    def _index(conn, table, fts, title, body, ids=None) -> None:
+        sql = f"SELECT t.id, {title.format(r='t')}, {body.format(r='t')} FROM {table} t"
+        stmt = text(sql + " WHERE t.id IN :ids").bindparams(bindparam("ids", expanding=True)) if ids else text(sql)
+        rows = conn.execute(stmt, {"ids": ids} if ids else {})
+        insert_sql = text(f"INSERT INTO {fts}(rowid, title, body) VALUES (:id, :title, :body)")
+        while batch := rows.fetchmany(_FILL_CHUNK):
+            conn.execute(insert_sql, [{"id": i, "title": normalize(t), "body": normalize(b)} for i, t, b in batch])
+
+    @staticmethod
+    def _match(words: list[str]) -> str:
+        # هر واژه داخل "..." (نحو FTS5 از ورودی کاربر اجرا نمی‌شود) + * برای پیشوند
+        # (بطری → بطریها؛ پسوندهای فارسی بدون فاصله)؛ واژه‌ها با AND.
+        # نیم‌فاصله در نمایه حذف شده؛ پس «جمع آوری» (با فاصله) شکل چسبیدهٔ «جمعآوری» را هم می‌گیرد.
+        query = " ".join(f'"{w}"*' if len(w) > 1 else f'"{w}"' for w in words)
+        if len(words) > 1:
+            query = f'({query}) OR "{"".join(words)}"*'
+        return query
+
+    async def search(self, db: AsyncSession, words, kinds, limit, offset) -> list[Hit]:
+        q = self._match(words)
+        # مرحلهٔ ۱: فقط رتبه (bm25) و برش صفحه؛ snippet و join با جدول اصلی برای ده‌ها هزار
+        # تطبیقِ یک واژهٔ پرتکرار گران است و فقط برای همین صفحه لازم است.
+        # bm25 روی همهٔ تطبیق‌های هر منبع حساب می‌شود و از هر منبع offset+limit بهترین (sorter با
+        # LIMIT، نه مرتب‌سازی کامل) به اجتماع می‌رود؛ پس صفحه همان برش رتبه‌بندی سراسری است.
+        rank_sql = " UNION ALL ".join(
+            f"SELECT * FROM (SELECT '{kind}' AS kind, rowid AS id, bm25({fts}, 10.0, 1.0) AS score "
+            f"FROM {fts} WHERE {fts} MATCH :q ORDER BY score, rowid LIMIT :top)"
+            for kind in kinds
+            for fts in (_FTS_SOURCES[kind][1],)
+        )
+        page = (await db.execute(
+            text(rank_sql + " ORDER BY score, kind, id LIMIT :limit OFFSET :offset"),
+            {"q": q, "top": offset + limit, "limit": limit, "offset": offset},
+        )).all()
+
+        # مرحلهٔ ۲: عنوان و متن یکسان‌شده (ستون‌های خود نمایه) فقط برای ردیف‌های صفحه؛ با rowid و
+        # بدون MATCH (تابع snippet() در FTS5 برای هر ردیف دوباره doclist واژه‌ها را می‌گردد)
+        details = {}
+        for kind in dict.fromkeys(r.kind for r in page):
+            table, fts, *_ = _FTS_SOURCES[kind]
+            if kind == changes.GUIDE:
+                sql = (
+                    f"SELECT f.rowid AS id, c.name AS title, f.title AS norm_title, f.body AS body, c.slug AS slug "
+                    f"FROM {fts} f JOIN guide_item i ON i.id = f.rowid JOIN guide_categories c ON c.id = i.category_id "
+                )
+            else:
+                sql = (
+                    f"SELECT f.rowid AS id, t.title AS title, f.title AS norm_title, f.body AS body, NULL AS slug "
+                    f"FROM {fts} f JOIN {table} t ON t.id = f.rowid "
+                )
+            stmt = text(sql + "WHERE f.rowid IN :ids").bindparams(bindparam("ids", expanding=True))
+            for d in await db.execute(stmt, {"ids": [r.id for r in page if r.kind == kind]}):
+                details[kind, d.id] = d
+        return [
+            Hit(r.kind, r.id, d.title, snippet(d.body, words, norm_title=d.norm_title), round(-r.score, 4), d.slug)
+            for r in page if (d := details.get((r.kind, r.id))) is not None
+        ]
+
+
+@event.listens_for(Session, "before_commit")
+def _index_before_commit(session: Session) -> None:
+    """نوشتن‌های برنامه (mark_changed خبر/مقاله/راهنما) نمایه را در همان تراکنش به‌روز می‌کنند."""
+    if isinstance(backend, Fts5Backend) and changes.pending(session) & set(_FTS_SOURCES):
+        backend.catch_up(session.connection())
+
+
+# ---------- LIKE (دیتابیس‌های سرور بدون backend مخصوص) ----------
+def _like_sources():
+    N, A, I, C = model.NewsTable, model.ArticleTable, model.GuideItemTable, model.GuideCategoryTable
+    return {
+        changes.NEWS: (select(N.id, N.title, N.summary, N.content), N.id, (N.title,), (N.summary, N.content)),
+        changes.ARTICLES: (select(A.id, A.title, A.summary, A.content), A.id, (A.title,), (A.summary, A.content)),
+        changes.GUIDE: (
+            select(I.id, C.name.label("title"), C.slug, I.text.label("content")).join(C, C.id == I.category_id),
+            I.id, (), (I.text,),
+        ),
+    }
+
+
+class LikeBackend:
+    """
+    رتبهٔ تقریبی: از هر منبع offset+limit ردیف جدیدتر که همهٔ واژه‌ها را دارند خوانده و
+    بر اساس تعداد تکرار (عنوان ×۱۰) مرتب می‌شود.
+    """
+    name = "like"
+
+    def setup(self, bind) -> None:
+        pass
+
+    def rebuild(self, bind) -> None:
+        pass
+
+    async def search(self, db: AsyncSession, words, kinds, limit, offset) -> list[Hit]:
+        like = lambda col, w: col.ilike(f"%{w.replace('_', '/_')}%", escape="/")
+        hits = []
+        for kind, (query, id_col, title_cols, body_cols) in _like_sources().items():
+            if kind not in kinds:
+                continue
+            cols = (*title_cols, *body_cols)
+            query = query.where(and_(*(or_(*(like(c, w) for c in cols)) for w in words)))
+            for r in await db.execute(query.order_by(id_col.desc()).limit(offset + limit)):
+                body = " ".join(filter(None, (getattr(r, "summary", None), r.content)))
+                title = normalize(r.title)
+                score = sum(10 * title.count(w) + normalize(body).count(w) for w in words)
+                hits.append(Hit(kind, r.id, r.title, snippet(normalize(body), words, norm_title=title), float(score), getattr(r, "slug", None)))
+        hits.sort(key=lambda h: (-h.score, h.kind, h.id))
+        return hits[offset: offset + limit]
+
+
+BACKENDS = {"fts5": Fts5Backend, "like": LikeBackend}
+backend = BACKENDS[SEARCH_BACKEND]()
+
+
+def ensure_search(bind) -> None:
+    """جدول‌های نمایه (اگر نیستند) + پر کردن اولیه + تغییرات عقب‌مانده. idempotent."""
+    backend.setup(bind)
+
+
+def rebuild(bind) -> None:
+    backend.rebuild(bind)
+
+
+async def search(db: AsyncSession, q: str, kinds=KINDS, limit: int = 20, offset: int = 0) -> list[Hit]:
+    """نتایج رتبه‌بندی‌شده؛ عبارت بدون واژهٔ قابل جستجو یا kinds خالی → []."""
+    words = terms(q)
+    if not words or not kinds:
+        return []
+    return await backend.search(db, words, kinds, limit, offset)
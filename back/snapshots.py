@@ -0,0 +1,336 @@
+# back/snapshots.py
+# ---------------------------------------------------------------------------
+# عکس‌های فوری (snapshot) ایستا از پاسخ‌های عمومی پرترافیک — بدون هندلر پایتون و بدون DB
+# - publish(names) بدنهٔ همان پاسخ‌های API را به‌صورت فایل JSON در SNAPSHOT_DIR می‌نویسد:
+#       guide.json          = GET /guide/
+#       guide/{slug}.json   = GET /guide/{slug}
+#       news.json           = GET /news/      (صفحهٔ اول پیش‌فرض)
+#       articles.json       = GET /articles/  (صفحهٔ اول پیش‌فرض)
+#       manifest.json       = نسخه، زمان تغییر و cursor صفحهٔ دوم هر فایل
+#   هر فایل یک نسخهٔ نسخه‌دار هم دارد (news.v42.json) که هرگز عوض نمی‌شود (کش immutable)؛
+#   SNAPSHOT_KEEP_VERSIONS نسخهٔ آخر نگه داشته می‌شوند. کنار هر فایل .gz و .br (بستهٔ brotli در
+#   requirements.txt؛ بدون آن فقط .gz) فشرده‌شده از قبل هست. نوشتن اتمی است (فایل موقت +
+#   os.replace) و کل publish زیر قفل فایل .publish.lock است: دو worker که هم‌زمان دسته‌های
+#   مختلف را منتشر کنند ورودی manifest همدیگر را پاک نمی‌کنند.
+# - بازتولید تدریجی: Publisher به changes.subscribe وصل است؛ بعد از commit نوشتن ادمین فقط
+#   دسته‌های تغییرکرده (news / articles / guide) در یک thread پس‌زمینه و با کمی تأخیر (تجمیع
+#   نوشتن‌های پیاپی، مثل ورود گروهی) دوباره ساخته می‌شوند. اگر نسخهٔ manifest با نسخهٔ DB یکی
+#   باشد (worker دیگری قبلاً ساخته) کاری انجام نمی‌شود. بعد از نوشتن از بیرون برنامه:
+#   python scripts/publish_snapshots.py
+# - سرو کردن: main.py پوشه را در /snapshots با PrecompressedStaticFiles mount می‌کند (نسخهٔ .br/.gz
+#   طبق Accept-Encoding با رعایت q؛ br;q=0 یعنی br نه). در تولید بهتر است پروکسی جلویی مستقیم سرو کند، مثلاً nginx:
+#       location /snapshots/ { alias .../snapshots/; gzip_static on; brotli_static on; }
+# - SNAPSHOT_DIR خالی = خاموش.
+# ---------------------------------------------------------------------------
+
+from contextlib import contextmanager
+from datetime import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import anyio
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+
+import changes
+import guidecache
+import model
+from pagination import DEFAULT_PAGE_SIZE, newest_first, newest_first_cursor, parse_fields
+
+try:  # در requirements.txt؛ بدون آن فقط .gz ساخته می‌شود
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:  # قفل فایل بین پروسه‌ها
+    import fcntl
+except ImportError:  # ویندوز
+    fcntl = None
+    import msvcrt
+
+BASE_DIR = Path(__file__).resolve().parent
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", str(BASE_DIR / "snapshots"))
+SNAPSHOT_KEEP_VERSIONS = int(os.getenv("SNAPSHOT_KEEP_VERSIONS", "3"))
+SNAPSHOT_DEBOUNCE_SECONDS = float(os.getenv("SNAPSHOT_DEBOUNCE_SECONDS", "0.5"))
+SNAPSHOT_MAX_AGE = int(os.getenv("SNAPSHOT_MAX_AGE", "0"))  # ثانیه؛ فایل‌های بدون نسخه
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600                          # فایل‌های نسخه‌دار
+
+logger = logging.getLogger(__name__)
+
+NAMES = (changes.NEWS, changes.ARTICLES, changes.GUIDE)
+
+_VERSIONED = re.compile(r"\.v\d+\.json(\.gz|\.br)?$")
+
+
+# ---------- ساخت بدنه‌ها (همان سریال‌سازی روترها) ----------
+def _list_page(session: Session, name: str) -> tuple[bytes, str | None]:
+    from routers import articles, news  # روترها این ماژول را وارد نمی‌کنند؛ چرخه‌ای نیست
+
+    T, adapter = {
+        changes.NEWS: (model.NewsTable, news._LIST),
+        changes.ARTICLES: (model.ArticleTable, articles._LIST),
+    }[name]
+    names = parse_fields(None, T)
+    query = newest_first(select(*(getattr(T, n) for n in names)), T.created_at, T.id, None)
+    rows = session.execute(query.limit(DEFAULT_PAGE_SIZE + 1)).all()
+    cursor = None
+    if len(rows) > DEFAULT_PAGE_SIZE:
+        rows = rows[:DEFAULT_PAGE_SIZE]
+        cursor = newest_first_cursor(rows[-1].created_at, rows[-1].id)
+    items = adapter.validate_python([{n: getattr(r, n) for n in names} for r in rows])
+    return adapter.dump_json(items, exclude_unset=True), cursor
+
+
+def _guide_files(session: Session) -> dict[str, bytes]:
+    snap = guidecache.build(session)
+    files = {"guide": snap.list_body}
+    for slug, entry in snap.by_slug.items():
+        files[f"guide/{slug}"] = entry.body
+    return files
+
+
+def _version(session: Session, name: str) -> tuple[int, datetime | None]:
+    V = model.ContentVersion
+    row = session.execute(select(V.version, V.changed_at).where(V.name == name)).first()
+    return (row.version, row.changed_at) if row else (0, None)
+
+
+# ---------- نوشتن فایل‌ها ----------
+def _write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _write_variants(path: Path, data: bytes) -> None:
+    # اول نسخه‌های فشرده، آخر JSON ساده (پروکسی‌ها وجود فایل ساده را معیار می‌گیرند)
+    _write(path.with_name(path.name + ".gz"), gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write(path.with_name(path.name + ".br"), brotli.compress(data, quality=11))
+    _write(path, data)
+
+
+def _prune(directory: Path, stem: str, keep: int) -> None:
+    """فقط keep نسخهٔ آخر منتشرشدهٔ stem (با .gz/.br) بماند."""
+    versions: dict[int, list[Path]] = {}
+    for p in directory.glob(f"{stem}.v*.json*"):
+        m = re.match(rf"{re.escape(stem)}\.v(\d+)\.json", p.name)
+        if m:
+            versions.setdefault(int(m.group(1)), []).append(p)
+    for v in sorted(versions)[:-keep or None]:
+        for p in versions[v]:
+            p.unlink(missing_ok=True)
+
+
+def _read_manifest(root: Path) -> dict:
+    try:
+        return json.loads((root / "manifest.json").read_bytes())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+@contextmanager
+def _publish_lock(root: Path):
+    """قفل انحصاری بین workerها (و threadها) برای کل publish: خواندن manifest تا نوشتن آن."""
+    root.mkdir(parents=True, exist_ok=True)
+    with _local_lock, open(root / ".publish.lock", "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK بعد از ~۱۰ ثانیه تلاش خطا می‌دهد
+                    continue
+        yield  # بسته شدن فایل قفل را آزاد می‌کند
+
+
+_local_lock = threading.Lock()
+
+
+def _snapshot(session: Session, name: str):
+    """
+    (نسخه، زمان تغییر، فایل‌ها، cursor صفحهٔ دوم) یک دسته. نسخه قبل و بعد از خواندن داده‌ها
+    خوانده می‌شود؛ اگر در این فاصله نوشتنی commit شده باشد دوباره خوانده می‌شود تا فایل و
+    نسخه‌اش همیشه با هم بخوانند.
+    """
+    while True:
+        version, changed_at = _version(session, name)
+        if name == changes.GUIDE:
+            files, cursor = _guide_files(session), None
+        else:
+            body, cursor = _list_page(session, name)
+            files = {name: body}
+        if _version(session, name)[0] == version:
+            return version, changed_at, files, cursor
+
+
+def publish(bind, names=NAMES, directory: str | None = None, force: bool = False) -> dict[str, int]:
+    """
+    بازتولید snapshotهای دسته‌های names؛ خروجی: نام → نسخهٔ منتشرشده (فقط آن‌هایی که نوشته شدند).
+    دسته‌ای که نسخهٔ manifest آن با DB یکی است رد می‌شود (مگر force).
+    """
+    root = Path(directory or SNAPSHOT_DIR)
+    with _publish_lock(root):
+        return _publish(bind, names, root, force)
+
+
+def _publish(bind, names, root: Path, force: bool) -> dict[str, int]:
+    manifest = _read_manifest(root)   # زیر قفل: آخرین نسخهٔ workerهای دیگر
+    published = {}
+    with Session(bind) as session:
+        for name in names:
+            if not force and manifest.get(name, {}).get("version") == _version(session, name)[0]:
+                continue
+            version, changed_at, files, cursor = _snapshot(session, name)
+
+            for rel, body in files.items():
+                if rel == name:
+                    _write_variants(root / f"{name}.v{version}.json", body)
+                _write_variants(root / f"{rel}.json", body)
+            if name == changes.GUIDE:  # دسته‌های حذف‌شده
+                live = {f"{rel.split('/', 1)[1]}.json" for rel in files if "/" in rel}
+                for p in (root / "guide").glob("*.json"):
+                    if p.name not in live:
+                        for variant in (p, p.with_name(p.name + ".gz"), p.with_name(p.name + ".br")):
+                            variant.unlink(missing_ok=True)
+            _prune(root, name, max(SNAPSHOT_KEEP_VERSIONS, 1))
+            manifest[name] = {
+                "version": version,
+                "changed_at": changed_at.isoformat() if changed_at else None,
+                "file": f"{name}.v{version}.json",
+                "next_cursor": cursor,
+            }
+            published[name] = version
+    if published:
+        _write(root / "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=1).encode())
+    return published
+
+
+# ---------- بازتولید پس‌زمینه بعد از نوشتن ادمین ----------
+class Publisher:
+    """
+    یک thread پس‌زمینه: نام‌های تغییرکرده را جمع می‌کند و بعد از SNAPSHOT_DEBOUNCE_SECONDS
+    آرامش، publish را فقط برای همان‌ها صدا می‌زند (بیرون از event loop؛ از Engine همگام).
+    """
+
+    def __init__(self, bind, directory: str):
+        self.bind = bind
+        self.directory = directory
+        self._pending: set[str] = set()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    def notify(self, names) -> None:
+        names = set(names) & set(NAMES)
+        if not names:
+            return
+        with self._cond:
+            self._pending |= names
+            self._cond.notify()
+
+    def start(self) -> None:
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="snapshot-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+            time.sleep(SNAPSHOT_DEBOUNCE_SECONDS)
+            with self._cond:
+                names, self._pending = self._pending, set()
+            try:
+                publish(self.bind, sorted(names), self.directory)
+            except Exception:
+                logger.exception("snapshot publish failed for %s", sorted(names))
+
+
+# ---------- سرو کردن با فایل‌های فشرده‌شده از قبل ----------
+def accepted_encodings(header: str) -> dict[str, float]:
+    """Accept-Encoding → {کدگذاری: q}؛ q نامعتبر = 0 (پذیرفته نیست)."""
+    out = {}
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        out[token] = q
+    return out
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles که اگر کلاینت بپذیرد، به‌جای x.json فایل x.json.br یا x.json.gz را با
+    Content-Encoding مناسب می‌فرستد (بدون فشرده‌سازی در لحظه). فایل‌های نسخه‌دار immutable کش می‌شوند.
+    """
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    async def get_response(self, path: str, scope):
+        qs = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        q = lambda encoding: qs.get(encoding, qs.get("*", 0.0))
+        # بیشترین q اول؛ در q برابر ترتیب ENCODINGS (br کوچک‌تر است)
+        candidates = sorted((e for e in self.ENCODINGS if q(e[0]) > 0), key=lambda e: -q(e[0]))
+        response = None
+        for encoding, suffix in candidates:
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is not None and scope["method"] in ("GET", "HEAD"):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Content-Type"] = "application/json"
+                break
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["Vary"] = "Accept-Encoding"
+        max_age = IMMUTABLE_MAX_AGE if _VERSIONED.search(path) else SNAPSHOT_MAX_AGE
+        response.headers["Cache-Control"] = (
+            f"public, max-age={max_age}, immutable" if max_age == IMMUTABLE_MAX_AGE
+            else f"public, max-age={max_age}, must-revalidate"
+        )
+        return response
+
+
+publisher: Publisher | None = None
+
+
+def setup(bind) -> Publisher | None:
+    """Publisher این worker را می‌سازد و به changes وصل می‌کند؛ None اگر SNAPSHOT_DIR خالی باشد."""
+    global publisher
+    if not SNAPSHOT_DIR:
+        return None
+    Path(SNAPSHOT_DIR).mkdir(parents=True, exist_ok=True)
+    publisher = Publisher(bind, SNAPSHOT_DIR)
+    changes.subscribe(publisher.notify)
+    return publisher
@@ -0,0 +1,165 @@
+# back/sqlstats.py
+# ---------------------------------------------------------------------------
+# آمار SQL هر درخواست (تعداد کوئری + زمان کل DB) با eventهای Engine در SQLAlchemy
+# - instrument(engine) روی Engine همگام و async_engine.sync_engine صدا زده می‌شود.
+# - SQLStatsMiddleware برای هر درخواست یک RequestStats در contextvar می‌گذارد؛
+#   eventها (چه در threadpool چه در greenlet درایور async) روی همان شیء می‌شمارند.
+# - N+1: اگر یک «شکل» دستور (متن SQL با پارامترهای ? و لیست IN جمع‌شده) در یک درخواست
+#   SQL_N_PLUS_ONE_THRESHOLD بار یا بیشتر تکرار شود، هشدار با مسیر درخواست لاگ می‌شود.
+# - کوئری کندتر از SQL_SLOW_MS در لاگ «zebin.sql.slow» نوشته می‌شود؛ مقادیر پارامترها
+#   هرگز لاگ نمی‌شوند (فقط تعدادشان).
+# - SQL_DEBUG=1: هدرهای X-DB-Queries و X-DB-Time-ms روی هر پاسخ.
+# - max_queries(n): ابزار تست/بنچمارک؛ اگر کد داخل بلوک بیش از n کوئری بزند AssertionError.
+#       with sqlstats.max_queries(2):
+#           client.get("/users/me", headers=h)
+# ---------------------------------------------------------------------------
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import logging
+import os
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+SQL_DEBUG = os.getenv("SQL_DEBUG", "0") == "1"
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "200"))
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+logger = logging.getLogger("zebin.sql")
+slow_logger = logging.getLogger("zebin.sql.slow")
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """متن SQL بدون تفاوت‌های بی‌اهمیت: فاصله‌ها یکی و IN (?, ?, ...) یکسان."""
+    return _IN_LIST.sub("(?...)", _SPACES.sub(" ", statement).strip())
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    total_ms: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def add(self, statement: str, elapsed_ms: float) -> None:
+        self.queries += 1
+        self.total_ms += elapsed_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("zebin_sql_stats", default=None)
+
+# ناظرهای max_queries (سراسری؛ چون TestClient برنامه را در thread دیگری اجرا می‌کند)
+_watchers: list[RequestStats] = []
+_watchers_lock = threading.Lock()
+
+
+def current() -> RequestStats | None:
+    return _current.get()
+
+
+# ---------- eventهای Engine ----------
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("zebin_t0", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["zebin_t0"].pop()) * 1000
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, elapsed_ms)
+    if _watchers:
+        with _watchers_lock:
+            for w in _watchers:
+                w.add(statement, elapsed_ms)
+    if elapsed_ms >= SQL_SLOW_MS:
+        n = len(parameters) if isinstance(parameters, (list, tuple, dict)) else 0
+        slow_logger.warning(
+            "slow query %.1fms%s: %s [%d params redacted]",
+            elapsed_ms, " (executemany)" if executemany else "", _SPACES.sub(" ", statement), n,
+        )
+
+
+def _on_error(exception_context):
+    # دستور خطا خورده after_cursor_execute ندارد؛ زمان شروعش را از پشته بردار
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("zebin_t0"):
+        conn.info["zebin_t0"].pop()
+
+
+def instrument(*engines) -> None:
+    """اتصال eventها به Engineهای همگام (برای async: async_engine.sync_engine)."""
+    for e in engines:
+        if not event.contains(e, "after_cursor_execute", _after):
+            event.listen(e, "before_cursor_execute", _before)
+            event.listen(e, "after_cursor_execute", _after)
+            event.listen(e, "handle_error", _on_error)
+
+
+# ---------- middleware ----------
+class SQLStatsMiddleware:
+    """
+    middleware خالص ASGI: آمار هر درخواست HTTP را جمع می‌کند، N+1 را هشدار می‌دهد و
+    در حالت SQL_DEBUG هدرهای X-DB-Queries / X-DB-Time-ms را اضافه می‌کند.
+    """
+
+    def __init__(self, app, debug: bool = SQL_DEBUG, threshold: int = SQL_N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.debug = debug
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.debug:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.queries).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.total_ms:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            for shape, n in stats.repeated(self.threshold):
+                logger.warning(
+                    "possible N+1 on %s %s: %d x %s",
+                    scope.get("method"), scope.get("path"), n, shape[:300],
+                )
+
+
+# ---------- ابزار تست ----------
+@contextmanager
+def max_queries(limit: int):
+    """
+    همهٔ کوئری‌های Engineهای instrument‌شده در طول بلوک را می‌شمارد (در هر thread)؛
+    اگر بیش از limit بود AssertionError با پرتکرارترین شکل‌ها.
+    """
+    stats = RequestStats()
+    with _watchers_lock:
+        _watchers.append(stats)
+    try:
+        yield stats
+    finally:
+        with _watchers_lock:
+            _watchers.remove(stats)
+    if stats.queries > limit:
+        top = "\n".join(f"  {n} x {s[:200]}" for s, n in stats.shapes.most_common(5))
+        raise AssertionError(f"expected at most {limit} queries, got {stats.queries}:\n{top}")
@@ -0,0 +1,108 @@
+# back/sync.py
+# ---------------------------------------------------------------------------
+# فید تغییرات برای کلاینت‌های آفلاین (GET /sync)
+# - جدول sync_log (model.SyncLog) برای هر ردیف خبر/مقاله/دستهٔ راهنما/آیتم راهنما یک سطر
+#   با شمارهٔ یکنواخت seq دارد. تریگرهای AFTER INSERT/UPDATE/DELETE روی جدول‌های اصلی با
+#   INSERT OR REPLACE سطر همان ردیف را با seq تازه جایگزین می‌کنند (حذف = deleted=1، یعنی
+#   tombstone). پس همهٔ مسیرهای نوشتن (روترها، ورود گروهی، اسکریپت‌ها) بدون کد اضافه ثبت می‌شوند.
+# - کلاینت توکن آخرین پاسخ را می‌فرستد و فقط سطرهای seq > توکن را می‌گیرد (ایندکس PK).
+#   SQLite یک نویسنده در هر لحظه دارد؛ پس ترتیب seq همان ترتیب commit است و تغییری جا نمی‌ماند.
+# - tombstoneهای قدیمی‌تر از SYNC_TOMBSTONE_DAYS در ensure_sync پاک می‌شوند؛ توکنی که قبل از آن
+#   صادر شده دیگر معتبر نیست (410) و کلاینت باید بدون since از نو بگیرد.
+# - تریگرها فقط برای SQLite نوشته شده‌اند؛ روی دیتابیس دیگر /sync در دسترس نیست (503) تا
+#   تریگرهای همان دیتابیس (مثلاً plpgsql + sequence در Postgres) با همین جدول اضافه شوند.
+# ---------------------------------------------------------------------------
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import logging
+import os
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import model
+from database import IS_SQLITE
+
+SYNC_ENABLED = IS_SQLITE
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+SYNC_DEFAULT_LIMIT = 500
+SYNC_MAX_LIMIT = 5000
+
+logger = logging.getLogger(__name__)
+
+# نام منبع در فید → جدول ORM
+SOURCES = {
+    "news": model.NewsTable,
+    "articles": model.ArticleTable,
+    "guide_categories": model.GuideCategoryTable,
+    "guide_items": model.GuideItemTable,
+}
+
+
+@dataclass
+class Delta:
+    seq: int                                                      # seq آخرین تغییر این صفحه
+    has_more: bool
+    rows: dict[str, list] = field(default_factory=dict)           # منبع → ردیف‌های ORM
+    deleted: dict[str, list[int]] = field(default_factory=dict)   # منبع → idهای حذف‌شده
+
+
+def ensure_sync(bind) -> None:
+    """ساخت تریگرها، پر کردن اولیهٔ sync_log برای ردیف‌های موجود و پاک‌کردن tombstoneهای کهنه. idempotent."""
+    if not SYNC_ENABLED:
+        logger.warning("sync feed disabled: change-log triggers exist only for SQLite")
+        return
+    with bind.begin() as conn:
+        existing = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'").scalars())
+        for kind, table in SOURCES.items():
+            name = table.__tablename__
+            log = lambda r, deleted: (
+                f"INSERT OR REPLACE INTO sync_log(kind, row_id, deleted) VALUES ('{kind}', {r}.id, {deleted})"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS sync_{name}_ai AFTER INSERT ON {name} BEGIN {log('new', 0)}; END"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS sync_{name}_au AFTER UPDATE ON {name} BEGIN {log('new', 0)}; END"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS sync_{name}_ad AFTER DELETE ON {name} BEGIN {log('old', 1)}; END"
+            )
+            if f"sync_{name}_ai" not in existing:
+                # ردیف‌هایی که قبل از نصب تریگرها بوده‌اند (به ترتیب id)
+                conn.exec_driver_sql(
+                    f"INSERT OR IGNORE INTO sync_log(kind, row_id, deleted) "
+                    f"SELECT '{kind}', id, 0 FROM {name} ORDER BY id"
+                )
+        L = model.SyncLog
+        conn.execute(delete(L).where(L.deleted.is_(True), L.changed_at < tombstone_cutoff()))
+
+
+def tombstone_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+
+
+async def delta(db: AsyncSession, since: int, limit: int) -> Delta:
+    """
+    تغییرات بعد از since (حداکثر limit سطر sync_log به ترتیب seq) + ردیف‌های فعلی آن‌ها.
+    since=0 یعنی نسخهٔ کامل: tombstoneها لازم نیستند و حذف می‌شوند.
+    ردیف‌ها بعد از sync_log خوانده می‌شوند؛ اگر بین این دو تغییر کنند یا حذف شوند، سطرشان در
+    sync_log seq بزرگ‌تر از توکن این پاسخ گرفته و در درخواست بعدی دوباره می‌آید (چیزی گم نمی‌شود).
+    """
+    L = model.SyncLog
+    query = select(L.seq, L.kind, L.row_id, L.deleted).where(L.seq > since).order_by(L.seq).limit(limit + 1)
+    if since == 0:
+        query = query.where(L.deleted.is_(False))
+    entries = (await db.execute(query)).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    out = Delta(seq=entries[-1].seq if entries else since, has_more=has_more)
+    live: dict[str, list[int]] = {}
+    for e in entries:
+        (out.deleted if e.deleted else live).setdefault(e.kind, []).append(e.row_id)
+    for kind, ids in live.items():
+        T = SOURCES[kind]
+        out.rows[kind] = (await db.scalars(select(T).where(T.id.in_(ids)).order_by(T.id))).all()
+    return out
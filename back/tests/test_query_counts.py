@@ -0,0 +1,94 @@
+# back/tests/test_query_counts.py
+"""
+سقف تعداد کوئری SQL اندپوینت‌ها (sqlstats.max_queries)
+
+ادعاهای «فهرست خبر یک SELECT است» (projection فهرست‌ها) و «نوشتن بدون refresh» (writes.py)
+این‌جا چک می‌شوند تا یک N+1 یا refresh تازه بی‌صدا برنگردد. اجرا روی یک دیتابیس SQLite موقت
+(مثل اسکریپت‌های scripts/bench_*)؛ احراز هویت ادمین فقط از روی توکن است و کوئری ندارد.
+
+نحوۀ اجرا:
+    cd back
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+_WORKDIR = tempfile.mkdtemp(prefix="zebin-test-")
+os.chdir(_WORKDIR)  # sqlite:///./zebin.db → پوشهٔ موقت
+# max_queries همهٔ threadها را می‌شمارد؛ انتشار snapshot و بررسی دوره‌ای راهنما خاموش/کند
+os.environ.setdefault("SNAPSHOT_DIR", "")
+os.environ.setdefault("GUIDE_SNAPSHOT_CHECK_SECONDS", "3600")
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_SIGNUP_IP", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import facets
+import main
+import sqlstats
+
+NEWS = {"title": "t", "summary": "s", "content": "c"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture(scope="module")
+def admin(client):
+    client.post("/users/signup", json={"username": "admin@example.com", "password": "secret123", "role": "admin"})
+    r = client.post("/users/login", json={"username": "admin@example.com", "password": "secret123"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_news_list_is_one_select(client, admin):
+    for i in range(5):
+        client.post("/news/", json={**NEWS, "title": f"t{i}"}, headers=admin)
+    client.get("/news/")
+    client.post("/news/", json=NEWS, headers=admin)  # کش پاسخ (respcache) خالی شود تا صفحه واقعاً خوانده شود
+
+    with sqlstats.max_queries(2) as st:  # نسخهٔ ETag + یک SELECT صفحه؛ مستقل از تعداد خبرها
+        r = client.get("/news/")
+    assert r.status_code == 200
+    assert len(r.json()) == 6
+    assert "content" not in r.json()[0]
+    assert not st.repeated()
+
+
+# هزینهٔ ثابت هر نوشتن ادمین خبر (مستقل از تعداد ردیف‌ها):
+#   1 بررسی ابطال توکن ادمین در DB (auth._revoked_in_db)
+#   1 UPDATE content_version (changes.mark_changed)
+#   ≤8 به‌روزرسانی نمایهٔ جستجو از sync_log پیش از commit (search.catch_up)
+WRITE_OVERHEAD = 10
+# شمارندهٔ دسته وقتی تریگر ندارد: SELECT دستهٔ قبلی (فقط UPDATE/DELETE) + upsert + حذف صفرها
+FACET_OVERHEAD = 0 if facets.FACETS_TRIGGERS else 3
+
+
+def _loads_news_row(st) -> bool:
+    """SELECT کل ردیف خبر (refresh بعد از commit یا خواندن پیش از UPDATE/DELETE)."""
+    return any(shape.startswith("SELECT news.id") for shape in st.shapes)
+
+
+def test_news_create_has_no_refresh(client, admin):
+    with sqlstats.max_queries(WRITE_OVERHEAD + 1 + FACET_OVERHEAD) as st:  # + INSERT ... RETURNING
+        r = client.post("/news/", json={**NEWS, "category": "recycling"}, headers=admin)
+    assert r.status_code == 201
+    assert r.json()["id"] > 0 and r.json()["category"] == "recycling"
+    assert not _loads_news_row(st)
+
+
+def test_news_delete_is_single_statement(client, admin):
+    news_id = client.post("/news/", json=NEWS, headers=admin).json()["id"]
+    with sqlstats.max_queries(WRITE_OVERHEAD + 1 + FACET_OVERHEAD) as st:  # + DELETE ... RETURNING
+        r = client.delete(f"/news/{news_id}", headers=admin)
+    assert r.status_code == 204
+    assert not _loads_news_row(st)
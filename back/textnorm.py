@@ -0,0 +1,40 @@
+# back/textnorm.py
+# ---------------------------------------------------------------------------
+# یکسان‌سازی متن فارسی برای جستجو
+# - NFKC (شکل‌های نمایشی عربی ﻙ/ﯼ و ... → حرف پایه)
+# - ي / ى → ی ، ك → ک ، ة → ه ، أ / إ / ٱ → ا ، ؤ → و
+# - حذف اعراب (فتحه، کسره، تنوین، تشدید، سکون، الف خنجری) و کشیده (ـ)
+# - نیم‌فاصله (ZWNJ) و بقیهٔ نویسه‌های نامرئی (ZWJ، RLM/LRM، BOM) حذف می‌شوند: «بطری‌ها» و
+#   «بطریها» یک واژه می‌شوند و با جستجوی پیشوندی «بطری» هم پیدا می‌شوند.
+# - ارقام فارسی/عربی → لاتین (۱۲۳ و ١٢٣ → 123) ، حروف کوچک
+# - هم متن نمایه‌شده (search.py هنگام نمایه کردن در پایتون) و هم عبارت جستجو از همین تابع
+#   رد می‌شوند؛ پس هر دو طرف یک شکل دارند.
+# ---------------------------------------------------------------------------
+
+import re
+import unicodedata
+
+_TRANSLATE = str.maketrans({
+    "ي": "ی",  # ي → ی
+    "ى": "ی",  # ى → ی
+    "ك": "ک",  # ك → ک
+    "ة": "ه",  # ة → ه
+    "أ": "ا",  # أ → ا
+    "إ": "ا",  # إ → ا
+    "ٱ": "ا",  # ٱ → ا
+    "ؤ": "و",  # ؤ → و
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # ۰..۹
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # ٠..٩
+})
+
+# اعراب عربی (U+064B..U+065F)، الف خنجری، کشیده و نویسه‌های نامرئی
+_STRIP = re.compile("[\u064B-\u065F\u0670\u0640\u200B-\u200D\u200E\u200F\u2066-\u2069\uFEFF]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str | None) -> str:
+    """متن → شکل یکسان برای نمایه/جستجو (None → '')."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).translate(_TRANSLATE)
+    return _SPACES.sub(" ", _STRIP.sub("", text)).strip().lower()
@@ -0,0 +1,119 @@
+# back/writes.py
+# ---------------------------------------------------------------------------
+# لایهٔ نوشتن روترها (AsyncSession): هر نوشتن یک رفت‌وبرگشت
+# - insert_one / update_one / delete_one با INSERT/UPDATE/DELETE ... RETURNING
+#   مقادیر تولیدشده (id، پیش‌فرض‌های سمت سرور) را همراه خود دستور برمی‌گردانند؛
+#   پس refresh بعد از commit لازم نیست و پاسخ از همان شیء در حافظه ساخته می‌شود
+#   (AsyncSessionLocal با expire_on_commit=False است).
+# - روی دیتابیس بدون RETURNING (مثلاً MySQL) به flush/get معمولی برمی‌گردد.
+# - atomic(db): یک commit برای کل درخواست در هندلرهای چندمرحله‌ای؛ خطا = rollback.
+#   atomicهای تو در تو به بیرونی‌ترین ملحق می‌شوند.
+# - برای جدول‌های خبر/مقاله، وقتی شمارنده‌های دسته تریگر ندارند (facets.tracked)، همین
+#   توابع category_count را در همان تراکنش جابه‌جا می‌کنند؛ روی SQLite کاری نمی‌کنند.
+#
+#   async with writes.atomic(db):
+#       await writes.delete_one(db, model.NewsTable, news_id)
+#       ...
+# ---------------------------------------------------------------------------
+
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import facets
+
+T = TypeVar("T")
+
+_ATOMIC = "zebin_atomic"
+
+
+def _returning(db: AsyncSession, kind: str) -> bool:
+    return getattr(db.get_bind().dialect, f"{kind}_returning", False)
+
+
+def _pk(cls):
+    (col,) = cls.__mapper__.primary_key
+    return col
+
+
+def _where(cls, where):
+    """شرط SQLAlchemy همان‌طور می‌ماند؛ مقدار ساده یعنی «کلید اصلی = مقدار»."""
+    return where if hasattr(where, "compile") else _pk(cls) == where
+
+
+async def insert_one(db: AsyncSession, cls: type[T], **values: Any) -> T:
+    """INSERT ... RETURNING؛ خروجی شیء ORM کامل (در identity map همین Session)."""
+    if kind := facets.tracked(cls):
+        await facets.apply(db, kind, facets.shift((), [values.get("category")]))
+    if _returning(db, "insert"):
+        return await db.scalar(insert(cls).values(**values).returning(cls))
+    obj = cls(**values)
+    db.add(obj)
+    await db.flush()
+    return obj
+
+
+async def _old_categories(db: AsyncSession, cls, cond) -> list:
+    return list((await db.execute(facets.old_categories(cls, cond))).scalars())
+
+
+async def update_one(db: AsyncSession, cls: type[T], where, **values: Any) -> T | None:
+    """
+    UPDATE ... WHERE ... RETURNING برای یک ردیف؛ None یعنی ردیفی پیدا نشد.
+    where یک شرط SQLAlchemy یا مقدار کلید اصلی است.
+    """
+    cond = _where(cls, where)
+    if not values:
+        return await db.scalar(select(cls).where(cond))
+    if "category" in values and (kind := facets.tracked(cls)):
+        old = await _old_categories(db, cls, cond)
+        await facets.apply(db, kind, facets.shift(old, [values["category"]] * len(old)))
+    if _returning(db, "update"):
+        stmt = (
+            update(cls).where(cond).values(**values).returning(cls)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return await db.scalar(stmt)
+    obj = await db.scalar(select(cls).where(cond))
+    if obj is not None:
+        for k, v in values.items():
+            setattr(obj, k, v)
+        await db.flush()
+    return obj
+
+
+async def delete_one(db: AsyncSession, cls, where, returning=None):
+    """
+    DELETE ... RETURNING؛ خروجی مقدار ستون returning (پیش‌فرض کلید اصلی) یا None اگر ردیفی نبود.
+    cascadeهای ORM اجرا نمی‌شوند؛ وابسته‌ها را خود فراخواننده حذف کند.
+    """
+    col = returning if returning is not None else _pk(cls)
+    cond = _where(cls, where)
+    if kind := facets.tracked(cls):
+        await facets.apply(db, kind, facets.shift(await _old_categories(db, cls, cond), ()))
+    stmt = delete(cls).where(cond).execution_options(synchronize_session=False)
+    if _returning(db, "delete"):
+        return await db.scalar(stmt.returning(col))
+    value = await db.scalar(select(col).where(cond))
+    if value is not None:
+        await db.execute(stmt)
+    return value
+
+
+@asynccontextmanager
+async def atomic(db: AsyncSession):
+    """یک تراکنش/commit برای کل بلوک؛ داخل atomic دیگر فقط همان تراکنش بیرونی."""
+    if db.info.get(_ATOMIC):
+        yield db
+        return
+    db.info[_ATOMIC] = True
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(_ATOMIC, None)